@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from alembic.script import ScriptDirectory
 
 import os
 import sys
@@ -14,14 +15,18 @@ if parent_dir not in sys.path:
 
 from src.models.models import Base
 from src.config.database import SQLALCHEMY_DATABASE_URL
+from src.database.schema import budgets_version_hook, rename_legacy_tables
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# 应用启动时（src/database/schema.py）会传入已打开的连接，复用它并保留应用自己的日志配置
+app_connection = config.attributes.get("connection")
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+if config.config_file_name is not None and app_connection is None:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -33,6 +38,9 @@ target_metadata = Base.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# 已发布的 3f54b58a01f8 与 2025_04_22_1917 都建立 budgets 表，连续执行两者时由回调衔接
+on_version_apply = budgets_version_hook(ScriptDirectory.from_config(config), context.get_revision_argument())
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -52,6 +60,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        on_version_apply=on_version_apply,
     )
 
     with context.begin_transaction():
@@ -65,6 +74,17 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    if app_connection is not None:
+        context.configure(
+            connection=app_connection,
+            target_metadata=target_metadata,
+            on_version_apply=on_version_apply
+        )
+        with context.begin_transaction():
+            rename_legacy_tables(app_connection)
+            context.run_migrations()
+        return
+
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = SQLALCHEMY_DATABASE_URL
     connectable = engine_from_config(
@@ -76,10 +96,13 @@ def run_migrations_online() -> None:
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
-            target_metadata=target_metadata
+            target_metadata=target_metadata,
+            on_version_apply=on_version_apply
         )
 
         with context.begin_transaction():
+            # 旧版 init_db 建的表在迁移前改名，命令行升级与应用启动时的升级行为一致
+            rename_legacy_tables(connection)
             context.run_migrations()
 
 
@@ -0,0 +1,64 @@
+"""restore baseline tables
+
+Revision ID: 2026_10_19_0900
+Revises: 2025_04_22_1917
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_0900'
+down_revision = '2025_04_22_1917'
+branch_labels = None
+depends_on = None
+
+# 旧版 init_db 删除了迁移 2025_04_19_1207 建立的这几张表（旧版表由 alembic/env.py 重命名为 legacy_*），
+# 按 2025_04_19_1207 的结构重建，后续迁移才能在其上执行，旧数据由 2026_10_19_1500 回填
+BASELINE_TABLES = {
+    'products': """
+        CREATE TABLE products (
+            product_id SERIAL PRIMARY KEY,
+            product_name VARCHAR(100) NOT NULL,
+            description VARCHAR,
+            unit_price NUMERIC(10, 2) NOT NULL,
+            category VARCHAR(50),
+            created_at TIMESTAMP
+        );
+        CREATE INDEX "ix_products_产品id" ON products (product_id)
+    """,
+    'inventory': """
+        CREATE TABLE inventory (
+            inventory_id SERIAL PRIMARY KEY,
+            product_id INTEGER REFERENCES products (product_id),
+            quantity INTEGER NOT NULL,
+            location VARCHAR(50),
+            last_updated TIMESTAMP
+        );
+        CREATE INDEX "ix_inventory_库存id" ON inventory (inventory_id)
+    """,
+    'orders': """
+        CREATE TABLE orders (
+            order_id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users (user_id),
+            product_id INTEGER REFERENCES products (product_id),
+            quantity INTEGER NOT NULL,
+            total_amount NUMERIC(12, 2) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            created_at TIMESTAMP
+        );
+        CREATE INDEX "ix_orders_订单id" ON orders (order_id)
+    """,
+}
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, ddl in BASELINE_TABLES.items():
+        if not inspector.has_table(table):
+            for statement in ddl.split(';'):
+                op.execute(statement)
+
+def downgrade() -> None:
+    # 重建的表属于 2025_04_19_1207，降级时保留
+    pass
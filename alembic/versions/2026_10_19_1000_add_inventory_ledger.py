@@ -0,0 +1,63 @@
+"""add inventory ledger
+
+Revision ID: 2026_10_19_1000
+Revises: 2026_10_19_0900
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1000'
+down_revision = '2026_10_19_0900'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 只追加的库存流水
+    op.create_table('inventory_movements',
+        sa.Column('movement_id', sa.BigInteger(), nullable=False),
+        sa.Column('inventory_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_change', sa.Integer(), nullable=False),
+        sa.Column('movement_type', sa.String(length=20), nullable=False),
+        sa.Column('reason', sa.String(length=255), nullable=True),
+        sa.Column('reference', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['inventory_id'], ['inventory.inventory_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('movement_id')
+    )
+    op.create_index('ix_inventory_movements_inventory_id_movement_id', 'inventory_movements',
+                    ['inventory_id', 'movement_id'], unique=False)
+    op.create_index('ix_inventory_movements_created_at', 'inventory_movements', ['created_at'], unique=False)
+
+    # 库存预占
+    op.create_table('inventory_reservations',
+        sa.Column('reservation_id', sa.BigInteger(), nullable=False),
+        sa.Column('inventory_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('reference', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['inventory_id'], ['inventory.inventory_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('reservation_id'),
+        sa.CheckConstraint('quantity > 0', name='ck_inventory_reservations_quantity_positive')
+    )
+    # 过期扫描只关心仍在预占中的记录
+    op.create_index('ix_inventory_reservations_held_expires_at', 'inventory_reservations',
+                    ['expires_at'], unique=False, postgresql_where=sa.text("status = 'held'"))
+
+    # 已有库存写入期初流水，使流水合计与快照一致
+    op.execute("""
+        INSERT INTO inventory_movements (inventory_id, quantity_change, movement_type, reason, created_at)
+        SELECT inventory_id, quantity, 'opening', '期初库存', NOW()
+        FROM inventory
+    """)
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_reservations_held_expires_at', table_name='inventory_reservations')
+    op.drop_table('inventory_reservations')
+    op.drop_index('ix_inventory_movements_created_at', table_name='inventory_movements')
+    op.drop_index('ix_inventory_movements_inventory_id_movement_id', table_name='inventory_movements')
+    op.drop_table('inventory_movements')
@@ -0,0 +1,27 @@
+"""inventory multi location
+
+Revision ID: 2026_10_19_1100
+Revises: 2026_10_19_1000
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1100'
+down_revision = '2026_10_19_1000'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 每个产品在每个位置只有一条库存记录；INCLUDE quantity 使可承诺量汇总走仅索引扫描
+    op.create_index('uq_inventory_product_id_location', 'inventory', ['product_id', 'location'],
+                    unique=True, postgresql_include=['quantity'])
+    # 按位置筛选并按 inventory_id 分页
+    op.create_index('ix_inventory_location_inventory_id', 'inventory', ['location', 'inventory_id'],
+                    unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_location_inventory_id', table_name='inventory')
+    op.drop_index('uq_inventory_product_id_location', table_name='inventory')
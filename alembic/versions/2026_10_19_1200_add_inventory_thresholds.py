@@ -0,0 +1,29 @@
+"""add inventory thresholds
+
+Revision ID: 2026_10_19_1200
+Revises: 2026_10_19_1100
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1200'
+down_revision = '2026_10_19_1100'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 每个产品的补货点，所有位置的现有量合计低于该值时预警
+    op.create_table('inventory_thresholds',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('reorder_point', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id'),
+        sa.CheckConstraint('reorder_point >= 0', name='ck_inventory_thresholds_reorder_point_non_negative')
+    )
+
+def downgrade() -> None:
+    op.drop_table('inventory_thresholds')
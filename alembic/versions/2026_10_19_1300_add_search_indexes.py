@@ -0,0 +1,58 @@
+"""add search indexes
+
+Revision ID: 2026_10_19_1300
+Revises: 2026_10_19_1200
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1300'
+down_revision = '2026_10_19_1200'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # 全文检索配置 erp_search：服务器提供 zhparser 时使用中文分词，否则复制 simple
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'erp_search') THEN
+                RETURN;
+            END IF;
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'zhparser') THEN
+                CREATE EXTENSION IF NOT EXISTS zhparser;
+                CREATE TEXT SEARCH CONFIGURATION erp_search (PARSER = zhparser);
+                ALTER TEXT SEARCH CONFIGURATION erp_search ADD MAPPING FOR n, v, a, i, e, l, j WITH simple;
+            ELSE
+                CREATE TEXT SEARCH CONFIGURATION erp_search (COPY = simple);
+            END IF;
+        END
+        $$
+    """)
+
+    # 名称权重A、描述权重B，由数据库自动维护
+    op.execute("""
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('erp_search'::regconfig, coalesce(product_name, '')), 'A') ||
+            setweight(to_tsvector('erp_search'::regconfig, coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+    op.create_index('ix_products_product_name_trgm', 'products', ['product_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'product_name': 'gin_trgm_ops'})
+    op.create_index('ix_suppliers_supplier_name_trgm', 'suppliers', ['supplier_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'supplier_name': 'gin_trgm_ops'})
+
+def downgrade() -> None:
+    op.drop_index('ix_suppliers_supplier_name_trgm', table_name='suppliers')
+    op.drop_index('ix_products_product_name_trgm', table_name='products')
+    op.drop_index('ix_products_search_vector', table_name='products')
+    op.drop_column('products', 'search_vector')
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS erp_search")
@@ -0,0 +1,38 @@
+"""add product price history
+
+Revision ID: 2026_10_19_1400
+Revises: 2026_10_19_1300
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1400'
+down_revision = '2026_10_19_1300'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 价格变动历史，同一次批量调价共享 batch_id
+    op.create_table('product_price_history',
+        sa.Column('history_id', sa.BigInteger(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('old_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('new_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('change_type', sa.String(length=20), nullable=False),
+        sa.Column('price_change', sa.Numeric(precision=12, scale=4), nullable=False),
+        sa.Column('batch_id', sa.String(length=64), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('history_id')
+    )
+    op.create_index('ix_product_price_history_product_id_history_id', 'product_price_history',
+                    ['product_id', 'history_id'], unique=False)
+    op.create_index('ix_product_price_history_batch_id', 'product_price_history', ['batch_id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_product_price_history_batch_id', table_name='product_price_history')
+    op.drop_index('ix_product_price_history_product_id_history_id', table_name='product_price_history')
+    op.drop_table('product_price_history')
@@ -0,0 +1,127 @@
+"""unify product order schema
+
+Revision ID: 2026_10_19_1500
+Revises: 2026_10_19_1400
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1500'
+down_revision = '2026_10_19_1400'
+branch_labels = None
+depends_on = None
+
+# 旧版 main.init_db 建的表在升级前被重命名为 legacy_*（见 src/database/schema.py），在这里回填
+LEGACY_LOCATION = 'MAIN'
+
+def _table_exists(name: str) -> bool:
+    return op.get_bind().execute(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+def upgrade() -> None:
+    # 产品：补充旧版接口使用的字段，库存只记录在 inventory 中
+    op.add_column('products', sa.Column('status', sa.String(length=20), nullable=False, server_default='active'))
+    op.add_column('products', sa.Column('specifications', sa.JSON(), nullable=True))
+    op.add_column('products', sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.func.now()))
+    op.create_index('ix_products_category_product_id', 'products', ['category', 'product_id'], unique=False)
+
+    # 订单：订单头 + 订单项；原有单产品订单的 product_id/quantity 保留为可空的历史字段
+    op.add_column('orders', sa.Column('order_no', sa.String(length=32), nullable=True))
+    op.add_column('orders', sa.Column('customer_name', sa.String(length=100), nullable=True))
+    op.add_column('orders', sa.Column('shipping_address', sa.Text(), nullable=True))
+    op.add_column('orders', sa.Column('delivery_date', sa.DateTime(), nullable=True))
+    op.add_column('orders', sa.Column('specifications', sa.JSON(), nullable=True))
+    op.add_column('orders', sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.func.now()))
+    op.alter_column('orders', 'quantity', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), server_default=sa.func.now())
+    op.execute("UPDATE orders SET order_no = 'ORD' || lpad(order_id::text, 20, '0') WHERE order_no IS NULL")
+    op.alter_column('orders', 'order_no', existing_type=sa.String(length=32), nullable=False)
+    op.create_index('uq_orders_order_no', 'orders', ['order_no'], unique=True)
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+
+    op.create_table('order_items',
+        sa.Column('order_item_id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('specifications', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id']),
+        sa.PrimaryKeyConstraint('order_item_id'),
+        sa.CheckConstraint('quantity > 0', name='ck_order_items_quantity_positive')
+    )
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False)
+
+    # 单产品订单回填为一条订单项
+    op.execute("""
+        INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+        SELECT order_id, product_id, quantity, ROUND(total_amount / quantity, 2)
+        FROM orders
+        WHERE product_id IS NOT NULL AND quantity > 0
+    """)
+
+    # 仪表盘物化视图引用了旧的列名，删除后由 2026_10_19_1900 按新结构重建
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_monthly_sales")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_category_sales")
+
+    if _table_exists('legacy_products'):
+        _backfill_legacy()
+
+def _backfill_legacy() -> None:
+    """把旧版 products(id, name, price, stock)/orders/order_items 迁入统一结构，保留原ID"""
+    op.execute("""
+        INSERT INTO products (product_id, product_name, description, unit_price, category,
+                              status, specifications, created_at, updated_at)
+        SELECT id, name, description, COALESCE(price, 0), category,
+               COALESCE(status, 'active'), specifications, created_at, updated_at
+        FROM legacy_products
+    """)
+    # 旧版的 products.stock 成为默认位置的库存记录，并写入期初流水
+    op.execute(f"""
+        WITH created AS (
+            INSERT INTO inventory (product_id, quantity, location, last_updated)
+            SELECT id, stock, '{LEGACY_LOCATION}', NOW()
+            FROM legacy_products
+            WHERE stock IS NOT NULL
+            RETURNING inventory_id, quantity
+        )
+        INSERT INTO inventory_movements (inventory_id, quantity_change, movement_type, reason, created_at)
+        SELECT inventory_id, quantity, 'opening', '期初库存', NOW() FROM created
+    """)
+    op.execute("""
+        INSERT INTO orders (order_id, order_no, customer_name, total_amount, status, shipping_address,
+                            delivery_date, specifications, created_at, updated_at)
+        SELECT id, order_no, customer_name, COALESCE(total_amount, 0), COALESCE(status, 'pending_payment'),
+               shipping_address, delivery_date, specifications, created_at, updated_at
+        FROM legacy_orders
+    """)
+    op.execute("""
+        INSERT INTO order_items (order_item_id, order_id, product_id, quantity, unit_price, specifications)
+        SELECT id, order_id, product_id, quantity, COALESCE(unit_price, 0), specifications
+        FROM legacy_order_items
+        WHERE order_id IS NOT NULL AND product_id IS NOT NULL AND quantity > 0
+    """)
+    for table, column in (('products', 'product_id'), ('orders', 'order_id'), ('order_items', 'order_item_id')):
+        op.execute(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', '{column}'),
+                          GREATEST((SELECT COALESCE(MAX({column}), 0) FROM {table}), 1))
+        """)
+    op.execute("DROP TABLE legacy_order_items, legacy_orders, legacy_products")
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_table('order_items')
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('uq_orders_order_no', table_name='orders')
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), server_default=None)
+    op.alter_column('orders', 'quantity', existing_type=sa.Integer(), nullable=False)
+    for column in ('updated_at', 'specifications', 'delivery_date', 'shipping_address', 'customer_name', 'order_no'):
+        op.drop_column('orders', column)
+    op.drop_index('ix_products_category_product_id', table_name='products')
+    for column in ('updated_at', 'specifications', 'status'):
+        op.drop_column('products', column)
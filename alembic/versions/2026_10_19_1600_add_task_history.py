@@ -0,0 +1,37 @@
+"""add task history
+
+Revision ID: 2026_10_19_1600
+Revises: 2026_10_19_1500
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1600'
+down_revision = '2026_10_19_1500'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 编排器的指令处理历史；结构与 src/database/migrations/create_task_history_table.sql 一致，
+    # 已用该脚本建过表的数据库保持原表
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS task_history (
+            id SERIAL PRIMARY KEY,
+            timestamp TIMESTAMP NOT NULL,
+            task_id VARCHAR(36) NOT NULL,
+            task_type VARCHAR(50) NOT NULL,
+            input TEXT NOT NULL,
+            output TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            agents_involved TEXT NOT NULL,
+            execution_time FLOAT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_task_history_timestamp ON task_history (timestamp)")
+
+def downgrade() -> None:
+    op.drop_table('task_history')
@@ -0,0 +1,38 @@
+"""add role permissions
+
+Revision ID: 2026_10_19_1700
+Revises: 2026_10_19_1600
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1700'
+down_revision = '2026_10_19_1600'
+branch_labels = None
+depends_on = None
+
+# 初始角色权限，格式为 资源:操作，资源:* 表示该资源的全部操作，* 表示全部权限
+INITIAL_PERMISSIONS = {
+    "admin": ["*"],
+    "manager": ["finance:*", "inventory:*", "product:*", "supplier:*", "user:read"],
+    "sales": ["product:read", "inventory:read", "supplier:read"],
+    "warehouse": ["inventory:*", "product:read", "supplier:read"],
+}
+
+def upgrade() -> None:
+    role_permissions = op.create_table(
+        'role_permissions',
+        sa.Column('role', sa.String(50), primary_key=True),
+        sa.Column('permission', sa.String(100), primary_key=True)
+    )
+    op.bulk_insert(role_permissions, [
+        {"role": role, "permission": permission}
+        for role, permissions in INITIAL_PERMISSIONS.items()
+        for permission in permissions
+    ])
+
+def downgrade() -> None:
+    op.drop_table('role_permissions')
@@ -0,0 +1,55 @@
+"""add unique names
+
+Revision ID: 2026_10_19_1800
+Revises: 2026_10_19_1700
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1800'
+down_revision = '2026_10_19_1700'
+branch_labels = None
+depends_on = None
+
+# 表、列、主键 -> 唯一索引名；接口据索引名把唯一约束冲突转换为对应的 400 提示（见 src/database/constraints.py）
+UNIQUE_COLUMNS = [
+    ('users', 'username', 'user_id', 'uq_users_username'),
+    ('users', 'email', 'user_id', 'uq_users_email'),
+    ('products', 'product_name', 'product_id', 'uq_products_product_name'),
+]
+
+# 错误信息中最多列出的重复行数
+MAX_LISTED = 100
+
+def _duplicates(table: str, column: str, key: str) -> list:
+    return op.get_bind().execute(sa.text(f"""
+        SELECT {key}, {column} FROM {table}
+        WHERE {column} IN (SELECT {column} FROM {table} GROUP BY {column} HAVING COUNT(*) > 1)
+        ORDER BY {column}, {key}
+    """)).all()
+
+def upgrade() -> None:
+    # 之前先查询再插入的检查有竞态，可能已经存在重复值。用户名、邮箱和产品名是登录凭据和业务主键，
+    # 迁移不修改它们：有重复时停止并列出重复行，由运维人工处理或运行 src/scripts/dedup_unique_names.py
+    duplicates = [
+        f"{table}.{column} = {value!r} ({key}={row_id})"
+        for table, column, key, _ in UNIQUE_COLUMNS
+        for row_id, value in _duplicates(table, column, key)
+    ]
+    if duplicates:
+        listed = "\n".join(duplicates[:MAX_LISTED])
+        more = f"\n……共 {len(duplicates)} 行" if len(duplicates) > MAX_LISTED else ""
+        raise RuntimeError(
+            "以下行存在重复值，无法创建唯一索引；处理后重新执行迁移"
+            f"（可运行 python src/scripts/dedup_unique_names.py 查看并处理）：\n{listed}{more}"
+        )
+
+    for table, column, _, index in UNIQUE_COLUMNS:
+        op.create_index(index, table, [column], unique=True)
+
+def downgrade() -> None:
+    for table, _, _, index in reversed(UNIQUE_COLUMNS):
+        op.drop_index(index, table_name=table)
@@ -0,0 +1,47 @@
+"""add dashboard aggregates
+
+Revision ID: 2026_10_19_1900
+Revises: 2026_10_19_1800
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_1900'
+down_revision = '2026_10_19_1800'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 仪表盘汇总物化视图，由 src/database/dashboard_aggregates.py 定时并发刷新；
+    # 旧版本在应用启动时已建过视图的数据库保持原视图
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_monthly_sales AS
+        SELECT
+            DATE_TRUNC('month', o.created_at) AS month,
+            SUM(oi.quantity * oi.unit_price) AS total_sales,
+            COUNT(*) AS item_count
+        FROM orders o
+        JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY DATE_TRUNC('month', o.created_at)
+    """)
+    # REFRESH ... CONCURRENTLY 需要唯一索引
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_monthly_sales_month ON mv_monthly_sales (month)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_category_sales AS
+        SELECT
+            COALESCE(p.category, '其他') AS category,
+            COUNT(*) AS item_count,
+            SUM(oi.quantity * oi.unit_price) AS total_sales
+        FROM products p
+        JOIN order_items oi ON p.product_id = oi.product_id
+        GROUP BY COALESCE(p.category, '其他')
+    """)
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_category_sales_category ON mv_category_sales (category)")
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_category_sales")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_monthly_sales")
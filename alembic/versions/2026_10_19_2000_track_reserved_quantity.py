@@ -0,0 +1,81 @@
+"""track reserved quantity
+
+Revision ID: 2026_10_19_2000
+Revises: 2026_10_19_1900
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_19_2000'
+down_revision = '2026_10_19_1900'
+branch_labels = None
+depends_on = None
+
+# 引用 inventory 的流水与预占表；流水只追加，删除库存记录不能连带删除历史
+LEDGER_TABLES = ['inventory_movements', 'inventory_reservations']
+
+def _replace_foreign_keys(ondelete: str) -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in LEDGER_TABLES:
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['referred_table'] == 'inventory':
+                op.drop_constraint(foreign_key['name'], table, type_='foreignkey')
+        op.create_foreign_key(f'fk_{table}_inventory_id', table, 'inventory',
+                              ['inventory_id'], ['inventory_id'], ondelete=ondelete)
+
+def upgrade() -> None:
+    _replace_foreign_keys('RESTRICT')
+
+    # 预占数量单独记录，quantity 保持为现有量，始终等于流水合计；可用量为 quantity - reserved_quantity
+    op.add_column('inventory', sa.Column('reserved_quantity', sa.Integer(), nullable=False, server_default='0'))
+    op.create_check_constraint('ck_inventory_reserved_quantity_non_negative', 'inventory',
+                               'reserved_quantity >= 0')
+
+    # 之前的预占在创建时已从 quantity 扣减并写了 reserve 流水：仍在预占中的数量记一条归还流水加回现有量，
+    # 再计入 reserved_quantity
+    op.execute("""
+        WITH held AS (
+            SELECT inventory_id, SUM(quantity) AS quantity
+            FROM inventory_reservations
+            WHERE status = 'held'
+            GROUP BY inventory_id
+        ),
+        movements AS (
+            INSERT INTO inventory_movements
+                (inventory_id, quantity_change, movement_type, reason, reference, created_at)
+            SELECT inventory_id, quantity, 'release', '预占改为单独记录', NULL, NOW()
+            FROM held
+        )
+        UPDATE inventory AS i
+        SET quantity = i.quantity + held.quantity, reserved_quantity = held.quantity
+        FROM held
+        WHERE i.inventory_id = held.inventory_id
+    """)
+
+    # 可承诺量按 quantity - reserved_quantity 汇总，覆盖索引同时包含两列以保持仅索引扫描
+    op.drop_index('uq_inventory_product_id_location', table_name='inventory')
+    op.create_index('uq_inventory_product_id_location', 'inventory', ['product_id', 'location'],
+                    unique=True, postgresql_include=['quantity', 'reserved_quantity'])
+
+def downgrade() -> None:
+    op.drop_index('uq_inventory_product_id_location', table_name='inventory')
+    op.create_index('uq_inventory_product_id_location', 'inventory', ['product_id', 'location'],
+                    unique=True, postgresql_include=['quantity'])
+
+    op.execute("""
+        WITH movements AS (
+            INSERT INTO inventory_movements
+                (inventory_id, quantity_change, movement_type, reason, reference, created_at)
+            SELECT inventory_id, -reserved_quantity, 'reserve', '预占并入现有量', NULL, NOW()
+            FROM inventory
+            WHERE reserved_quantity > 0
+        )
+        UPDATE inventory SET quantity = quantity - reserved_quantity WHERE reserved_quantity > 0
+    """)
+    op.drop_constraint('ck_inventory_reserved_quantity_non_negative', 'inventory', type_='check')
+    op.drop_column('inventory', 'reserved_quantity')
+
+    _replace_foreign_keys('CASCADE')
@@ -6,9 +6,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 # 将项目根目录添加到Python路径
 sys.path.insert(0, current_dir)
 
-# 导入并运行main.py
-from src.api.main import app
+# 开发环境：单进程 + 自动重载；生产环境使用 python -m src.api.server --workers N
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("src.api.main:app", host="127.0.0.1", port=8001, reload=True) 
\ No newline at end of file
+    uvicorn.run("src.api.main:app", host="127.0.0.1", port=8001, reload=True)
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from abc import ABC, abstractmethod
 import uuid
 import asyncio
+import threading
 from datetime import datetime
 import logging
 
@@ -59,7 +60,9 @@ class BaseAgent(ABC):
             "average_response_time": 0,
             "last_error": None
         }
-        self._lock = asyncio.Lock()
+        # 编排器在 agent 专用线程中依次执行请求（见 src/core/orchestrator.py 的 AgentRunner），
+        # 指标仍可能被其他线程读取或由直接调用 process 的代码并发更新，更新时加锁
+        self._metrics_lock = threading.Lock()
         
     async def process(self, parameters: Dict[str, Any]) -> AgentResponse:
         """处理任务
@@ -72,16 +75,16 @@ class BaseAgent(ABC):
         """
         start_time = datetime.now()
         self.status = "processing"
-        self.metrics["total_requests"] += 1
+        with self._metrics_lock:
+            self.metrics["total_requests"] += 1
         
         try:
-            async with self._lock:
-                result = await self._process_with_retry(parameters)
+            result = await self._process_with_retry(parameters)
+            with self._metrics_lock:
                 self.metrics["successful_requests"] += 1
-                return result
+            return result
         except AgentError as e:
-            self.metrics["failed_requests"] += 1
-            self.metrics["last_error"] = str(e)
+            self._record_failure(e)
             logger.error(f"Agent {self.agent_id} 处理失败: {str(e)}")
             return AgentResponse(
                 status="error",
@@ -89,8 +92,7 @@ class BaseAgent(ABC):
                 execution_time=(datetime.now() - start_time).total_seconds()
             )
         except Exception as e:
-            self.metrics["failed_requests"] += 1
-            self.metrics["last_error"] = str(e)
+            self._record_failure(e)
             logger.error(f"Agent {self.agent_id} 发生未预期的错误: {str(e)}")
             return AgentResponse(
                 status="error",
@@ -157,9 +159,16 @@ class BaseAgent(ABC):
             start_time: 开始时间
         """
         execution_time = (datetime.now() - start_time).total_seconds()
-        self.metrics["average_response_time"] = (
-            self.metrics["average_response_time"] * (self.metrics["total_requests"] - 1) + execution_time
-        ) / self.metrics["total_requests"]
+        with self._metrics_lock:
+            self.metrics["average_response_time"] = (
+                self.metrics["average_response_time"] * (self.metrics["total_requests"] - 1) + execution_time
+            ) / self.metrics["total_requests"]
+    
+    def _record_failure(self, error: Exception):
+        """记录失败次数和最近一次错误"""
+        with self._metrics_lock:
+            self.metrics["failed_requests"] += 1
+            self.metrics["last_error"] = str(error)
     
     async def reset(self):
         """重置Agent状态"""
@@ -1,6 +1,7 @@
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from .base_agent import BaseAgent, AgentResponse
+from src.core.id_generator import new_id
 
 class FinanceAgent(BaseAgent):
     """财务Agent"""
@@ -111,7 +112,7 @@ class FinanceAgent(BaseAgent):
         Returns:
             Dict[str, Any]: 预算处理结果
         """
-        budget_id = f"BGT_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        budget_id = new_id("BGT_")
         budget_items = []
         total_amount = 0.0
         
@@ -141,7 +142,7 @@ class FinanceAgent(BaseAgent):
         Returns:
             Dict[str, Any]: 支付处理结果
         """
-        payment_id = f"PAY_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        payment_id = new_id("PAY_")
         amount = float(parameters.get("amount", 0.0))
         status = parameters.get("status", "待支付")
         
@@ -166,7 +167,7 @@ class FinanceAgent(BaseAgent):
         Returns:
             Dict[str, Any]: 发票处理结果
         """
-        invoice_id = f"INV_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        invoice_id = new_id("INV_")
         amount = float(parameters.get("amount", 0.0))
         status = parameters.get("status", "待开票")
         
@@ -191,7 +192,7 @@ class FinanceAgent(BaseAgent):
         Returns:
             Dict[str, Any]: 报告内容
         """
-        report_id = f"RPT_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        report_id = new_id("RPT_")
         report_type = parameters.get("report_type", "summary")
         start_date = parameters.get("start_date", (datetime.now() - timedelta(days=30)).isoformat())
         end_date = parameters.get("end_date", datetime.now().isoformat())
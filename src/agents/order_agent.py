@@ -1,9 +1,7 @@
 from typing import Dict, Any, Optional, List
-from transformers import pipeline
 from .base_agent import BaseAgent, AgentResponse
 import re
 from datetime import datetime
-from src.config.database import SessionLocal
 from src.models.models import Order, Product, User, Inventory
 from sqlalchemy.orm import Session
 import uuid
@@ -35,8 +33,8 @@ class OrderAgent(BaseAgent):
         Returns:
             AgentResponse: 处理结果
         """
+        # 创建订单不访问数据库；不在 agent 上保存会话，同一 agent 可以并发处理多个请求
         try:
-            self.db = SessionLocal()
             result = await self.process_order(parameters)
             return AgentResponse(
                 status="success" if result["success"] else "error",
@@ -48,10 +46,6 @@ class OrderAgent(BaseAgent):
                 status="error",
                 error=str(e)
             )
-        finally:
-            if self.db is not None:
-                self.db.close()
-                self.db = None
     
     async def process_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -1,6 +1,7 @@
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from .base_agent import BaseAgent, AgentResponse
+from src.core.id_generator import new_id
 import math
 import uuid
 import logging
@@ -52,7 +53,7 @@ class PlanningAgent(BaseAgent):
             
             # 构建计划详情
             plan_details = {
-                "plan_id": f"PLN_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "plan_id": new_id("PLN_"),
                 "product_info": product_info,
                 "mps": mps,
                 "jss": jss,
@@ -4,6 +4,8 @@ import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from .base_agent import BaseAgent, AgentResponse
+from src.core.id_generator import new_id
+from src.core.alerts import below_threshold
 
 class PredictionAgent(BaseAgent):
     """预测Agent"""
@@ -60,12 +62,18 @@ class PredictionAgent(BaseAgent):
             task_type = parameters.get("task_type", "demand_prediction")
             
             # 根据任务类型选择预测方法
+            alerts = []
             if task_type == "demand_prediction":
                 result = self._predict_demand(product_info)
             elif task_type == "price_prediction":
                 result = self._predict_price(product_info)
             elif task_type == "inventory_prediction":
                 result = self._predict_inventory(product_info)
+                alerts = self._check_inventory_alerts(
+                    np.array([item["predicted_inventory"] for item in result]),
+                    product_info.get("reorder_point", 100),
+                    product_info.get("max_inventory", 1000)
+                )
             else:
                 return AgentResponse(
                     status="error",
@@ -74,7 +82,7 @@ class PredictionAgent(BaseAgent):
             
             # 构建预测结果
             prediction_details = {
-                "prediction_id": f"PRD_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "prediction_id": new_id("PRD_"),
                 "task_type": task_type,
                 "product_info": {
                     "quantity": product_info["quantity"],
@@ -86,6 +94,7 @@ class PredictionAgent(BaseAgent):
                     }
                 },
                 "predictions": result,
+                "alerts": alerts,
                 "status": "completed",
                 "created_at": datetime.now().isoformat()
             }
@@ -284,33 +293,32 @@ class PredictionAgent(BaseAgent):
         # 简单实现：使用预测值的标准差作为置信度指标
         return 1.0 / (1.0 + np.std(predictions))
         
-    def _check_inventory_alerts(self, predictions: np.ndarray) -> List[Dict[str, Any]]:
+    def _check_inventory_alerts(self, predictions: np.ndarray, min_threshold: float = 100,
+                                max_threshold: float = 1000) -> List[Dict[str, Any]]:
         """检查库存预警
         
         Args:
             predictions: 预测值
+            min_threshold: 最小库存阈值（补货点）
+            max_threshold: 最大库存阈值
             
         Returns:
             List[Dict[str, Any]]: 预警列表
         """
-        alerts = []
-        min_threshold = 100  # 最小库存阈值
-        max_threshold = 1000  # 最大库存阈值
+        predictions = np.asarray(predictions, dtype=float)
+        low = below_threshold(predictions, np.full(predictions.shape, min_threshold))
+        high = np.flatnonzero(predictions > max_threshold)
         
-        for i, value in enumerate(predictions):
-            if value < min_threshold:
-                alerts.append({
-                    "type": "low",
-                    "date": (datetime.now() + timedelta(days=i+1)).isoformat(),
-                    "value": float(value),
-                    "threshold": min_threshold
-                })
-            elif value > max_threshold:
-                alerts.append({
-                    "type": "high",
-                    "date": (datetime.now() + timedelta(days=i+1)).isoformat(),
-                    "value": float(value),
-                    "threshold": max_threshold
-                })
-                
+        now = datetime.now()
+        alerts = [
+            {
+                "type": alert_type,
+                "date": (now + timedelta(days=int(i) + 1)).isoformat(),
+                "value": float(predictions[i]),
+                "threshold": threshold
+            }
+            for alert_type, indexes, threshold in (("low", low, min_threshold), ("high", high, max_threshold))
+            for i in indexes
+        ]
+        alerts.sort(key=lambda alert: alert["date"])
         return alerts 
\ No newline at end of file
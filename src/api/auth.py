@@ -0,0 +1,67 @@
+from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from src.config.database import SessionLocal
+from src.core.cache import shared_backend_from_env
+from src.core.permissions import PermissionCache, action_for_method
+from src.core.security import InvalidTokenError, token_service
+from src.database.role_permissions import RolePermissionDAO
+
+# auto_error=False：缺少令牌时由 get_current_user 统一返回 401
+bearer_scheme = HTTPBearer(auto_error=False)
+
+class CurrentUser(BaseModel):
+    user_id: int
+    username: str
+    role: str
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> CurrentUser:
+    """从 Authorization: Bearer 令牌解析当前用户，不查询数据库"""
+    if credentials is None:
+        raise _unauthorized("未提供访问令牌")
+    try:
+        claims = token_service.verify(credentials.credentials)
+    except InvalidTokenError:
+        raise _unauthorized("访问令牌无效或已过期")
+    return CurrentUser(user_id=int(claims["sub"]), username=claims["username"], role=claims["role"])
+
+def _load_role_permissions() -> Dict[str, List[str]]:
+    db = SessionLocal()
+    try:
+        return RolePermissionDAO.load_all(db)
+    finally:
+        db.close()
+
+# 角色权限表的进程内缓存，所有路由共享
+permission_cache = PermissionCache(_load_role_permissions, shared_backend_from_env())
+
+async def _check(current_user: CurrentUser, permission: str) -> CurrentUser:
+    if permission_cache.is_stale():
+        # 重新加载可能访问数据库，放到线程池中执行；平时只是一次字典查找
+        await run_in_threadpool(permission_cache.refresh)
+    if not permission_cache.allows(current_user.role, permission):
+        raise HTTPException(status_code=403, detail=f"角色 {current_user.role} 没有 {permission} 权限")
+    return current_user
+
+def require_permission(permission: str):
+    """要求当前用户拥有指定权限（如 "user:write"）的依赖"""
+    async def dependency(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+        return await _check(current_user, permission)
+    return dependency
+
+def require_access(resource: str):
+    """按请求方法检查资源权限的依赖：GET/HEAD/OPTIONS 需要 资源:read，其余需要 资源:write
+
+    用作 APIRouter 的 dependencies 即可覆盖整个路由器。
+    """
+    async def dependency(request: Request, current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+        return await _check(current_user, f"{resource}:{action_for_method(request.method)}")
+    return dependency
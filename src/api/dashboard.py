@@ -1,54 +1,39 @@
 from fastapi import APIRouter, HTTPException
-from sqlalchemy import text
-from src.config.database import engine
-from datetime import datetime, timedelta
-import json
+from src.database.dashboard_aggregates import (
+    get_sales_trend_cached,
+    get_category_distribution_cached
+)
+import asyncio
 
 router = APIRouter()
 
 @router.get("/sales-trend")
 async def get_sales_trend():
     try:
-        with engine.connect() as conn:
-            # 获取最近12个月的销售数据
-            query = text("""
-                SELECT 
-                    DATE_TRUNC('month', o.created_at) as month,
-                    SUM(oi.quantity * oi.unit_price) as total_sales
-                FROM orders o
-                JOIN order_items oi ON o.id = oi.order_id
-                WHERE o.created_at >= NOW() - INTERVAL '12 months'
-                GROUP BY DATE_TRUNC('month', o.created_at)
-                ORDER BY month ASC
-            """)
-            result = conn.execute(query)
-            sales_data = [{"month": row[0].strftime("%Y-%m"), "total_sales": float(row[1])} if row[1] else 
-                         {"month": row[0].strftime("%Y-%m"), "total_sales": 0.0} 
-                         for row in result]
-            return sales_data
+        # 通过异步引擎读取预先汇总的月度销售额（mv_monthly_sales），并在进程内缓存
+        return await get_sales_trend_cached()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/category-distribution")
 async def get_category_distribution():
     try:
-        with engine.connect() as conn:
-            # 获取产品类别分布
-            query = text("""
-                SELECT 
-                    p.category,
-                    COUNT(*) as count,
-                    SUM(oi.quantity * oi.unit_price) as total_sales
-                FROM products p
-                JOIN order_items oi ON p.id = oi.product_id
-                GROUP BY p.category
-                ORDER BY total_sales DESC
-            """)
-            result = conn.execute(query)
-            category_data = [{"category": row[0] or "其他", 
-                            "count": int(row[1]),
-                            "total_sales": float(row[2])} 
-                           for row in result]
-            return category_data
+        # 通过异步引擎读取预先汇总的类别销售分布（mv_category_sales），并在进程内缓存
+        return await get_category_distribution_cached()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/summary")
+async def get_summary():
+    try:
+        # 两个汇总分别占用一个连接并行查询
+        sales_trend, category_distribution = await asyncio.gather(
+            get_sales_trend_cached(),
+            get_category_distribution_cached()
+        )
+        return {
+            "sales_trend": sales_trend,
+            "category_distribution": category_distribution
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
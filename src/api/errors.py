@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from typing import Dict
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.database.constraints import violated_unique_constraint
+
+@contextmanager
+def unique_violations_as_400(db: Session, messages: Dict[str, str]):
+    """由唯一索引保证唯一性：冲突时回滚并按约束名返回 400，其他完整性错误原样抛出
+
+    Args:
+        db: 数据库会话
+        messages: 约束名 -> 返回给客户端的提示
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        detail = messages.get(violated_unique_constraint(e))
+        if detail is None:
+            raise
+        raise HTTPException(status_code=400, detail=detail)
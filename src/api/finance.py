@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 from decimal import Decimal
 
-from src.config.database import get_db
+from src.config.database import get_db, SessionLocal
+from src.api.export import export_response, DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
+from src.api.auth import require_access
+from src.api.pagination import paginate, MAX_PAGE_SIZE
+from src.api.responses import FastJSONResponse
 from src.models.models import (
     FinancialAccount, 
     Transaction, 
@@ -15,7 +19,8 @@ from src.models.models import (
     AccountType
 )
 
-router = APIRouter(prefix="/finance", tags=["finance"])
+# 读操作需要 finance:read 权限，写操作需要 finance:write 权限
+router = APIRouter(prefix="/finance", tags=["finance"], dependencies=[Depends(require_access("finance"))])
 
 # Pydantic models
 class AccountCreate(BaseModel):
@@ -104,6 +109,36 @@ class BudgetResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# 查询过滤条件，列表接口与导出接口共用
+def _filter_transactions(query, account_id, transaction_type, start_date, end_date):
+    if account_id:
+        query = query.filter(Transaction.account_id == account_id)
+    if transaction_type:
+        query = query.filter(Transaction.transaction_type == transaction_type)
+    if start_date:
+        query = query.filter(Transaction.transaction_date >= start_date)
+    if end_date:
+        query = query.filter(Transaction.transaction_date <= end_date)
+    return query
+
+def _filter_reports(query, report_type, start_date, end_date):
+    if report_type:
+        query = query.filter(FinancialReport.report_type == report_type)
+    if start_date:
+        query = query.filter(FinancialReport.report_date >= start_date)
+    if end_date:
+        query = query.filter(FinancialReport.report_date <= end_date)
+    return query
+
+def _filter_budgets(query, department, category, status):
+    if department:
+        query = query.filter(Budget.department == department)
+    if category:
+        query = query.filter(Budget.category == category)
+    if status:
+        query = query.filter(Budget.status == status)
+    return query
+
 # API endpoints
 @router.post("/accounts", response_model=AccountResponse)
 async def create_account(account: AccountCreate, db: Session = Depends(get_db)):
@@ -115,9 +150,15 @@ async def create_account(account: AccountCreate, db: Session = Depends(get_db)):
     return db_account
 
 @router.get("/accounts", response_model=List[AccountResponse])
-async def get_accounts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_accounts(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """获取账户列表"""
-    accounts = db.query(FinancialAccount).offset(skip).limit(limit).all()
+    accounts = paginate(db.query(FinancialAccount), FinancialAccount.account_id, response, limit, cursor, skip)
     return accounts
 
 @router.get("/accounts/{account_id}", response_model=AccountResponse)
@@ -155,8 +196,10 @@ async def create_transaction(transaction: TransactionCreate, db: Session = Depen
 
 @router.get("/transactions", response_model=List[TransactionResponse])
 async def get_transactions(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     account_id: Optional[int] = None,
     transaction_type: Optional[str] = None,
     start_date: Optional[datetime] = None,
@@ -164,20 +207,28 @@ async def get_transactions(
     db: Session = Depends(get_db)
 ):
     """获取交易记录列表"""
-    query = db.query(Transaction)
-    
-    if account_id:
-        query = query.filter(Transaction.account_id == account_id)
-    if transaction_type:
-        query = query.filter(Transaction.transaction_type == transaction_type)
-    if start_date:
-        query = query.filter(Transaction.transaction_date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.transaction_date <= end_date)
+    query = _filter_transactions(db.query(Transaction), account_id, transaction_type, start_date, end_date)
     
-    transactions = query.offset(skip).limit(limit).all()
+    transactions = paginate(query, Transaction.transaction_id, response, limit, cursor, skip)
     return transactions
 
+@router.get("/transactions/export")
+async def export_transactions(
+    format: str = "csv",
+    account_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)
+):
+    """流式导出交易记录（CSV/Parquet）"""
+    columns = list(TransactionResponse.__fields__)
+    db = SessionLocal()
+    query = db.query(*[getattr(Transaction, name) for name in columns])
+    query = _filter_transactions(query, account_id, transaction_type, start_date, end_date)
+    query = query.order_by(Transaction.transaction_id)
+    return export_response(query, columns, format, "transactions", chunk_size, session=db)
+
 @router.post("/reports", response_model=ReportResponse)
 async def create_report(report: ReportCreate, db: Session = Depends(get_db)):
     """创建财务报表"""
@@ -189,26 +240,35 @@ async def create_report(report: ReportCreate, db: Session = Depends(get_db)):
 
 @router.get("/reports", response_model=List[ReportResponse])
 async def get_reports(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     report_type: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
     """获取财务报表列表"""
-    query = db.query(FinancialReport)
-    
-    if report_type:
-        query = query.filter(FinancialReport.report_type == report_type)
-    if start_date:
-        query = query.filter(FinancialReport.report_date >= start_date)
-    if end_date:
-        query = query.filter(FinancialReport.report_date <= end_date)
+    query = _filter_reports(db.query(FinancialReport), report_type, start_date, end_date)
     
     reports = query.offset(skip).limit(limit).all()
     return reports
 
+@router.get("/reports/export")
+async def export_reports(
+    format: str = "csv",
+    report_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)
+):
+    """流式导出财务报表（CSV/Parquet）"""
+    columns = list(ReportResponse.__fields__)
+    db = SessionLocal()
+    query = db.query(*[getattr(FinancialReport, name) for name in columns])
+    query = _filter_reports(query, report_type, start_date, end_date)
+    query = query.order_by(FinancialReport.report_id)
+    return export_response(query, columns, format, "reports", chunk_size, session=db)
+
 @router.post("/budgets", response_model=BudgetResponse)
 async def create_budget(budget: BudgetCreate, db: Session = Depends(get_db)):
     """创建预算"""
@@ -220,27 +280,36 @@ async def create_budget(budget: BudgetCreate, db: Session = Depends(get_db)):
 
 @router.get("/budgets", response_model=List[BudgetResponse])
 async def get_budgets(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     department: Optional[str] = None,
     category: Optional[str] = None,
     status: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """获取预算列表"""
-    query = db.query(Budget)
-    
-    if department:
-        query = query.filter(Budget.department == department)
-    if category:
-        query = query.filter(Budget.category == category)
-    if status:
-        query = query.filter(Budget.status == status)
+    query = _filter_budgets(db.query(Budget), department, category, status)
     
     budgets = query.offset(skip).limit(limit).all()
     return budgets
 
-@router.get("/reports/balance-sheet")
+@router.get("/budgets/export")
+async def export_budgets(
+    format: str = "csv",
+    department: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)
+):
+    """流式导出预算（CSV/Parquet）"""
+    columns = list(BudgetResponse.__fields__)
+    db = SessionLocal()
+    query = db.query(*[getattr(Budget, name) for name in columns])
+    query = _filter_budgets(query, department, category, status)
+    query = query.order_by(Budget.budget_id)
+    return export_response(query, columns, format, "budgets", chunk_size, session=db)
+
+@router.get("/reports/balance-sheet", response_class=FastJSONResponse)
 async def get_balance_sheet(date: Optional[datetime] = None, db: Session = Depends(get_db)):
     """获取资产负债表"""
     if not date:
@@ -256,7 +325,8 @@ async def get_balance_sheet(date: Optional[datetime] = None, db: Session = Depen
                      if account.account_type == AccountType.PAYABLE.value)
     equity = assets - liabilities
     
-    return {
+    # 直接返回响应对象，跳过 jsonable_encoder，Decimal/datetime 在序列化时一次转换
+    return FastJSONResponse({
         "date": date,
         "assets": assets,
         "liabilities": liabilities,
@@ -269,9 +339,9 @@ async def get_balance_sheet(date: Optional[datetime] = None, db: Session = Depen
             }
             for account in accounts
         ]
-    }
+    })
 
-@router.get("/reports/income-statement")
+@router.get("/reports/income-statement", response_class=FastJSONResponse)
 async def get_income_statement(
     start_date: datetime,
     end_date: datetime,
@@ -287,7 +357,7 @@ async def get_income_statement(
     expenses = sum(t.amount for t in transactions if t.transaction_type == TransactionType.EXPENSE.value)
     profit = income - expenses
     
-    return {
+    return FastJSONResponse({
         "period_start": start_date,
         "period_end": end_date,
         "income": income,
@@ -302,9 +372,9 @@ async def get_income_statement(
             }
             for t in transactions
         ]
-    }
+    })
 
-@router.get("/reports/cash-flow")
+@router.get("/reports/cash-flow", response_class=FastJSONResponse)
 async def get_cash_flow(
     start_date: datetime,
     end_date: datetime,
@@ -328,7 +398,7 @@ async def get_cash_flow(
     financing_cash_flow = sum(t.amount for t in cash_transactions 
                             if t.transaction_type in [TransactionType.LOAN.value, TransactionType.REPAYMENT.value])
     
-    return {
+    return FastJSONResponse({
         "period_start": start_date,
         "period_end": end_date,
         "operating_cash_flow": operating_cash_flow,
@@ -344,4 +414,4 @@ async def get_cash_flow(
             }
             for t in cash_transactions
         ]
-    } 
\ No newline at end of file
+    })
@@ -1,14 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 from decimal import Decimal
+import csv
+import io
+import json
+import logging
 
 from src.config.database import get_db
+from src.api.auth import require_access
+from src.api.pagination import paginate, encode_cursor, decode_cursor, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from src.database.inventory_ledger import InventoryLedgerDAO, InsufficientStockError, BATCH_CHUNK
+from src.database.inventory_availability import InventoryAvailabilityDAO
+from src.database.stock_alerts import StockAlertDAO
+from src.database.stock_events import on_stock_changed
+from src.database.product_cache import product_catalog_cache
+from src.core.alerts import stock_alert_hub
 from src.models.models import Inventory, Product
 
-router = APIRouter(prefix="/inventory", tags=["inventory"])
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 读操作需要 inventory:read 权限，写操作需要 inventory:write 权限
+router = APIRouter(prefix="/inventory", tags=["inventory"], dependencies=[Depends(require_access("inventory"))])
 
 # Pydantic模型
 class InventoryCreate(BaseModel):
@@ -44,10 +63,13 @@ async def create_inventory(inventory: InventoryCreate, db: Session = Depends(get
     if not product:
         raise HTTPException(status_code=404, detail="产品不存在")
     
-    # 检查是否已存在该产品的库存记录
-    existing = db.query(Inventory).filter(Inventory.product_id == inventory.product_id).first()
+    # 同一产品可以存放在多个位置，但每个位置只有一条库存记录
+    existing = db.query(Inventory).filter(
+        Inventory.product_id == inventory.product_id,
+        Inventory.location == inventory.location
+    ).first()
     if existing:
-        raise HTTPException(status_code=400, detail="该产品的库存记录已存在")
+        raise HTTPException(status_code=400, detail="该产品在此位置的库存记录已存在")
     
     db_inventory = Inventory(
         product_id=inventory.product_id,
@@ -56,19 +78,25 @@ async def create_inventory(inventory: InventoryCreate, db: Session = Depends(get
         last_updated=datetime.now()
     )
     db.add(db_inventory)
+    db.flush()
+    InventoryLedgerDAO.record_opening(db, db_inventory.inventory_id, db_inventory.quantity)
     db.commit()
     db.refresh(db_inventory)
+    on_stock_changed(db, product_ids=[db_inventory.product_id])
     return db_inventory
 
 @router.get("", response_model=List[InventoryDetailResponse])
 async def get_inventory(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     location: Optional[str] = None,
+    product_id: Optional[int] = None,
     min_quantity: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """获取库存列表"""
+    """获取库存列表（每个产品在每个位置一条）"""
     query = db.query(
         Inventory,
         Product.product_name,
@@ -78,13 +106,18 @@ async def get_inventory(
     
     if location:
         query = query.filter(Inventory.location == location)
+    if product_id is not None:
+        query = query.filter(Inventory.product_id == product_id)
     if min_quantity is not None:
         query = query.filter(Inventory.quantity >= min_quantity)
     
-    results = query.offset(skip).limit(limit).all()
+    results = paginate(
+        query, Inventory.inventory_id, response, limit, cursor, skip,
+        key_getter=lambda row: row.Inventory.inventory_id
+    )
     
     # 转换为响应格式
-    response = []
+    items = []
     for result in results:
         inventory_dict = {
             "inventory_id": result.Inventory.inventory_id,
@@ -96,9 +129,117 @@ async def get_inventory(
             "unit_price": result.unit_price,
             "total_value": result.total_value
         }
-        response.append(inventory_dict)
+        items.append(inventory_dict)
+    
+    return items
+
+class ProductStockSummary(BaseModel):
+    product_id: int
+    total_quantity: int
+    location_count: int
+
+@router.get("/summary", response_model=List[ProductStockSummary])
+async def get_inventory_summary(
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """按产品汇总所有位置的现有量"""
+    after_product_id = decode_cursor(cursor, "product_id", int) if cursor else None
+    rows = InventoryAvailabilityDAO.on_hand_by_product(db, limit + 1, after_product_id)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("product_id", rows[-1]["product_id"])
+    return rows
+
+@router.get("/atp")
+async def get_available_to_promise(
+    product_ids: str,
+    location: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """查询产品的可承诺量（ATP）
+
+    product_ids 为逗号分隔的产品ID，没有库存记录的产品可承诺量为0。
+    """
+    try:
+        ids = [int(value) for value in product_ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="product_ids 格式错误")
+    available = InventoryAvailabilityDAO.available_to_promise(db, ids, location)
+    return {product_id: available.get(product_id, 0) for product_id in ids}
+
+# 低库存预警API
+class ReorderPointSet(BaseModel):
+    reorder_point: int
+
+class ReorderPointResponse(BaseModel):
+    product_id: int
+    reorder_point: int
+    updated_at: datetime
+
+# SSE 空闲时发送心跳的间隔，防止代理断开长连接
+ALERT_HEARTBEAT = 15
+
+@router.get("/thresholds", response_model=List[ReorderPointResponse])
+async def get_reorder_points(
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """获取产品补货点列表"""
+    after_product_id = decode_cursor(cursor, "product_id", int) if cursor else None
+    rows = StockAlertDAO.list_reorder_points(db, limit + 1, after_product_id)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("product_id", rows[-1]["product_id"])
+    return rows
+
+@router.put("/thresholds/{product_id}", response_model=ReorderPointResponse)
+async def set_reorder_point(product_id: int, threshold: ReorderPointSet, db: Session = Depends(get_db)):
+    """设置产品补货点，所有位置的现有量合计低于补货点时产生预警"""
+    if threshold.reorder_point < 0:
+        raise HTTPException(status_code=400, detail="补货点不能为负数")
+    product = db.query(Product).filter(Product.product_id == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="产品不存在")
     
-    return response
+    result = StockAlertDAO.set_reorder_point(db, product_id, threshold.reorder_point)
+    db.commit()
+    on_stock_changed(db, product_ids=[product_id])
+    return result
+
+@router.delete("/thresholds/{product_id}")
+async def delete_reorder_point(product_id: int, db: Session = Depends(get_db)):
+    """删除产品补货点"""
+    if not StockAlertDAO.delete_reorder_point(db, product_id):
+        raise HTTPException(status_code=404, detail="补货点不存在")
+    db.commit()
+    on_stock_changed(db, product_ids=[product_id])
+    return {"message": "补货点已删除"}
+
+@router.get("/alerts")
+async def get_stock_alerts():
+    """获取当前处于低库存预警中的产品"""
+    return stock_alert_hub.active()
+
+@router.get("/alerts/stream")
+async def stream_stock_alerts():
+    """以 Server-Sent Events 推送低库存预警
+
+    连接建立后先推送当前所有预警，之后在库存变动使产品低于或恢复到补货点时推送事件。
+    """
+    async def events():
+        async for alert in stock_alert_hub.subscribe(heartbeat=ALERT_HEARTBEAT):
+            if alert is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield f"event: {alert['type']}\ndata: {json.dumps(alert, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/{inventory_id}", response_model=InventoryDetailResponse)
 async def get_inventory_item(inventory_id: int, db: Session = Depends(get_db)):
@@ -131,18 +272,26 @@ async def update_inventory(
     db: Session = Depends(get_db)
 ):
     """更新库存信息"""
+    if inventory.quantity is not None:
+        # 直接设置数量时按差额记录流水
+        result = InventoryLedgerDAO.set_quantity(db, inventory_id, inventory.quantity, "手工更新", inventory.location)
+        if result is None:
+            raise HTTPException(status_code=404, detail="库存记录不存在")
+        db.commit()
+        on_stock_changed(db, product_ids=[result["product_id"]])
+        return result
+    
     db_inventory = db.query(Inventory).filter(Inventory.inventory_id == inventory_id).first()
     if not db_inventory:
         raise HTTPException(status_code=404, detail="库存记录不存在")
     
-    if inventory.quantity is not None:
-        db_inventory.quantity = inventory.quantity
     if inventory.location is not None:
         db_inventory.location = inventory.location
     
     db_inventory.last_updated = datetime.now()
     db.commit()
     db.refresh(db_inventory)
+    product_catalog_cache.invalidate_products([db_inventory.product_id])
     return db_inventory
 
 @router.delete("/{inventory_id}")
@@ -151,9 +300,13 @@ async def delete_inventory(inventory_id: int, db: Session = Depends(get_db)):
     inventory = db.query(Inventory).filter(Inventory.inventory_id == inventory_id).first()
     if not inventory:
         raise HTTPException(status_code=404, detail="库存记录不存在")
+    if InventoryLedgerDAO.has_history(db, inventory_id):
+        raise HTTPException(status_code=409, detail="库存记录已有流水，不能删除，请将数量调整为0")
     
+    product_id = inventory.product_id
     db.delete(inventory)
     db.commit()
+    on_stock_changed(db, product_ids=[product_id])
     return {"message": "库存记录已删除"}
 
 # 库存调整API
@@ -168,17 +321,288 @@ async def adjust_inventory(
     db: Session = Depends(get_db)
 ):
     """调整库存数量"""
-    db_inventory = db.query(Inventory).filter(Inventory.inventory_id == inventory_id).first()
-    if not db_inventory:
+    try:
+        result = InventoryLedgerDAO.adjust(db, inventory_id, adjustment.quantity_change, adjustment.reason)
+    except InsufficientStockError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="库存不足")
+    if result is None:
         raise HTTPException(status_code=404, detail="库存记录不存在")
     
-    new_quantity = db_inventory.quantity + adjustment.quantity_change
-    if new_quantity < 0:
+    db.commit()
+    on_stock_changed(db, product_ids=[result["product_id"]])
+    return result
+
+class MovementResponse(BaseModel):
+    movement_id: int
+    inventory_id: int
+    quantity_change: int
+    movement_type: str
+    reason: Optional[str]
+    reference: Optional[str]
+    created_at: datetime
+
+@router.get("/{inventory_id}/movements", response_model=List[MovementResponse])
+async def get_inventory_movements(
+    inventory_id: int,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """获取库存流水（按时间倒序，before_id 用于翻页）"""
+    return InventoryLedgerDAO.list_movements(db, inventory_id, limit, before_id)
+
+# 库存预占API
+class ReservationCreate(BaseModel):
+    quantity: int
+    ttl_seconds: int = 900  # 预占有效期，到期未确认自动归还
+    reference: Optional[str] = None
+
+class ReservationResponse(BaseModel):
+    reservation_id: int
+    inventory_id: int
+    quantity: int
+    reference: Optional[str]
+    status: str
+    expires_at: datetime
+    created_at: datetime
+
+@router.post("/{inventory_id}/reservations", response_model=ReservationResponse)
+async def create_reservation(
+    inventory_id: int,
+    reservation: ReservationCreate,
+    db: Session = Depends(get_db)
+):
+    """预占库存"""
+    if reservation.quantity <= 0:
+        raise HTTPException(status_code=400, detail="预占数量必须大于0")
+    if reservation.ttl_seconds <= 0:
+        raise HTTPException(status_code=400, detail="预占有效期必须大于0")
+    try:
+        result = InventoryLedgerDAO.reserve(
+            db, inventory_id, reservation.quantity, reservation.ttl_seconds, reservation.reference
+        )
+    except InsufficientStockError:
+        db.rollback()
         raise HTTPException(status_code=400, detail="库存不足")
-    
-    db_inventory.quantity = new_quantity
-    db_inventory.last_updated = datetime.now()
+    if result is None:
+        raise HTTPException(status_code=404, detail="库存记录不存在")
     
     db.commit()
-    db.refresh(db_inventory)
-    return db_inventory 
\ No newline at end of file
+    on_stock_changed(db, inventory_ids=[inventory_id])
+    return result
+
+@router.post("/reservations/{reservation_id}/release", response_model=ReservationResponse)
+async def release_reservation(reservation_id: int, db: Session = Depends(get_db)):
+    """释放预占"""
+    result = InventoryLedgerDAO.release(db, reservation_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="预占不存在或已结束")
+    db.commit()
+    on_stock_changed(db, inventory_ids=[result["inventory_id"]])
+    return result
+
+@router.post("/reservations/{reservation_id}/consume", response_model=ReservationResponse)
+async def consume_reservation(reservation_id: int, db: Session = Depends(get_db)):
+    """确认预占（出库）"""
+    result = InventoryLedgerDAO.consume(db, reservation_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="预占不存在或已结束")
+    db.commit()
+    return result
+
+# 批量调整与盘点API
+class BatchAdjustmentItem(BaseModel):
+    inventory_id: Optional[int] = None
+    product_id: Optional[int] = None
+    location: Optional[str] = None  # 按 product_id 指定且产品有多个位置时必填
+    quantity_change: Optional[int] = None  # 增量调整
+    count: Optional[int] = None  # 盘点数量（绝对值）
+    reason: Optional[str] = None
+
+class BatchAdjustment(BaseModel):
+    items: List[BatchAdjustmentItem]
+    reason: str = "批量调整"
+    atomic: bool = False  # 为 True 时任一条目失败则整批回滚
+
+def _validate_batch_item(item: Optional[BatchAdjustmentItem]) -> Optional[str]:
+    """校验单个条目，返回错误信息；None 表示该行无法解析"""
+    if item is None:
+        return "数值格式错误"
+    if (item.inventory_id is None) == (item.product_id is None):
+        return "inventory_id 和 product_id 必须且只能提供一个"
+    if (item.quantity_change is None) == (item.count is None):
+        return "quantity_change 和 count 必须且只能提供一个"
+    if item.count is not None and item.count < 0:
+        return "盘点数量不能为负数"
+    return None
+
+def _apply_batch_items(db: Session, items: List[Optional[BatchAdjustmentItem]], default_reason: str,
+                       seen: set, first_row: int = 0) -> List[dict]:
+    """校验并批量应用一组条目，返回逐条结果"""
+    results = [{"row": first_row + index, "inventory_id": item.inventory_id if item else None, "status": "failed",
+                "old_quantity": None, "new_quantity": None, "error": _validate_batch_item(item)}
+               for index, item in enumerate(items)]
+    
+    # 一次查询把 product_id（+ location）解析为 inventory_id
+    product_ids = {item.product_id for item, result in zip(items, results)
+                   if not result["error"] and item.product_id is not None}
+    product_locations = InventoryLedgerDAO.resolve_products(db, list(product_ids))
+    
+    entries = []
+    for item, result in zip(items, results):
+        if result["error"]:
+            continue
+        inventory_id = item.inventory_id
+        if inventory_id is None:
+            locations = product_locations.get(item.product_id, {})
+            if item.location is not None:
+                inventory_id = locations.get(item.location)
+            elif len(locations) == 1:
+                inventory_id = next(iter(locations.values()))
+            elif locations:
+                result["error"] = f"产品 {item.product_id} 有多个库存位置，需指定 location"
+                continue
+            if inventory_id is None:
+                result["error"] = f"产品 {item.product_id} 没有库存记录"
+                continue
+        result["inventory_id"] = inventory_id
+        if inventory_id in seen:
+            result["error"] = "同一批次中库存记录重复"
+            continue
+        seen.add(inventory_id)
+        entries.append({
+            "row_no": result["row"],
+            "inventory_id": inventory_id,
+            "delta": item.quantity_change,
+            "target": item.count,
+            "reason": item.reason or default_reason
+        })
+    
+    applied = {}
+    for start in range(0, len(entries), BATCH_CHUNK):
+        applied.update(InventoryLedgerDAO.apply_batch(db, entries[start:start + BATCH_CHUNK]))
+    
+    for result in results:
+        if result["error"]:
+            continue
+        row = applied.get(result["row"])
+        if row is None:
+            result["error"] = "库存记录不存在"
+        elif row["new_quantity"] < 0:
+            result["old_quantity"] = row["old_quantity"]
+            result["error"] = "库存不足"
+        else:
+            result.update({"status": "applied", "old_quantity": row["old_quantity"],
+                           "new_quantity": row["new_quantity"]})
+    return results
+
+@router.post("/adjustments/batch")
+async def batch_adjust_inventory(batch: BatchAdjustment, db: Session = Depends(get_db)):
+    """批量调整库存
+
+    所有条目在一个事务中通过集合式 SQL 应用，返回逐条校验结果。
+    """
+    try:
+        results = _apply_batch_items(db, batch.items, batch.reason, set())
+        failed = sum(1 for result in results if result["status"] != "applied")
+        rolled_back = batch.atomic and failed > 0
+        if rolled_back:
+            db.rollback()
+            for result in results:
+                if result["status"] == "applied":
+                    result["status"] = "rolled_back"
+        else:
+            db.commit()
+            on_stock_changed(db, inventory_ids=[result["inventory_id"] for result in results
+                                                  if result["status"] == "applied"])
+    except Exception:
+        db.rollback()
+        # 数据库和驱动的错误信息只写日志，不返回给客户端
+        logger.exception("批量调整库存失败")
+        raise HTTPException(status_code=500, detail="批量调整库存失败")
+    
+    return {
+        "total": len(results),
+        "applied": 0 if rolled_back else len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+# 盘点文件返回的错误明细上限，避免超大文件生成超大响应
+STOCKTAKE_MAX_ERRORS = 1000
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    value = (value or "").strip()
+    return int(value) if value else None
+
+@router.post("/stocktake")
+async def upload_stocktake(
+    file: UploadFile = File(...),
+    reason: str = "盘点",
+    atomic: bool = False,
+    db: Session = Depends(get_db)
+):
+    """上传盘点CSV文件
+
+    列：inventory_id 或 product_id（可带 location），count（盘点数量）或 quantity_change，可选 reason。
+    文件按行流式读取，每 BATCH_CHUNK 行作为一批应用，整个文件在同一个事务中提交。
+    """
+    # 读取、解析文件和写库都是同步操作，放到线程池中执行，避免整个上传期间阻塞事件循环
+    return await run_in_threadpool(_apply_stocktake, file.file, reason, atomic, db)
+
+def _apply_stocktake(stream, reason: str, atomic: bool, db: Session) -> dict:
+    """解析盘点CSV并分批应用（在线程池中执行）"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    seen = set()
+    total = applied = 0
+    errors = []
+    
+    def flush(chunk, first_row):
+        nonlocal applied
+        for result in _apply_batch_items(db, chunk, reason, seen, first_row):
+            if result["status"] == "applied":
+                applied += 1
+            elif len(errors) < STOCKTAKE_MAX_ERRORS:
+                errors.append({"row": result["row"], "error": result["error"]})
+    
+    try:
+        chunk = []
+        first_row = 1
+        for line_no, row in enumerate(reader, start=1):
+            total += 1
+            try:
+                chunk.append(BatchAdjustmentItem(
+                    inventory_id=_parse_int(row.get("inventory_id")),
+                    product_id=_parse_int(row.get("product_id")),
+                    location=(row.get("location") or "").strip() or None,
+                    quantity_change=_parse_int(row.get("quantity_change")),
+                    count=_parse_int(row.get("count")),
+                    reason=(row.get("reason") or "").strip() or None
+                ))
+            except ValueError:
+                # 占位以保持行号对应，由校验给出错误
+                chunk.append(None)
+            if len(chunk) >= BATCH_CHUNK:
+                flush(chunk, first_row)
+                chunk = []
+                first_row = line_no + 1
+        if chunk:
+            flush(chunk, first_row)
+        
+        failed = total - applied
+        if atomic and failed:
+            db.rollback()
+            applied = 0
+        else:
+            db.commit()
+            on_stock_changed(db, inventory_ids=list(seen))
+    except (UnicodeDecodeError, csv.Error):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="盘点文件需为 UTF-8 编码的 CSV")
+    except Exception:
+        db.rollback()
+        logger.exception("应用盘点文件失败")
+        raise HTTPException(status_code=500, detail="应用盘点文件失败")
+    
+    return {"total": total, "applied": applied, "failed": failed, "errors": errors}
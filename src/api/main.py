@@ -1,13 +1,74 @@
+import time
+
+# 冷启动计时起点：模块导入开始
+_IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.nlp import router as nlp_router
 from src.api.orders import router as orders_router
 from src.api.products import router as products_router
 from src.api.dashboard import router as dashboard_router
-from src.config.database import engine
-from sqlalchemy import text
+from src.api.pagination import NEXT_CURSOR_HEADER
+from src.api.responses import CompressionMiddleware
+from src.config.database import engine, async_engine, SessionLocal
+from src.core.alerts import stock_alert_hub
+from src.core.idempotency import IdempotencyMiddleware, REPLAYED_HEADER, TRUNCATED_HEADER
+from src.core.orchestrator import create_orchestrator
+from src.core.request_logging import AsyncLogging, RequestIdMiddleware, REQUEST_ID_HEADER
+from src.database.dashboard_aggregates import aggregate_refresher
+from src.database.inventory_ledger import InventoryMaintenance
+from src.database.schema import ensure_schema
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 库存后台维护：归还过期预占、合并历史流水
+inventory_maintenance = InventoryMaintenance(SessionLocal)
+# 异步日志：请求路径只入队，控制台与轮转日志文件由后台线程写入
+async_logging = AsyncLogging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时开启异步日志、按需迁移数据库、创建 Agent 编排器并启动后台任务，关闭时停止任务并释放连接池
 
-app = FastAPI(title="ERP自然语言处理API")
+    迁移在 advisory lock 下执行，多个 worker 同时启动时只有一个执行，数据库已是最新版本时直接跳过。
+    编排器及其 Agent 每个进程只创建一次，供 /api/nlp/process 的所有请求共享。
+    """
+    async_logging.start()
+    schema = await run_in_threadpool(ensure_schema, engine)
+    app.state.orchestrator = await run_in_threadpool(create_orchestrator)
+    aggregate_refresher.start()
+    inventory_maintenance.start()
+    # 订阅其他 worker 广播的库存水平（需配置 CACHE_URL），必须在 fork 之后启动
+    stock_alert_hub.start()
+    app.state.startup = {
+        "cold_start_seconds": round(time.perf_counter() - _IMPORT_STARTED, 3),
+        "schema_seconds": round(schema["seconds"], 3),
+        "schema_upgraded": schema["upgraded"],
+        "schema_revision": schema["revision"]
+    }
+    logger.info(f"启动完成: 冷启动 {app.state.startup['cold_start_seconds']}s, "
+                f"数据库检查 {app.state.startup['schema_seconds']}s"
+                f"{'（已执行迁移）' if schema['upgraded'] else '（已是最新版本）'}")
+    try:
+        yield
+    finally:
+        await aggregate_refresher.stop()
+        await inventory_maintenance.stop()
+        stock_alert_hub.stop()
+        await run_in_threadpool(app.state.orchestrator.close)
+        await async_engine.dispose()
+        async_logging.stop()
+
+app = FastAPI(title="ERP自然语言处理API", lifespan=lifespan)
+
+# 幂等键：客户端超时重试下单、记账、库存调整等请求时重放首次响应，不重复执行
+app.add_middleware(IdempotencyMiddleware)
 
 # 配置CORS
 app.add_middleware(
@@ -16,65 +77,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER, REPLAYED_HEADER, TRUNCATED_HEADER],
 )
-
-# 创建数据库表
-def init_db():
-    with engine.connect() as conn:
-        # 删除现有表（使用CASCADE）
-        conn.execute(text("DROP TABLE IF EXISTS order_items CASCADE"))
-        conn.execute(text("DROP TABLE IF EXISTS orders CASCADE"))
-        conn.execute(text("DROP TABLE IF EXISTS products CASCADE"))
-        conn.execute(text("DROP TABLE IF EXISTS inventory CASCADE"))
-        
-        # 创建产品表
-        conn.execute(text("""
-            CREATE TABLE products (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR NOT NULL,
-                category VARCHAR,
-                price FLOAT,
-                stock INTEGER,
-                status VARCHAR,
-                specifications JSON,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        
-        # 创建订单表
-        conn.execute(text("""
-            CREATE TABLE orders (
-                id SERIAL PRIMARY KEY,
-                order_no VARCHAR UNIQUE NOT NULL,
-                customer_name VARCHAR NOT NULL,
-                total_amount FLOAT,
-                status VARCHAR,
-                shipping_address TEXT,
-                delivery_date TIMESTAMP,
-                specifications JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        
-        # 创建订单项表
-        conn.execute(text("""
-            CREATE TABLE order_items (
-                id SERIAL PRIMARY KEY,
-                order_id INTEGER REFERENCES orders(id) ON DELETE CASCADE,
-                product_id INTEGER REFERENCES products(id),
-                quantity INTEGER,
-                unit_price FLOAT,
-                specifications JSON
-            )
-        """))
-        
-        conn.commit()
-
-# 初始化数据库
-init_db()
+# 关联ID：每个请求的日志都带有同一个 request_id，并通过响应头返回给调用方
+app.add_middleware(RequestIdMiddleware)
+# 响应压缩：超过 1KB 的响应按客户端支持使用 Brotli 或 gzip
+app.add_middleware(CompressionMiddleware)
 
 # 注册路由
 app.include_router(nlp_router, prefix="/api/nlp", tags=["自然语言处理"])
@@ -86,6 +94,11 @@ app.include_router(dashboard_router, prefix="/api/dashboard", tags=["dashboard"]
 async def root():
     return {"message": "Welcome to ERP System API"}
 
+@app.get("/health")
+async def health():
+    """存活检查，附带本进程的启动耗时"""
+    return {"status": "ok", "startup": getattr(app.state, "startup", None)}
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    from src.api.server import serve
+    serve()
\ No newline at end of file
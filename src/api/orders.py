@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+from collections import defaultdict
 from src.config.database import get_db
-from src.models.order import Order, OrderItem
-from src.models.product import Product
-from pydantic import BaseModel
+from src.database.dashboard_aggregates import invalidate_dashboard
+from src.database.stock_dao import StockDAO
+from src.database.repositories import OrderRepository
+from src.database.stock_events import on_stock_changed
+from src.core.id_generator import new_id
+from pydantic import BaseModel, Field, ValidationError
 import json
 
 router = APIRouter()
 
 class OrderItemCreate(BaseModel):
     product_id: int
-    quantity: int
+    quantity: int = Field(..., gt=0)
     unit_price: float
     specifications: dict
 
@@ -26,51 +31,179 @@ class OrderCreate(BaseModel):
 @router.post("/orders/")
 async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
     # 生成订单号
-    order_no = f"ORD{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    order_no = new_id("ORD")
     
     # 计算总金额
     total_amount = sum(item.quantity * item.unit_price for item in order.items)
     
-    # 创建订单
-    db_order = Order(
-        order_no=order_no,
-        customer_name=order.customer_name,
-        total_amount=total_amount,
-        status="pending_payment",
-        shipping_address=order.shipping_address,
-        delivery_date=order.delivery_date,
-        specifications=order.specifications
-    )
-    db.add(db_order)
-    db.flush()  # 获取订单ID
-    
-    # 创建订单项
+    # 汇总每个产品的需求数量（同一产品可能出现在多个订单项中）
+    quantities = defaultdict(int)
     for item in order.items:
-        # 检查产品是否存在
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
+        quantities[item.product_id] += item.quantity
+    
+    try:
+        # 一次查询检查产品是否存在
+        products = StockDAO.load_products(db, list(quantities))
+        for product_id in quantities:
+            if product_id not in products:
+                raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
         
-        # 检查库存
-        if product.stock < item.quantity:
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for product {product.name}")
+        # 一条语句跨位置扣减全部库存，任一产品不足则整单回滚
+        shortfall = StockDAO.reserve(db, quantities, order_no)
+        if shortfall:
+            names = ", ".join(products[product_id]["product_name"] for product_id in shortfall)
+            raise HTTPException(status_code=400, detail=f"Insufficient stock for product {names}")
         
-        # 创建订单项
-        db_item = OrderItem(
-            order_id=db_order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            specifications=item.specifications
-        )
-        db.add(db_item)
+        # 创建订单
+        order_ids = OrderRepository.insert_orders(db, [{
+            "order_no": order_no,
+            "customer_name": order.customer_name,
+            "total_amount": total_amount,
+            "status": "pending_payment",
+            "shipping_address": order.shipping_address,
+            "delivery_date": order.delivery_date,
+            "specifications": order.specifications
+        }])
         
-        # 更新库存
-        product.stock -= item.quantity
+        # 多行插入订单项
+        OrderRepository.insert_items(db, [
+            {
+                "order_id": order_ids[order_no],
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "specifications": item.specifications
+            }
+            for item in order.items
+        ])
+        
+        db.commit()
+        invalidate_dashboard()
+        on_stock_changed(db, product_ids=list(quantities))
+        return {"order_no": order_no, "message": "订单创建成功"}
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BulkOrderCreate(BaseModel):
+    orders: List[dict]
+
+def _validate_order(raw: dict) -> OrderCreate:
+    """校验单个订单，失败时抛出 ValueError"""
+    try:
+        order = OrderCreate(**raw)
+    except ValidationError as e:
+        raise ValueError(f"订单格式错误: {e.errors()}")
+    if not order.items:
+        raise ValueError("订单没有订单项")
+    return order
+
+@router.post("/orders/bulk")
+async def create_orders_bulk(bulk: BulkOrderCreate, db: Session = Depends(get_db)):
+    """批量导入订单
+
+    所有订单在一个事务中处理：一次查询锁定全部涉及的产品，按提交顺序逐单分配库存，
+    再把通过的订单按产品汇总后用一条语句扣减库存，订单和订单项使用多行 INSERT 写入。
+    库存不足或校验失败的订单单独拒绝，不影响其他订单。
+    """
+    # 上万个订单的校验和写入耗时较长，放到线程池中执行，不阻塞事件循环
+    return await run_in_threadpool(_create_orders_bulk, bulk, db)
+
+def _create_orders_bulk(bulk: BulkOrderCreate, db: Session) -> dict:
+    results = [{"index": index, "status": "rejected", "order_no": None, "error": None}
+               for index in range(len(bulk.orders))]
+    
+    # 逐单校验
+    valid = []
+    for index, raw in enumerate(bulk.orders):
+        try:
+            valid.append((index, _validate_order(raw)))
+        except ValueError as e:
+            results[index]["error"] = str(e)
     
     try:
+        # 一次查询锁定所有涉及的产品，锁定期间读取的库存即为可分配库存
+        product_ids = {item.product_id for _, order in valid for item in order.items}
+        products = StockDAO.load_products(db, list(product_ids))
+        available = {product_id: product["available"] for product_id, product in products.items()}
+        
+        # 按提交顺序分配库存
+        totals = defaultdict(int)
+        accepted = []
+        for index, order in valid:
+            quantities = defaultdict(int)
+            for item in order.items:
+                quantities[item.product_id] += item.quantity
+            
+            missing = [product_id for product_id in quantities if product_id not in products]
+            if missing:
+                results[index]["error"] = f"Product {missing[0]} not found"
+                continue
+            short = [product_id for product_id, quantity in quantities.items()
+                     if available[product_id] < quantity]
+            if short:
+                results[index]["error"] = f"Insufficient stock for product {products[short[0]]['product_name']}"
+                continue
+            
+            for product_id, quantity in quantities.items():
+                available[product_id] -= quantity
+                totals[product_id] += quantity
+            accepted.append((index, order, new_id("ORD")))
+        
+        # 汇总后一次扣减库存；产品已加锁，只有库存接口并发调整时才会出现不足
+        batch_no = new_id("BLK")
+        if StockDAO.reserve(db, totals, batch_no):
+            db.rollback()
+            raise HTTPException(status_code=409, detail="库存在导入过程中发生变化，请重试")
+        
+        # 多行插入订单，取回订单ID
+        order_rows = [
+            {
+                "order_no": order_no,
+                "customer_name": order.customer_name,
+                "total_amount": sum(item.quantity * item.unit_price for item in order.items),
+                "status": "pending_payment",
+                "shipping_address": order.shipping_address,
+                "delivery_date": order.delivery_date,
+                "specifications": order.specifications
+            }
+            for _, order, order_no in accepted
+        ]
+        order_ids = OrderRepository.insert_orders(db, order_rows)
+        
+        # 多行插入订单项
+        item_rows = [
+            {
+                "order_id": order_ids[order_no],
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "specifications": item.specifications
+            }
+            for _, order, order_no in accepted
+            for item in order.items
+        ]
+        OrderRepository.insert_items(db, item_rows)
+        
         db.commit()
-        return {"order_no": order_no, "message": "订单创建成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if accepted:
+        invalidate_dashboard()
+        on_stock_changed(db, product_ids=list(totals))
+    for index, _, order_no in accepted:
+        results[index].update({"status": "created", "order_no": order_no})
+    
+    return {
+        "total": len(results),
+        "created": len(accepted),
+        "rejected": len(results) - len(accepted),
+        "results": results
+    }
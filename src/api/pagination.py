@@ -0,0 +1,117 @@
+"""
+列表接口的键集（keyset）分页
+
+按有索引的唯一排序键翻页：下一页通过 ``WHERE key > 上一页最后的键`` 定位，
+而不是 ``OFFSET``，因此任意页的查询代价都与第一页相同。
+下一页的游标通过 ``X-Next-Cursor`` 响应头返回，响应体保持原有的列表格式。
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# 列表接口每页条数上限，路由中以 Query(ge=1, le=MAX_PAGE_SIZE) 声明 limit
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key: str, value: Any) -> str:
+    """生成不透明的游标字符串
+
+    Args:
+        key: 排序键名称，用于防止游标在不同列表之间混用
+        value: 当前页最后一行的排序键值
+    """
+    payload = json.dumps({"k": key, "v": value}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _typed(value: Any, value_type: Optional[type]) -> Any:
+    """把游标中的 JSON 值转换为排序键的类型，类型不符时抛出 ValueError"""
+    if value_type is None:
+        return value
+    if value_type in (datetime, date):
+        # encode_cursor 以 str() 写出日期时间
+        if not isinstance(value, str):
+            raise ValueError(value)
+        return value_type.fromisoformat(value)
+    if value_type in (float, Decimal):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(value)
+        return value_type(value)
+    # bool 是 int 的子类，不能当作整数键
+    if isinstance(value, bool) or not isinstance(value, value_type):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, key: str, value_type: Optional[type] = None) -> Any:
+    """解析游标，返回排序键值
+
+    Args:
+        cursor: 游标字符串
+        key: 排序键名称
+        value_type: 排序键的 Python 类型，给出时校验并转换游标中的值
+
+    Raises:
+        HTTPException: 游标格式无效、不属于当前列表或键值类型不符
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["k"] != key:
+            raise ValueError(key)
+        return _typed(payload["v"], value_type)
+    except (ValueError, KeyError, TypeError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+def _key_type(key_column) -> Optional[type]:
+    try:
+        return key_column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+def paginate(
+    query,
+    key_column,
+    response: Response,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    key_getter: Optional[Callable[[Any], Any]] = None,
+) -> List[Any]:
+    """按排序键分页查询
+
+    Args:
+        query: 已应用过滤条件的查询
+        key_column: 唯一且有索引的排序列（通常为主键）
+        response: 当前响应，用于写入下一页游标
+        limit: 每页条数
+        cursor: 上一页返回的游标，为空时从第一页开始
+        skip: 兼容旧客户端的 offset 参数，仅在未提供游标时生效
+        key_getter: 从结果行中取排序键值的函数，默认按列名取属性
+
+    Returns:
+        List[Any]: 当前页的结果行
+    """
+    key = key_column.key
+    query = query.order_by(key_column)
+    if cursor:
+        query = query.filter(key_column > decode_cursor(cursor, key, _key_type(key_column)))
+    elif skip:
+        query = query.offset(skip)
+
+    # 多取一行用来判断是否还有下一页，避免额外的 COUNT 查询
+    rows = query.limit(limit + 1).all()
+    # limit 为 0 时页为空，没有可作为游标的最后一行
+    if len(rows) > limit and limit > 0:
+        rows = rows[:limit]
+        getter = key_getter or (lambda row: getattr(row, key))
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key, getter(rows[-1]))
+    return rows[:limit]
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, select
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, condecimal
 from decimal import Decimal
 
 from src.config.database import get_db
+from src.api.auth import require_access
+from src.api.errors import unique_violations_as_400
+from src.api.pagination import paginate, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from src.database.constraints import UQ_PRODUCTS_PRODUCT_NAME
+from src.database.search_dao import SearchDAO
+from src.database.price_dao import PriceDAO, NegativePriceError, CHANGE_TYPES
+from src.core.id_generator import new_id
+from src.database.product_cache import product_catalog_cache
 from src.models.models import Product, Inventory
 
-router = APIRouter(prefix="/products", tags=["products"])
+# 读操作需要 product:read 权限，写操作需要 product:write 权限
+router = APIRouter(prefix="/products", tags=["products"], dependencies=[Depends(require_access("product"))])
+
+# 产品名称的唯一性由唯一索引保证，冲突时返回的提示
+UNIQUE_MESSAGES = {UQ_PRODUCTS_PRODUCT_NAME: "产品名称已存在"}
 
 # Pydantic模型
 class ProductCreate(BaseModel):
@@ -38,15 +51,38 @@ class ProductDetailResponse(ProductResponse):
     inventory_quantity: Optional[int]
     inventory_location: Optional[str]
 
+def _stock_columns():
+    """按产品汇总各位置库存的相关子查询列
+
+    与 PRODUCT_SUMMARY_SQL 一样逐个产品求和，只计算当前页的产品，而不是每页都汇总整个库存表；
+    每个产品仍只有一行。
+    """
+    def per_product(aggregate, label):
+        return select(aggregate).where(Inventory.product_id == Product.product_id) \
+            .correlate(Product).scalar_subquery().label(label)
+
+    return (
+        per_product(func.sum(Inventory.quantity), 'inventory_quantity'),
+        per_product(func.string_agg(Inventory.location, literal_column("','")), 'inventory_location')
+    )
+
+def _product_detail(result) -> dict:
+    """把 (Product, 库存汇总) 查询行转换为响应格式"""
+    return {
+        "product_id": result.Product.product_id,
+        "product_name": result.Product.product_name,
+        "description": result.Product.description,
+        "unit_price": result.Product.unit_price,
+        "category": result.Product.category,
+        "created_at": result.Product.created_at,
+        "inventory_quantity": result.inventory_quantity,
+        "inventory_location": result.inventory_location
+    }
+
 # API端点
 @router.post("", response_model=ProductResponse)
 async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
-    """创建产品"""
-    # 检查产品名是否已存在
-    existing = db.query(Product).filter(Product.product_name == product.product_name).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="产品名称已存在")
-    
+    """创建产品（名称重复由唯一索引拒绝，不再预先查询）"""
     db_product = Product(
         product_name=product.product_name,
         description=product.description,
@@ -55,74 +91,85 @@ async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         created_at=datetime.now()
     )
     db.add(db_product)
-    db.commit()
+    with unique_violations_as_400(db, UNIQUE_MESSAGES):
+        db.commit()
     db.refresh(db_product)
+    product_catalog_cache.invalidate_products([db_product.product_id])
     return db_product
 
 @router.get("", response_model=List[ProductDetailResponse])
 async def get_products(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     db: Session = Depends(get_db)
 ):
-    """获取产品列表"""
-    query = db.query(
-        Product,
-        Inventory.quantity.label('inventory_quantity'),
-        Inventory.location.label('inventory_location')
-    ).outerjoin(Inventory)
-    
-    if category:
-        query = query.filter(Product.category == category)
-    if min_price is not None:
-        query = query.filter(Product.unit_price >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.unit_price <= max_price)
-    
-    results = query.offset(skip).limit(limit).all()
-    
-    # 转换为响应格式
-    response = []
-    for result in results:
-        product_dict = {
-            "product_id": result.Product.product_id,
-            "product_name": result.Product.product_name,
-            "description": result.Product.description,
-            "unit_price": result.Product.unit_price,
-            "category": result.Product.category,
-            "created_at": result.Product.created_at,
-            "inventory_quantity": result.inventory_quantity,
-            "inventory_location": result.inventory_location
+    """获取产品列表（经产品目录缓存）"""
+    def load():
+        query = db.query(Product, *_stock_columns())
+        
+        if category:
+            query = query.filter(Product.category == category)
+        if min_price is not None:
+            query = query.filter(Product.unit_price >= min_price)
+        if max_price is not None:
+            query = query.filter(Product.unit_price <= max_price)
+        
+        # 下一页游标随列表一起缓存
+        page_response = Response()
+        results = paginate(
+            query, Product.product_id, page_response, limit, cursor, skip,
+            key_getter=lambda row: row.Product.product_id
+        )
+        return {
+            "items": [_product_detail(result) for result in results],
+            "next_cursor": page_response.headers.get(NEXT_CURSOR_HEADER)
         }
-        response.append(product_dict)
     
-    return response
+    params = {"skip": skip, "limit": limit, "cursor": cursor, "category": category,
+              "min_price": min_price, "max_price": max_price}
+    page = product_catalog_cache.get_list(params, load)
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return page["items"]
+
+@router.get("/cache/stats")
+async def get_product_cache_stats():
+    """产品目录缓存命中率统计"""
+    return product_catalog_cache.stats()
+
+class ProductSearchResult(ProductResponse):
+    score: float
+
+@router.get("/search", response_model=List[ProductSearchResult])
+async def search_products(
+    q: str,
+    limit: int = Query(20, ge=1, le=100),
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """按名称和描述检索产品，结果按相关度排序"""
+    keyword = q.strip()
+    if not keyword:
+        raise HTTPException(status_code=400, detail="检索关键字不能为空")
+    return SearchDAO.search_products(db, keyword, limit, category)
 
 @router.get("/{product_id}", response_model=ProductDetailResponse)
 async def get_product(product_id: int, db: Session = Depends(get_db)):
-    """获取产品详情"""
-    result = db.query(
-        Product,
-        Inventory.quantity.label('inventory_quantity'),
-        Inventory.location.label('inventory_location')
-    ).outerjoin(Inventory).filter(Product.product_id == product_id).first()
+    """获取产品详情（经产品目录缓存）"""
+    def load():
+        result = db.query(Product, *_stock_columns()) \
+            .filter(Product.product_id == product_id).first()
+        return _product_detail(result) if result else None
     
-    if not result:
+    product = product_catalog_cache.get_product(product_id, load)
+    if product is None:
         raise HTTPException(status_code=404, detail="产品不存在")
-    
-    return {
-        "product_id": result.Product.product_id,
-        "product_name": result.Product.product_name,
-        "description": result.Product.description,
-        "unit_price": result.Product.unit_price,
-        "category": result.Product.category,
-        "created_at": result.Product.created_at,
-        "inventory_quantity": result.inventory_quantity,
-        "inventory_location": result.inventory_location
-    }
+    return product
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
@@ -135,14 +182,7 @@ async def update_product(
     if not db_product:
         raise HTTPException(status_code=404, detail="产品不存在")
     
-    # 检查产品名是否已存在
     if product.product_name:
-        existing = db.query(Product).filter(
-            Product.product_name == product.product_name,
-            Product.product_id != product_id
-        ).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="产品名称已存在")
         db_product.product_name = product.product_name
     
     if product.description is not None:
@@ -152,8 +192,10 @@ async def update_product(
     if product.category is not None:
         db_product.category = product.category
     
-    db.commit()
+    with unique_violations_as_400(db, UNIQUE_MESSAGES):
+        db.commit()
     db.refresh(db_product)
+    product_catalog_cache.invalidate_products([product_id])
     return db_product
 
 @router.delete("/{product_id}")
@@ -170,11 +212,15 @@ async def delete_product(product_id: int, db: Session = Depends(get_db)):
     
     db.delete(product)
     db.commit()
+    product_catalog_cache.invalidate_products([product_id])
     return {"message": "产品已删除"}
 
 # 批量操作API
 class ProductPriceUpdate(BaseModel):
-    product_ids: List[int]
+    product_ids: Optional[List[int]] = None
+    category: Optional[str] = None  # 按类别调价
+    min_price: Optional[float] = None  # 只调整当前价格在区间内的产品
+    max_price: Optional[float] = None
     price_change: float  # 正数表示涨价，负数表示降价
     change_type: str  # "amount" 或 "percentage"
 
@@ -183,29 +229,55 @@ async def batch_update_price(
     update: ProductPriceUpdate,
     db: Session = Depends(get_db)
 ):
-    """批量更新产品价格"""
-    products = db.query(Product).filter(Product.product_id.in_(update.product_ids)).all()
-    if not products:
-        raise HTTPException(status_code=404, detail="未找到指定的产品")
+    """批量更新产品价格
+
+    目标产品可以是 product_ids、category 或价格区间的组合，
+    调价和价格历史在同一事务中用一条语句完成。
+    """
+    if update.change_type not in CHANGE_TYPES:
+        raise HTTPException(status_code=400, detail="change_type 必须是 amount 或 percentage")
+    if update.product_ids is None and update.category is None \
+            and update.min_price is None and update.max_price is None:
+        raise HTTPException(status_code=400, detail="必须指定 product_ids、category 或价格区间")
     
-    updated_products = []
-    for product in products:
-        if update.change_type == "amount":
-            new_price = product.unit_price + Decimal(str(update.price_change))
-        else:  # percentage
-            new_price = product.unit_price * (1 + Decimal(str(update.price_change)) / 100)
-        
-        if new_price < 0:
-            raise HTTPException(status_code=400, detail=f"产品 {product.product_name} 的新价格不能为负数")
-        
-        product.unit_price = new_price
-        updated_products.append({
-            "product_id": product.product_id,
-            "product_name": product.product_name,
-            "old_price": product.unit_price - Decimal(str(update.price_change)) if update.change_type == "amount"
-                        else product.unit_price / (1 + Decimal(str(update.price_change)) / 100),
-            "new_price": new_price
-        })
+    batch_id = new_id("PRC")
+    try:
+        updated_products = PriceDAO.batch_update(
+            db, update.change_type, update.price_change, batch_id,
+            update.product_ids, update.category, update.min_price, update.max_price
+        )
+    except NegativePriceError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    if not updated_products:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="未找到指定的产品")
     
     db.commit()
-    return {"message": "价格更新成功", "updated_products": updated_products} 
\ No newline at end of file
+    product_catalog_cache.invalidate_products(product["product_id"] for product in updated_products)
+    return {
+        "message": "价格更新成功",
+        "batch_id": batch_id,
+        "count": len(updated_products),
+        "updated_products": updated_products
+    }
+
+class PriceHistoryResponse(BaseModel):
+    history_id: int
+    product_id: int
+    old_price: Decimal
+    new_price: Decimal
+    change_type: str
+    price_change: Decimal
+    batch_id: str
+    changed_at: datetime
+
+@router.get("/{product_id}/price-history", response_model=List[PriceHistoryResponse])
+async def get_price_history(
+    product_id: int,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """获取产品价格历史（按时间倒序，before_id 用于翻页）"""
+    return PriceDAO.list_history(db, product_id, limit, before_id)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from src.config.database import get_db
-from src.models.product import Product
+from src.api.pagination import MAX_PAGE_SIZE
+from src.api.errors import unique_violations_as_400
+from src.database.constraints import UQ_PRODUCTS_PRODUCT_NAME
+from src.database.repositories import ProductRepository
+from src.database.product_cache import product_catalog_cache
 
 router = APIRouter()
 
@@ -15,6 +19,7 @@ class ProductCreate(BaseModel):
     status: str = "active"
     specifications: Optional[dict] = None
     description: Optional[str] = None
+    location: Optional[str] = None  # 初始库存所在位置，默认 MAIN
 
 class ProductResponse(BaseModel):
     id: int
@@ -31,33 +36,28 @@ class ProductResponse(BaseModel):
 
 @router.post("/products/", response_model=ProductResponse)
 async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
-    db_product = Product(
-        name=product.name,
-        category=product.category,
-        price=product.price,
-        stock=product.stock,
-        status=product.status,
-        specifications=product.specifications,
-        description=product.description
-    )
-    db.add(db_product)
-    
+    """创建产品，初始库存写入 inventory"""
     try:
-        db.commit()
-        db.refresh(db_product)
-        return db_product
+        fields = product.dict(exclude={"location"})
+        if product.location:
+            fields["location"] = product.location
+        with unique_violations_as_400(db, {UQ_PRODUCTS_PRODUCT_NAME: "产品名称已存在"}):
+            db_product = ProductRepository.create(db, **fields)
+            db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+    product_catalog_cache.invalidate_products([db_product["id"]])
+    return db_product
 
 @router.get("/products/", response_model=List[ProductResponse])
 async def list_products(
-    skip: int = 0,
-    limit: int = 10,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
     category: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Product)
-    if category:
-        query = query.filter(Product.category == category)
-    return query.offset(skip).limit(limit).all() 
\ No newline at end of file
+    """获取产品列表，stock 为各位置库存之和"""
+    return ProductRepository.list(db, skip, limit, category)
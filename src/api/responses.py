@@ -0,0 +1,185 @@
+from typing import Any, Dict, Optional
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+import asyncio
+import json
+import zlib
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小于该字节数的响应不压缩，压缩收益抵不过 CPU 开销和额外的头
+COMPRESSION_MIN_SIZE = 1024
+# gzip 压缩级别，6 在压缩率和速度之间折中（9 比 6 慢数倍，体积只小几个百分点）
+GZIP_LEVEL = 6
+# brotli 质量，动态响应用 4 左右，速度接近 gzip 6 而体积更小
+BROTLI_QUALITY = 4
+# 单块超过该字节数时在线程中压缩，避免阻塞事件循环
+THREAD_MIN_SIZE = 128 * 1024
+# 已压缩或需要实时推送的类型不再压缩
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/zip", "application/gzip",
+                          "application/vnd.apache.parquet", "image/", "audio/", "video/")
+
+def _default(value: Any) -> Any:
+    """orjson / json 不能直接序列化的类型，转换规则与 FastAPI 的 jsonable_encoder 一致"""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "dict"):
+        return value.dict()
+    raise TypeError(f"无法序列化类型 {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """序列化为 JSON 字节串：安装了 orjson 时使用 orjson，否则使用标准库 json"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """大响应使用的 JSON 响应类
+
+    路由直接返回该响应时 FastAPI 不再调用 jsonable_encoder 逐个遍历对象，Decimal、datetime 等类型
+    在序列化时一次转换。适用于报表等成千上万行的响应。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _qvalue(params: str) -> float:
+    """编码参数中的 q 值，缺省为 1；格式错误时按 0（不接受）处理"""
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 0.0
+    return 1.0
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    """Accept-Encoding 中是否接受某种编码（q=0 表示拒绝）
+
+    明确列出的编码优先于 *；* 只对未列出的编码生效。
+    """
+    wildcard = False
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name == coding:
+            return _qvalue(params) > 0
+        if name == "*":
+            wildcard = _qvalue(params) > 0
+    return wildcard
+
+class _Compressor:
+    """gzip / brotli 流式压缩器的统一接口"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._brotli.process(body)
+            return data + (self._brotli.finish() if final else self._brotli.flush())
+        data = self._zlib.compress(body)
+        return data + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """响应压缩中间件
+
+    客户端接受 br 且安装了 brotli 时使用 Brotli，否则接受 gzip 时使用 gzip。
+    小于 minimum_size 的响应、已设置 Content-Encoding 的响应以及 SSE 等排除类型原样发送；
+    流式响应逐块压缩并刷新，客户端可以边接收边解压。
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                if brotli is not None and _accepts(accept_encoding, "br"):
+                    return "br"
+                if _accepts(accept_encoding, "gzip"):
+                    return "gzip"
+                return None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        encoding = self._choose(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Dict[str, Any] = {}
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def compress(body: bytes, final: bool) -> bytes:
+            if len(body) >= THREAD_MIN_SIZE:
+                return await asyncio.to_thread(compressor.compress, body, final)
+            return compressor.compress(body, final)
+
+        async def send_compressed(message: Dict[str, Any]):
+            nonlocal compressor, passthrough
+            if message["type"] == "http.response.start":
+                start.update(message)
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+                passthrough = (b"content-encoding" in headers or message["status"] in (204, 206, 304)
+                               or content_type.startswith(EXCLUDED_CONTENT_TYPES))
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = [(name, value) for name, value in start.get("headers", [])
+                           if name.lower() not in (b"content-length", b"vary")]
+                vary = [value for name, value in start.get("headers", []) if name.lower() == b"vary"]
+                headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                if not more_body and len(body) < self.minimum_size:
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    passthrough = True
+                    await send({**start, "headers": headers})
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                body = await compress(body, not more_body)
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start, "headers": headers})
+            else:
+                body = await compress(body, not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,183 @@
+from typing import Dict, Optional
+import argparse
+import gc
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+APP_PATH = "src.api.main:app"
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8001
+DEFAULT_BACKLOG = 2048
+# 收到 SIGTERM 后等待进行中的请求完成的秒数，超时后强制结束 worker
+GRACEFUL_TIMEOUT = 30
+# worker 异常退出后重新拉起前的等待秒数，避免启动即崩溃时空转
+RESPAWN_DELAY = 1.0
+
+def event_loop() -> str:
+    """有 uvloop 时使用 uvloop，否则使用标准 asyncio"""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def http_protocol() -> str:
+    """有 httptools 时使用 httptools，否则使用纯 Python 的 h11"""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+class PreforkServer:
+    """预加载 + 多进程的生产服务
+
+    主进程先导入应用（路由、配置、模型等只读状态）并绑定监听套接字，再 fork 出多个 worker，
+    各 worker 以写时复制方式共享预加载的内存，由内核在同一套接字上分配连接。
+    主进程只负责监督：worker 异常退出时重新拉起；收到 SIGTERM/SIGINT 时通知所有 worker
+    停止接收新连接、处理完进行中的请求后退出，超过 graceful_timeout 仍未退出的强制结束。
+    """
+
+    def __init__(self, app, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = 1,
+                 graceful_timeout: float = GRACEFUL_TIMEOUT, backlog: int = DEFAULT_BACKLOG):
+        """初始化服务
+
+        Args:
+            app: 已导入的 ASGI 应用
+            host: 监听地址
+            port: 监听端口
+            workers: worker 进程数
+            graceful_timeout: 优雅停止的最长等待秒数
+            backlog: 监听队列长度
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.sock: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}
+        self._stopping = False
+        self._deadline = 0.0
+
+    def _bind(self):
+        self.sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(self.backlog)
+        self.sock.set_inheritable(True)
+
+    def _spawn(self, slot: int):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = slot
+            return
+        # 子进程：恢复默认信号处理，由 uvicorn 安装自己的 SIGTERM/SIGINT 处理
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # worker 编号：各 worker 据此写入各自的日志文件
+        os.environ["ERP_WORKER_ID"] = str(slot)
+        exit_code = 0
+        try:
+            self._serve()
+        except BaseException:
+            logger.exception(f"worker {slot} 异常退出")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _serve(self):
+        config = uvicorn.Config(
+            self.app,
+            loop=event_loop(),
+            http=http_protocol(),
+            lifespan="on",
+            backlog=self.backlog,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            access_log=False
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _handle_stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        self._deadline = time.monotonic() + self.graceful_timeout + 5
+        logger.info(f"收到信号 {signal.Signals(signum).name}，通知 {len(self._children)} 个 worker 优雅停止")
+        self._signal_children(signal.SIGTERM)
+
+    def _signal_children(self, signum: int):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """绑定端口、启动 worker 并监督，直到所有 worker 退出"""
+        self._bind()
+        # 预加载的对象不再参与分代回收，避免子进程中的 GC 触碰这些页面导致写时复制
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        logger.info(f"已在 {self.host}:{self.port} 启动 {self.workers} 个 worker "
+                    f"(loop={event_loop()}, http={http_protocol()})")
+
+        while self._children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self._stopping and time.monotonic() > self._deadline:
+                    logger.warning(f"{len(self._children)} 个 worker 未在时限内退出，强制结束")
+                    self._signal_children(signal.SIGKILL)
+                    self._deadline = float("inf")
+                time.sleep(0.2)
+                continue
+            slot = self._children.pop(pid, None)
+            if slot is None or self._stopping:
+                continue
+            logger.warning(f"worker {slot} (pid {pid}) 意外退出，状态 {os.waitstatus_to_exitcode(status)}，重新启动")
+            time.sleep(RESPAWN_DELAY)
+            self._spawn(slot)
+
+        self.sock.close()
+        logger.info("所有 worker 已退出")
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+          graceful_timeout: float = GRACEFUL_TIMEOUT):
+    """启动生产服务
+
+    支持 fork 的平台上预加载应用后 fork 多个 worker；其他平台（Windows）退回 uvicorn 自带的多进程模式，
+    各 worker 独立导入应用。
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and not os.getenv("CACHE_URL"):
+        # 低库存预警、产品目录缓存失效、权限版本、幂等记录都需要共享后端才能跨 worker 生效
+        logger.warning(f"以 {workers} 个 worker 启动但未设置 CACHE_URL：低库存预警等进程内状态不会在 worker 之间同步，"
+                       f"SSE 客户端只能收到所连 worker 内产生的预警")
+    if not hasattr(os, "fork"):
+        uvicorn.run(APP_PATH, host=host, port=port, workers=workers, loop=event_loop(), http=http_protocol(),
+                    timeout_graceful_shutdown=graceful_timeout)
+        return
+
+    from src.api.main import app
+    PreforkServer(app, host, port, workers, graceful_timeout).run()
+
+def main():
+    parser = argparse.ArgumentParser(description="ERP API 生产环境多进程服务")
+    parser.add_argument("--host", default=os.getenv("ERP_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ERP_PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ERP_WORKERS", 0)) or None,
+                        help="worker 进程数，默认等于 CPU 核数")
+    parser.add_argument("--graceful-timeout", type=float,
+                        default=float(os.getenv("ERP_GRACEFUL_TIMEOUT", GRACEFUL_TIMEOUT)))
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.graceful_timeout)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
 from src.config.database import get_db
+from src.api.auth import require_access
+from src.api.pagination import paginate, MAX_PAGE_SIZE
+from src.database.search_dao import SearchDAO, like_pattern
 from src.models.models import Supplier
 
-router = APIRouter(prefix="/suppliers", tags=["suppliers"])
+# 读操作需要 supplier:read 权限，写操作需要 supplier:write 权限
+router = APIRouter(prefix="/suppliers", tags=["suppliers"], dependencies=[Depends(require_access("supplier"))])
 
 # Pydantic模型
 class SupplierCreate(BaseModel):
@@ -48,16 +52,30 @@ async def create_supplier(supplier: SupplierCreate, db: Session = Depends(get_db
 
 @router.get("", response_model=List[SupplierResponse])
 async def get_suppliers(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """获取供应商列表"""
     query = db.query(Supplier)
     if name:
-        query = query.filter(Supplier.supplier_name.ilike(f"%{name}%"))
-    return query.offset(skip).limit(limit).all()
+        # 由 supplier_name 上的 pg_trgm GIN 索引支持子串匹配
+        query = query.filter(Supplier.supplier_name.ilike(like_pattern(name)))
+    return paginate(query, Supplier.supplier_id, response, limit, cursor, skip)
+
+class SupplierSearchResult(SupplierResponse):
+    score: float
+
+@router.get("/search", response_model=List[SupplierSearchResult])
+async def search_suppliers(q: str, limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    """按名称相似度检索供应商，容忍错别字和部分名称"""
+    keyword = q.strip()
+    if not keyword:
+        raise HTTPException(status_code=400, detail="检索关键字不能为空")
+    return SearchDAO.search_suppliers(db, keyword, limit)
 
 @router.get("/{supplier_id}", response_model=SupplierResponse)
 async def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
-import hashlib
 
 from src.config.database import get_db
+from src.api.auth import CurrentUser, get_current_user, permission_cache, require_permission
+from src.api.errors import unique_violations_as_400
+from src.api.pagination import paginate, MAX_PAGE_SIZE
+from src.core.security import hash_password_async, needs_rehash, token_service, verify_password_async
+from src.database.constraints import UQ_USERS_EMAIL, UQ_USERS_USERNAME
+from src.database.role_permissions import RolePermissionDAO
 from src.models.models import User
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -32,46 +37,49 @@ class UserResponse(BaseModel):
     class Config:
         orm_mode = True
 
-def hash_password(password: str) -> str:
-    """对密码进行哈希处理"""
-    return hashlib.sha256(password.encode()).hexdigest()
+class RolePermissions(BaseModel):
+    role: str
+    permissions: List[str]
+
+# 登录以外的用户管理接口需要 user:read / user:write 权限
+can_read_users = [Depends(require_permission("user:read"))]
+can_write_users = [Depends(require_permission("user:write"))]
+
+# 用户名、邮箱的唯一性由唯一索引保证，冲突时返回的提示
+UNIQUE_MESSAGES = {UQ_USERS_USERNAME: "用户名已存在", UQ_USERS_EMAIL: "邮箱已存在"}
+
+def validate_role(role: str):
+    """角色必须是权限表中已配置的角色（权限依赖已在此之前刷新过缓存）"""
+    if role not in permission_cache.roles():
+        raise HTTPException(status_code=400, detail="无效的角色")
 
 # API端点
-@router.post("", response_model=UserResponse)
+@router.post("", response_model=UserResponse, dependencies=can_write_users)
 async def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    """创建用户"""
-    # 检查用户名是否已存在
-    existing_user = db.query(User).filter(User.username == user.username).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="用户名已存在")
-    
-    # 检查邮箱是否已存在
-    existing_email = db.query(User).filter(User.email == user.email).first()
-    if existing_email:
-        raise HTTPException(status_code=400, detail="邮箱已存在")
-    
+    """创建用户（用户名、邮箱重复由唯一索引拒绝，不再预先查询）"""
     # 验证角色
-    valid_roles = ["admin", "manager", "sales", "warehouse"]
-    if user.role not in valid_roles:
-        raise HTTPException(status_code=400, detail="无效的角色")
+    validate_role(user.role)
     
     # 创建用户
     db_user = User(
         username=user.username,
-        password=hash_password(user.password),
+        password=await hash_password_async(user.password),
         email=user.email,
         role=user.role,
         created_at=datetime.now()
     )
     db.add(db_user)
-    db.commit()
+    with unique_violations_as_400(db, UNIQUE_MESSAGES):
+        db.commit()
     db.refresh(db_user)
     return db_user
 
-@router.get("", response_model=List[UserResponse])
+@router.get("", response_model=List[UserResponse], dependencies=can_read_users)
 async def get_users(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     role: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
@@ -79,9 +87,28 @@ async def get_users(
     query = db.query(User)
     if role:
         query = query.filter(User.role == role)
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, User.user_id, response, limit, cursor, skip)
+
+@router.get("/me", response_model=CurrentUser)
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
+    """获取当前登录用户（由访问令牌解析，不查询数据库）"""
+    return current_user
 
-@router.get("/{user_id}", response_model=UserResponse)
+@router.get("/roles", response_model=List[RolePermissions], dependencies=can_read_users)
+async def get_role_permissions():
+    """获取各角色的权限"""
+    return [{"role": role, "permissions": sorted(permission_cache.permissions(role))}
+            for role in permission_cache.roles()]
+
+@router.put("/roles/{role}/permissions", response_model=RolePermissions, dependencies=can_write_users)
+async def update_role_permissions(role: str, permissions: List[str], db: Session = Depends(get_db)):
+    """替换角色的全部权限，所有进程的权限缓存随之失效"""
+    saved = RolePermissionDAO.replace_role(db, role, permissions)
+    db.commit()
+    permission_cache.invalidate()
+    return {"role": role, "permissions": saved}
+
+@router.get("/{user_id}", response_model=UserResponse, dependencies=can_read_users)
 async def get_user(user_id: int, db: Session = Depends(get_db)):
     """获取用户详情"""
     user = db.query(User).filter(User.user_id == user_id).first()
@@ -89,7 +116,7 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="用户不存在")
     return user
 
-@router.put("/{user_id}", response_model=UserResponse)
+@router.put("/{user_id}", response_model=UserResponse, dependencies=can_write_users)
 async def update_user(
     user_id: int,
     user: UserUpdate,
@@ -102,30 +129,23 @@ async def update_user(
     
     # 更新密码
     if user.password:
-        db_user.password = hash_password(user.password)
+        db_user.password = await hash_password_async(user.password)
     
     # 更新邮箱
     if user.email:
-        existing_email = db.query(User).filter(
-            User.email == user.email,
-            User.user_id != user_id
-        ).first()
-        if existing_email:
-            raise HTTPException(status_code=400, detail="邮箱已存在")
         db_user.email = user.email
     
     # 更新角色
     if user.role:
-        valid_roles = ["admin", "manager", "sales", "warehouse"]
-        if user.role not in valid_roles:
-            raise HTTPException(status_code=400, detail="无效的角色")
+        validate_role(user.role)
         db_user.role = user.role
     
-    db.commit()
+    with unique_violations_as_400(db, UNIQUE_MESSAGES):
+        db.commit()
     db.refresh(db_user)
     return db_user
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=can_write_users)
 async def delete_user(user_id: int, db: Session = Depends(get_db)):
     """删除用户"""
     user = db.query(User).filter(User.user_id == user_id).first()
@@ -145,21 +165,29 @@ class LoginResponse(BaseModel):
     user_id: int
     username: str
     role: str
-    token: str  # 实际项目中应该使用JWT
+    token: str
+    token_type: str = "bearer"
+    expires_in: int
 
 @router.post("/login", response_model=LoginResponse)
 async def login(user: UserLogin, db: Session = Depends(get_db)):
-    """用户登录"""
+    """用户登录
+
+    密码校验在专用线程池中执行，不阻塞其他请求；旧版 SHA-256 哈希校验通过后升级为 scrypt。
+    """
     db_user = db.query(User).filter(User.username == user.username).first()
-    if not db_user or db_user.password != hash_password(user.password):
+    hashed = db_user.password if db_user else None
+    if not await verify_password_async(user.password, hashed):
         raise HTTPException(status_code=401, detail="用户名或密码错误")
     
-    # 这里应该生成JWT token，这里简单返回一个模拟token
-    token = f"mock_token_{db_user.user_id}_{datetime.now().timestamp()}"
+    if needs_rehash(db_user.password):
+        db_user.password = await hash_password_async(user.password)
+        db.commit()
     
     return {
         "user_id": db_user.user_id,
         "username": db_user.username,
         "role": db_user.role,
-        "token": token
+        "token": token_service.issue(db_user.user_id, db_user.username, db_user.role),
+        "expires_in": token_service.ttl
     } 
\ No newline at end of file
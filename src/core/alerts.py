@@ -0,0 +1,184 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from datetime import datetime
+import asyncio
+import json
+import logging
+import threading
+
+import numpy as np
+
+from src.core.cache import shared_backend_from_env
+
+logger = logging.getLogger(__name__)
+
+ALERT_LOW_STOCK = "low_stock"
+ALERT_RECOVERED = "recovered"
+
+# 每个订阅者最多缓存的未读事件数，慢订阅者超出后丢弃最旧的事件
+SUBSCRIBER_QUEUE_SIZE = 1000
+# 多个 worker 之间广播库存水平的频道
+LEVELS_CHANNEL = "stock_alert:levels"
+
+def below_threshold(quantities: Sequence[float], thresholds: Sequence[float]) -> np.ndarray:
+    """向量化比较现有量与补货点，返回低于补货点的下标
+
+    Args:
+        quantities: 现有量数组
+        thresholds: 对应的补货点数组，NaN 表示未设置
+
+    Returns:
+        np.ndarray: 满足 quantity < threshold 的下标
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    # NaN 与任何数比较都为 False，未设置补货点的产品不会触发预警
+    return np.flatnonzero(quantities < thresholds)
+
+class AlertHub:
+    """低库存预警的状态与分发
+
+    只在状态变化时产生事件：产品首次低于补货点时发出 low_stock，恢复到补货点及以上时发出 recovered，
+    持续低库存期间的后续变动只更新当前预警而不重复通知。
+    订阅者各自持有一个 asyncio 队列，publish 可以在任意线程中调用。
+
+    预警状态和订阅者都在进程内。多 worker 部署时配置共享后端（CACHE_URL）并调用 start()：
+    各 worker 把库存水平广播到 LEVELS_CHANNEL，每个 worker 按相同顺序评估收到的全部库存水平，
+    因此连接到任一 worker 的 SSE 客户端都能收到其他 worker 中的库存变动产生的预警。
+    未配置共享后端时只能看到本 worker 内的变动。
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, backend=None):
+        """初始化
+
+        Args:
+            queue_size: 每个订阅者的队列长度
+            backend: 共享后端（LocalBackend/RedisBackend），为 None 时只在本进程内评估
+        """
+        self.queue_size = queue_size
+        self._backend = backend
+        self._unsubscribe = None
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """订阅共享后端的库存水平广播，在每个 worker 的 lifespan 中调用"""
+        if self._backend is not None and self._unsubscribe is None:
+            self._unsubscribe = self._backend.subscribe(LEVELS_CHANNEL, self._on_levels)
+
+    def stop(self):
+        """停止订阅"""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def evaluate(self, product_ids: Sequence[int], quantities: Sequence[float],
+                 thresholds: Sequence[float]) -> List[Dict[str, Any]]:
+        """评估一组产品的库存水平并发布状态变化
+
+        已订阅共享后端时只广播库存水平，由各 worker（包括本 worker）的订阅回调评估；
+        广播失败时退回只在本进程内评估。
+
+        Args:
+            product_ids: 本次变动涉及的产品ID
+            quantities: 各产品的现有量
+            thresholds: 各产品的补货点，NaN 表示未设置
+
+        Returns:
+            List[Dict[str, Any]]: 本进程内本次产生的预警事件；经共享后端广播时为空列表
+        """
+        if self._unsubscribe is not None:
+            levels = {
+                "product_ids": [int(product_id) for product_id in product_ids],
+                "quantities": [float(quantity) for quantity in quantities],
+                # JSON 没有 NaN，未设置的补货点写为 null
+                "thresholds": [None if np.isnan(threshold) else float(threshold) for threshold in thresholds]
+            }
+            try:
+                self._backend.publish(LEVELS_CHANNEL, json.dumps(levels))
+                return []
+            except Exception as e:
+                logger.error(f"广播库存水平失败，只在本进程内评估预警: {str(e)}")
+        return self._evaluate(product_ids, quantities, thresholds)
+
+    def _on_levels(self, message: str):
+        try:
+            levels = json.loads(message)
+            thresholds = [np.nan if threshold is None else threshold for threshold in levels["thresholds"]]
+            self._evaluate(levels["product_ids"], levels["quantities"], thresholds)
+        except Exception as e:
+            logger.error(f"处理库存水平广播失败: {str(e)}")
+
+    def _evaluate(self, product_ids: Sequence[int], quantities: Sequence[float],
+                  thresholds: Sequence[float]) -> List[Dict[str, Any]]:
+        low = set(below_threshold(quantities, thresholds).tolist())
+        now = datetime.now().isoformat()
+        events = []
+        with self._lock:
+            for index, product_id in enumerate(product_ids):
+                product_id = int(product_id)
+                quantity = int(quantities[index])
+                if index in low:
+                    alert = {"type": ALERT_LOW_STOCK, "product_id": product_id, "quantity": quantity,
+                             "reorder_point": int(thresholds[index]), "created_at": now}
+                    if product_id in self._active:
+                        # 已在预警中：只更新数量，不重复通知
+                        self._active[product_id].update(quantity=quantity, reorder_point=alert["reorder_point"])
+                    else:
+                        self._active[product_id] = alert
+                        events.append(dict(alert))
+                elif product_id in self._active:
+                    del self._active[product_id]
+                    events.append({"type": ALERT_RECOVERED, "product_id": product_id, "quantity": quantity,
+                                   "reorder_point": None if np.isnan(thresholds[index]) else int(thresholds[index]),
+                                   "created_at": now})
+        for event in events:
+            self.publish(event)
+        return events
+
+    def active(self) -> List[Dict[str, Any]]:
+        """当前处于预警中的产品"""
+        with self._lock:
+            return [dict(alert) for alert in self._active.values()]
+
+    def publish(self, event: Dict[str, Any]):
+        """向所有订阅者投递事件（线程安全）"""
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    async def subscribe(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """订阅预警事件
+
+        先依次产出当前所有处于预警中的产品，再产出后续事件；
+        设置 heartbeat 时，空闲超过该秒数会产出 None，便于调用方发送心跳。
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+            snapshot = [dict(alert) for alert in self._active.values()]
+        try:
+            for alert in snapshot:
+                yield alert
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+stock_alert_hub = AlertHub(backend=shared_backend_from_env())
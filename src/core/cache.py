@@ -0,0 +1,211 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+import os
+import threading
+import time
+
+_MISSING = object()
+
+class TTLCache:
+    """进程内缓存，条目在 ttl 秒后过期，超过 maxsize 时淘汰最久未使用的条目
+
+    线程安全：同步路由在线程池中执行，异步路由在事件循环中执行，二者会共享同一个实例。
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        """初始化缓存
+
+        Args:
+            ttl: 条目存活秒数
+            maxsize: 最大条目数
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，未命中或已过期时返回 default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """写入缓存"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """读取缓存，未命中时调用 loader 计算并写入"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    async def get_or_set_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_set 的异步版本，loader 为协程函数"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """删除单个条目"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+class LocalBackend:
+    """共享缓存后端的进程内替代实现
+
+    接口与 RedisBackend 相同，未配置共享缓存时使用，单进程部署和测试中行为一致。
+    值为字符串，由调用方负责序列化。
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], str]] = {}
+        self._channels: Dict[str, List[Callable[[str], None]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """键不存在（或已过期）时写入并返回 True，否则返回 False"""
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                return False
+            self._data[key] = (expires_at, value)
+            return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            expires_at, value = self._data.get(key, (None, "0"))
+            value = str(int(value) + 1)
+            self._data[key] = (expires_at, value)
+            return int(value)
+
+    def publish(self, channel: str, message: str):
+        """向频道的所有订阅者同步投递消息"""
+        with self._lock:
+            callbacks = list(self._channels.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> Callable[[], None]:
+        """订阅频道，返回取消订阅的函数"""
+        with self._lock:
+            self._channels.setdefault(channel, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._channels.get(channel, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+        return unsubscribe
+
+class RedisBackend:
+    """基于 Redis 的共享缓存后端，多个工作进程共享同一份缓存和失效状态"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("使用共享缓存需要安装 redis: pip install redis")
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._client.set(key, value, px=None if ttl is None else int(ttl * 1000))
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self._client.set(key, value, px=None if ttl is None else int(ttl * 1000), nx=True))
+
+    def delete(self, *keys: str):
+        if keys:
+            self._client.delete(*keys)
+
+    def incr(self, key: str) -> int:
+        return self._client.incr(key)
+
+    def publish(self, channel: str, message: str):
+        self._client.publish(channel, message)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> Callable[[], None]:
+        """在后台线程中监听频道（Redis pub/sub），返回停止监听的函数
+
+        须在 fork 之后（worker 的 lifespan 中）调用，监听线程不会被 fork 复制。
+        """
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: lambda message: callback(message["data"])})
+        thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+        def unsubscribe():
+            thread.stop()
+            pubsub.close()
+        return unsubscribe
+
+def shared_backend_from_env():
+    """按环境变量 CACHE_URL 创建共享缓存后端
+
+    redis:// 或 rediss:// 使用 RedisBackend；local 使用进程内替代；未设置时返回 None（只用进程内缓存）。
+    """
+    url = os.getenv("CACHE_URL")
+    if not url:
+        return None
+    if url == "local":
+        return LocalBackend()
+    return RedisBackend(url)
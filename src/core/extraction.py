@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional
+import re
+
+# 意图关键词 -> 类别；同一关键词可属于多个类别（“订单”既是下单词也是查询对象）
+INTENT_KEYWORDS = {
+    "订购": ("order_verb",),
+    "订单": ("order_verb", "order_noun"),
+    "购买": ("order_verb",),
+    "买": ("order_verb",),
+    "查询": ("query_verb",),
+    "检索": ("query_verb",),
+    "显示": ("query_verb",),
+    "查看": ("query_verb",),
+    "看": ("query_verb",),
+    "生成": ("report_verb",),
+    "创建": ("report_verb",),
+    "制作": ("report_verb",),
+    "出": ("report_verb",),
+    "报表": ("report_noun",),
+    "报告": ("report_noun",),
+    "统计": ("report_noun",),
+    "分析": ("analysis",),
+    "评估": ("analysis",),
+    "比较": ("analysis",),
+    "预测": ("analysis",),
+    "库存": ("inventory",),
+    "盘点": ("inventory",),
+    "供应商": ("supplier",),
+    "供货商": ("supplier",),
+}
+
+# 槽位分支，与意图关键词合并为一个正则。分支只消耗开头的锚点（关键字、数字串），
+# 槽位值放在先行断言里捕获，因此“客户华为订购100台”这样重叠的客户名、关键词与数量都能找到。
+# 捕获组名即槽位名，同一槽位有多个分支时见 _ANCHORED_GROUPS
+SLOT_BRANCHES = [
+    # 数字串后按单位区分（单位紧跟数字，与原 (\d+)台 等正则一致）：台 -> 数量，GB -> 内存，TB -> 存储，-MM-DD -> 日期（取数字串末4位为年份）
+    r"\d+(?:(?P<quantity>台)|(?P<memory>GB)|(?P<storage>TB)|(?=(?P<delivery_date>-\d{2}-\d{2})))",
+    r"客户(?=(?P<customer>\w+))",
+    r"地址是(?=(?P<address>.*?)[。\n])",
+    r"Intel(?=(?P<cpu_intel>\s+i\d+))",
+    r"AMD(?=(?P<cpu_amd>\s+Ryzen\s+\d+)|(?P<gpu_amd>\s+Radeon\s+\w+))",
+    r"NVIDIA(?=(?P<gpu_nvidia>\s+RTX\s+\d+))",
+    r"RTX(?=(?P<gpu_rtx>\d+))",
+]
+
+# 值从匹配起点开始（包含锚点）的捕获组
+_ANCHORED_GROUPS = {"cpu_intel": "cpu", "cpu_amd": "cpu", "gpu_amd": "gpu", "gpu_nvidia": "gpu", "gpu_rtx": "gpu"}
+# 值为数字串、单位捕获组只用来区分槽位
+_NUMBER_GROUPS = {"quantity", "memory", "storage"}
+
+SPEC_SLOTS = ("cpu", "memory", "storage", "gpu")
+
+def _first_char(branch: str) -> str:
+    return branch[:2] if branch.startswith("\\") else branch[0]
+
+def _compile() -> "re.Pattern":
+    keywords = sorted(INTENT_KEYWORDS, key=len, reverse=True)
+    # 先用所有分支的首字符组成的字符集过滤位置，大部分位置只需一次字符集判断，不必逐个尝试分支
+    first_chars = "".join(sorted({keyword[0] for keyword in keywords})) + "".join(map(_first_char, SLOT_BRANCHES))
+    # 意图关键词不设捕获组，命中时 lastgroup 为 None
+    branches = [re.escape(keyword) for keyword in keywords] + SLOT_BRANCHES
+    return re.compile(f"(?=[{first_chars}])(?:{'|'.join(branches)})")
+
+_SCANNER = _compile()
+
+class Extraction:
+    """一次扫描的结果：各槽位的首个匹配，以及各类意图关键词出现的位置"""
+
+    __slots__ = ("text", "slots", "keywords")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.slots: Dict[str, str] = {}
+        self.keywords: Dict[str, List[int]] = {}
+
+    def _before(self, first: str, second: str) -> bool:
+        """first 类关键词出现在同一行中某个 second 类关键词之前"""
+        for start in self.keywords.get(first, ()):
+            for end in self.keywords.get(second, ()):
+                if start < end and "\n" not in self.text[start:end]:
+                    return True
+        return False
+
+    @property
+    def request_type(self) -> str:
+        """按优先级判断请求类型"""
+        if "order_verb" in self.keywords and "quantity" in self.slots:
+            return "order_processing"
+        if self._before("query_verb", "order_noun"):
+            return "order_query"
+        if self._before("report_verb", "report_noun"):
+            return "report_generation"
+        if "analysis" in self.keywords:
+            return "data_analysis"
+        if "inventory" in self.keywords:
+            return "inventory_management"
+        if "supplier" in self.keywords:
+            return "supplier_management"
+        return "general_inquiry"
+
+    @property
+    def quantity(self) -> int:
+        return int(self.slots["quantity"]) if "quantity" in self.slots else 0
+
+    @property
+    def specs(self) -> Dict[str, Optional[str]]:
+        return {slot: self.slots.get(slot) for slot in SPEC_SLOTS}
+
+    def get(self, slot: str) -> Optional[str]:
+        value = self.slots.get(slot)
+        return value.strip() if slot == "address" and value is not None else value
+
+    def order_info(self) -> Dict[str, Any]:
+        """订单信息：客户、数量、配置、交付日期、地址"""
+        return {
+            "customer": self.get("customer"),
+            "quantity": self.quantity,
+            "specs": self.specs,
+            "delivery_date": self.get("delivery_date"),
+            "address": self.get("address")
+        }
+
+def extract(text: str) -> Extraction:
+    """单次扫描文本，提取意图关键词与全部槽位
+
+    所有模式在导入时合并编译为一个正则（见 SLOT_BRANCHES），正则引擎在 C 层逐位置尝试，
+    Python 层只处理实际命中的锚点，不再对每个模式各扫描一遍文本。
+    """
+    result = Extraction(text)
+    slots = result.slots
+    keywords = result.keywords
+    for match in _SCANNER.finditer(text):
+        group = match.lastgroup
+        if group is None:
+            position = match.start()
+            for category in INTENT_KEYWORDS[match.group()]:
+                keywords.setdefault(category, []).append(position)
+            continue
+
+        slot = _ANCHORED_GROUPS.get(group, group)
+        if slot in slots:
+            # 与 re.search 一致，只保留每个槽位最左边的匹配
+            continue
+        if group in _ANCHORED_GROUPS:
+            slots[slot] = text[match.start():match.end(group)]
+        elif group in _NUMBER_GROUPS:
+            slots[slot] = text[match.start():match.start(group)]
+        elif group == "delivery_date":
+            digits = text[match.start():match.start(group)]
+            if len(digits) >= 4:
+                slots[slot] = digits[-4:] + match.group(group)
+        else:
+            slots[slot] = match.group(group)
+    return result
+
+def extract_order_info(text: str) -> Dict[str, Any]:
+    """从文本中提取订单信息"""
+    return extract(text).order_info()
@@ -0,0 +1,115 @@
+from typing import Optional
+import os
+import socket
+import threading
+import time
+import zlib
+
+# 自定义纪元 2024-01-01 00:00:00 UTC（毫秒），48位时间戳可用到约公元 10900 年
+EPOCH_MS = 1704067200000
+
+TIMESTAMP_BITS = 48
+NODE_BITS = 32
+SEQUENCE_BITS = 16
+
+MAX_NODE = (1 << NODE_BITS) - 1
+
+# 节点ID = 主机编号（高10位）| 进程号（低22位）；Linux 的 pid_max 最大为 2^22，进程号总能放进低22位
+HOST_BITS = 10
+PID_BITS = NODE_BITS - HOST_BITS
+MAX_HOST = (1 << HOST_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford Base32，去掉了易混淆的 I L O U，字典序与数值序一致
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# 96位ID编码为20个字符（100位）
+ENCODED_LENGTH = 20
+
+def default_node_id() -> int:
+    """计算当前进程的节点ID
+
+    由主机编号（高10位）和进程号（低22位）组成。同一主机上同时运行的进程号互不相同，
+    因此同一主机上的多个 worker（包括同一父进程 fork 出的 worker）不会得到相同的节点ID。
+
+    主机编号取环境变量 ERP_NODE_ID（0~1023），未设置时取主机名的 CRC32 低10位。
+    主机名哈希在多台主机（或容器）之间可能相同，而容器内的进程号又常常相同（如都是 1），
+    此时不同主机会生成重复的ID，因此多主机部署必须为每台主机设置不同的 ERP_NODE_ID。
+    """
+    env_node = os.getenv("ERP_NODE_ID")
+    if env_node is not None:
+        host = int(env_node)
+        if not 0 <= host <= MAX_HOST:
+            raise ValueError(f"ERP_NODE_ID 超出范围 0~{MAX_HOST}: {host}")
+    else:
+        host = zlib.crc32(socket.gethostname().encode()) & MAX_HOST
+    return (host << PID_BITS) | (os.getpid() & ((1 << PID_BITS) - 1))
+
+def encode_base32(value: int, length: int = ENCODED_LENGTH) -> str:
+    """定长 Crockford Base32 编码"""
+    chars = []
+    for _ in range(length):
+        chars.append(_ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+class IdGenerator:
+    """按时间排序、无冲突的ID生成器（Snowflake/ULID 风格）
+
+    ID由 48位毫秒时间戳 | 32位节点ID | 16位序列号 组成：
+    同一毫秒内序列号递增，序列号用尽时等待下一毫秒；时钟回拨时沿用上次的时间戳，
+    因此同一进程生成的ID严格递增，不同进程的ID由节点ID区分。
+    """
+
+    def __init__(self, node_id: Optional[int] = None):
+        """初始化生成器
+
+        Args:
+            node_id: 节点ID，不提供时按 default_node_id 计算，并在 fork 后自动重新计算
+        """
+        self._fixed_node = node_id is not None
+        self.node_id = node_id if self._fixed_node else default_node_id()
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+        if not self._fixed_node:
+            self.node_id = default_node_id()
+
+    def next_int(self) -> int:
+        """生成整数形式的ID"""
+        with self._lock:
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now <= self._last_ms:
+                now = self._last_ms
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # 当前毫秒的序列号已用尽，等到下一毫秒
+                    while now <= self._last_ms:
+                        now = int(time.time() * 1000) - EPOCH_MS
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self, prefix: str = "") -> str:
+        """生成字符串ID，如 ORD000MJBAV63JTG18GC000
+
+        Args:
+            prefix: 业务前缀，如 ORD、BGT_、PLN_
+        """
+        return f"{prefix}{encode_base32(self.next_int())}"
+
+id_generator = IdGenerator()
+
+if hasattr(os, "register_at_fork"):
+    # 预先 fork 的工作进程会继承父进程的生成器状态，需要换成子进程自己的节点ID
+    os.register_at_fork(after_in_child=id_generator._reset_after_fork)
+
+def new_id(prefix: str = "") -> str:
+    """使用进程级默认生成器生成字符串ID"""
+    return id_generator.next_id(prefix)
@@ -0,0 +1,265 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+
+from src.core.cache import TTLCache, shared_backend_from_env
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# 重放的响应体因过大未保存时带上该头
+TRUNCATED_HEADER = "Idempotent-Body-Truncated"
+# 只有会修改数据的方法参与幂等处理
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# 已完成响应的保留秒数，客户端在此期间的重试都会得到同一响应
+IDEMPOTENCY_TTL = 24 * 3600
+# 进程内最多保留的响应数，超过时淘汰最久未使用的
+IDEMPOTENCY_MAXSIZE = 10_000
+# 响应体超过该字节数时只保存状态码和响应头，重试重放它们并带上 Idempotent-Body-Truncated，不重新执行
+MAX_RESPONSE_BYTES = 64 * 1024
+MAX_KEY_LENGTH = 255
+# 共享后端中“执行中”标记的存活秒数，持有者崩溃后该键在此之后可被重新执行
+IN_FLIGHT_TTL = 60
+# 重放被截断的响应时不再适用于空响应体的头
+_BODY_HEADERS = {"content-length", "content-encoding"}
+# 其他进程正在执行同一请求时轮询结果的间隔
+POLL_INTERVAL = 0.05
+
+_KEY_PREFIX = "idempotency"
+
+class IdempotencyStore:
+    """幂等键的响应存储
+
+    未配置共享缓存时响应保存在进程内 TTLCache（TTL + 条目上限）；配置了 CACHE_URL 时保存在共享后端，
+    并用 add（SET NX）在后端登记“执行中”标记，多个 worker 收到同一个键时只有一个执行。
+    同一进程内的并发重复请求由 IdempotencyMiddleware 合并到执行中的请求上，不会访问后端。
+    """
+
+    def __init__(self, backend=None, ttl: float = IDEMPOTENCY_TTL, maxsize: int = IDEMPOTENCY_MAXSIZE,
+                 in_flight_ttl: float = IN_FLIGHT_TTL):
+        """初始化存储
+
+        Args:
+            backend: 共享缓存后端，为 None 时只使用进程内缓存
+            ttl: 响应保留秒数
+            maxsize: 进程内最多保留的响应数
+            in_flight_ttl: 共享后端中执行中标记的存活秒数
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.local = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取已保存的响应"""
+        if self.backend is None:
+            return self.local.get(key)
+        value = self.backend.get(key)
+        return json.loads(value) if value is not None else None
+
+    def save(self, key: str, record: Dict[str, Any]):
+        """保存响应"""
+        if self.backend is None:
+            self.local.set(key, record)
+            return
+        self.backend.set(key, json.dumps(record), self.ttl)
+
+    def claim(self, key: str) -> bool:
+        """登记执行中标记，已被其他进程登记时返回 False"""
+        if self.backend is None:
+            return True
+        return self.backend.add(f"{key}:lock", "1", self.in_flight_ttl)
+
+    def release(self, key: str):
+        """删除执行中标记"""
+        if self.backend is not None:
+            self.backend.delete(f"{key}:lock")
+
+class IdempotencyMiddleware:
+    """幂等键中间件
+
+    客户端在修改类请求上携带 Idempotency-Key 头时：
+    - 首次请求正常执行，非 5xx 响应（状态码、头、响应体）按 调用方 + 方法 + 路径 + 键 保存，
+      调用方为 Authorization 头的哈希，不同用户使用相同的键互不影响，也拿不到他人的响应；
+      未携带 Authorization 的请求无法区分调用方，带幂等键时返回 400；
+    - 之后同一调用方相同键的请求直接重放保存的响应，并带上 Idempotent-Replayed: true；
+    - 原请求仍在执行时，重复请求等待其完成后重放，而不是再执行一次；
+    - 同一个键配不同的请求体返回 422，避免客户端误用键导致静默丢失请求。
+    5xx 响应和执行异常不保存，客户端可以用同一个键重试；响应体过大时只重放状态码和响应头。
+    纯 ASGI 实现，对不带该请求头的请求没有额外开销。
+    """
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None, max_response_bytes: int = MAX_RESPONSE_BYTES):
+        self.app = app
+        self.store = store or IdempotencyStore(shared_backend_from_env())
+        self.max_response_bytes = max_response_bytes
+        self._header = IDEMPOTENCY_HEADER.lower().encode()
+        self._authorization = b"authorization"
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def _call(self, func, *args):
+        # 共享后端是网络调用，放到线程中执行，避免阻塞事件循环
+        if self.store.backend is None:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = None
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == self._header:
+                idempotency_key = value.decode("latin-1")
+            elif name == self._authorization:
+                authorization = value
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"{IDEMPOTENCY_HEADER} 长度必须在 1 到 {MAX_KEY_LENGTH} 之间")
+            return
+        if not authorization:
+            # 匿名请求共用同一个命名空间，会拿到其他人的响应
+            await _send_json(send, 400, f"{IDEMPOTENCY_HEADER} 只能在携带 Authorization 凭据的请求中使用")
+            return
+
+        body, receive = await _buffer_body(receive)
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\0" + body).hexdigest()
+        # 只保存凭据的哈希，共享后端中不出现令牌原文
+        caller = hashlib.sha256(authorization).hexdigest()
+        key = f"{_KEY_PREFIX}:{caller}:{scope['method']}:{scope['path']}:{idempotency_key}"
+
+        waited_since = time.monotonic()
+        while True:
+            record = await self._call(self.store.get, key)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    await _send_json(send, 422, f"{IDEMPOTENCY_HEADER} 已用于不同的请求")
+                else:
+                    await _replay(send, record)
+                return
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                # 本进程内正在执行同一请求，等待其完成后重新读取结果
+                await asyncio.shield(future)
+                continue
+
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                claimed = await self._call(self.store.claim, key)
+            except BaseException:
+                self._finish(key, future)
+                raise
+            if claimed:
+                break
+
+            # 其他进程正在执行同一请求，轮询其结果
+            self._finish(key, future)
+            if time.monotonic() - waited_since > self.store.in_flight_ttl:
+                await _send_json(send, 409, "相同幂等键的请求仍在处理中")
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+
+        try:
+            await self._execute(scope, receive, send, key, fingerprint)
+        finally:
+            try:
+                await self._call(self.store.release, key)
+            finally:
+                self._finish(key, future)
+
+    def _finish(self, key: str, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.done():
+            future.set_result(None)
+
+    async def _execute(self, scope, receive, send, key: str, fingerprint: str):
+        """执行请求并在完成后保存响应"""
+        response: Dict[str, Any] = {"status": None, "headers": [], "chunks": [], "size": 0, "complete": False}
+
+        async def capture(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[name.decode("latin-1"), value.decode("latin-1")]
+                                       for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] <= self.max_response_bytes:
+                    response["chunks"].append(chunk)
+                if not message.get("more_body", False):
+                    response["complete"] = True
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+        if not response["complete"] or response["status"] >= 500:
+            return
+        too_large = response["size"] > self.max_response_bytes
+        record = {
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": response["headers"],
+            "body": None if too_large else base64.b64encode(b"".join(response["chunks"])).decode("ascii")
+        }
+        try:
+            await self._call(self.store.save, key, record)
+        except Exception as e:
+            logger.warning(f"保存幂等响应失败: {str(e)}")
+
+async def _buffer_body(receive):
+    """读取完整请求体，返回请求体和可重新读取该请求体的 receive"""
+    chunks: List[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(chunks)
+    delivered = False
+
+    async def replay_receive():
+        nonlocal delivered
+        if delivered:
+            return await receive()
+        delivered = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return body, replay_receive
+
+async def _replay(send, record: Dict[str, Any]):
+    """重放保存的响应"""
+    truncated = record["body"] is None
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]
+               if not (truncated and name.lower() in _BODY_HEADERS)]
+    headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+    if truncated:
+        # 请求已成功执行，只是响应体未保存：重放状态码和响应头，响应体为空
+        headers += [(TRUNCATED_HEADER.lower().encode(), b"true"), (b"content-length", b"0")]
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if truncated else base64.b64decode(record["body"])})
+
+async def _send_json(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
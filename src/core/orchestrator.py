@@ -1,18 +1,22 @@
 from typing import Dict, Any, List, Optional, Tuple
-from transformers import BertTokenizer, BertModel, BertForSequenceClassification
 import json
 from datetime import datetime
-import re
-import torch
 import os
 import asyncio
 import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import psutil
 import time
 import openai
 from openai import AsyncOpenAI
 from src.database.history_dao import HistoryDAO
+from src.core.extraction import extract
+from src.agents.order_agent import OrderAgent
+from src.agents.planning_agent import PlanningAgent
+from src.agents.supply_chain_agent import SupplyChainAgent
+from src.agents.finance_agent import FinanceAgent
+from src.agents.prediction_agent import PredictionAgent
 import uuid
 from sqlalchemy.orm import Session
 
@@ -59,6 +63,29 @@ class PerformanceMonitor:
         self.metrics["response_times"].append(end_time - self.start_time)
         self.metrics["resource_usage"][id(self)] = resource_end - self.resource_start
 
+class AgentRunner:
+    """在 agent 专用的工作线程中执行它的 process
+
+    agent 的处理逻辑虽然是协程，内部却是同步计算，并会修改 status 等实例状态。
+    每个 agent 只有一个工作线程和一个常驻事件循环：同一 agent 的请求依次执行，不同 agent 之间并发，
+    也不阻塞应用的事件循环，且不必每次调用都新建事件循环。
+    """
+    def __init__(self, agent):
+        self.agent = agent
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"agent-{agent.agent_type}")
+        self._loop = asyncio.new_event_loop()
+    
+    def _run(self, parameters: Dict[str, Any]):
+        return self._loop.run_until_complete(self.agent.process(parameters))
+    
+    async def process(self, parameters: Dict[str, Any]):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._run, parameters)
+    
+    def close(self):
+        """等待进行中的请求完成后关闭工作线程与事件循环"""
+        self._executor.shutdown(wait=True)
+        self._loop.close()
+
 class TaskScheduler:
     """任务调度器"""
     def __init__(self, orchestrator):
@@ -96,12 +123,12 @@ class TaskScheduler:
             task.updated_at = datetime.now()
             
             # 获取对应的 agent
-            agent = self.orchestrator.agents.get(task.task_type)
-            if not agent:
+            runner = self.orchestrator.runners.get(task.task_type)
+            if not runner:
                 raise ValueError(f"未找到对应的 Agent: {task.task_type}")
             
             # 调用 agent 处理任务
-            result = await agent.process(task.parameters)
+            result = await runner.process(task.parameters)
             
             # 更新任务状态和结果
             task.status = "completed"
@@ -157,18 +184,36 @@ class ResourcePool:
         self.available_resources["memory"] += resources["memory"]
         del self.allocated_resources[task_id]
 
+# 未配置大模型或调用失败时按请求类型规划：请求类型 -> (主任务, 参与的 agent, 依赖)
+RULE_BASED_PLANS = {
+    "order_processing": ("order", ["order", "planning", "supply_chain", "finance"],
+                         {"supply_chain": ["planning"], "finance": ["planning"]}),
+    "inventory_management": ("supply_chain", ["planning", "supply_chain"], {"supply_chain": ["planning"]}),
+    "data_analysis": ("prediction", ["prediction"], {}),
+    "report_generation": ("finance", ["finance"], {}),
+}
+DEFAULT_PLAN = ("order", ["order"], {})
+
+# 依赖 agent 的结果以什么参数名传给下游 agent
+DEPENDENCY_PARAMETERS = {
+    ("supply_chain", "planning"): "plan_details",
+}
+
 class LLMOrchestrator:
     """LLM编排器"""
     
-    def __init__(self, db_session, openai_api_key: Optional[str] = None, agents: Optional[List[Any]] = None):
+    def __init__(self, db_session=None, openai_api_key: Optional[str] = None, agents: Optional[List[Any]] = None,
+                 load_classifier: bool = True):
         """初始化编排器
         
         Args:
-            db_session: 数据库会话
-            openai_api_key: OpenAI API 密钥，如果不提供则从环境变量获取
+            db_session: 数据库会话；应用级的共享实例不持有会话，由 process_instruction 传入
+            openai_api_key: OpenAI API 密钥，如果不提供则从环境变量获取；都没有时按规则规划任务
             agents: 要注册的 agent 列表
+            load_classifier: 是否加载 BERT 任务分类模型
         """
         self.agents = {}
+        self.runners = {}
         self.tasks = {}
         self.performance_monitor = PerformanceMonitor()
         self.task_scheduler = TaskScheduler(self)
@@ -176,16 +221,32 @@ class LLMOrchestrator:
         self._lock = asyncio.Lock()
         self.history = []  # 添加历史记录列表
         self.db_session = db_session
-        self.history_dao = HistoryDAO(db_session)
+        self.history_dao = HistoryDAO(db_session) if db_session is not None else None
         
         # 初始化 OpenAI 客户端
         api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("未提供 OpenAI API 密钥，请设置 OPENAI_API_KEY 环境变量或通过参数传入")
-        self.openai_client = AsyncOpenAI(api_key=api_key)
+        if api_key:
+            self.openai_client = AsyncOpenAI(api_key=api_key)
+        else:
+            self.openai_client = None
+            logger.warning("未配置 OPENAI_API_KEY，将按规则分析任务")
         
+        if load_classifier:
+            self._load_classifier()
+            
+        # 注册 agents
+        if agents:
+            for agent in agents:
+                self.register_agent(agent)
+    
+    def _load_classifier(self):
+        """加载BERT任务分类模型"""
         logger.info("正在加载模型...")
         try:
+            # 只在需要分类模型时导入，API 进程不加载 torch
+            import torch
+            from transformers import BertTokenizer, BertForSequenceClassification
+            
             # 加载BERT分类器
             self.tokenizer = BertTokenizer.from_pretrained("bert-base-chinese")
             self.model = BertForSequenceClassification.from_pretrained("bert-base-chinese", num_labels=5)  # 5个任务类型
@@ -200,31 +261,32 @@ class LLMOrchestrator:
         except Exception as e:
             logger.error(f"模型加载失败: {str(e)}")
             raise e
-            
-        # 注册 agents
-        if agents:
-            for agent in agents:
-                self.register_agent(agent)
     
     def register_agent(self, agent):
         """注册Agent"""
+        if agent.agent_type in self.runners:
+            self.runners[agent.agent_type].close()
         self.agents[agent.agent_type] = agent
+        self.runners[agent.agent_type] = AgentRunner(agent)
         logger.info(f"Agent {agent.agent_id} ({agent.agent_type}) 已注册")
     
-    async def process_instruction(self, text: str, db: Session) -> Dict:
+    def close(self):
+        """关闭各 agent 的工作线程"""
+        for runner in self.runners.values():
+            runner.close()
+    
+    async def process_instruction(self, text: str, db: Optional[Session] = None) -> Dict:
         """处理指令
         
         Args:
             text: 输入文本指令
-            db: 数据库会话
+            db: 数据库会话，用于保存历史记录；不提供时使用构造时传入的会话
             
         Returns:
             处理结果字典
         """
         start_time = time.time()
         task_id = str(uuid.uuid4())
-        result = {}
-        status = "failed"
         agents_involved = []
         task_type = "unknown"
         
@@ -236,47 +298,44 @@ class LLMOrchestrator:
             
             # 执行任务
             result = await self._execute_task(task_info)
-            status = "completed"
-            
-            # 保存历史记录
-            history_entry = {
-                'timestamp': datetime.now(),
-                'task_id': task_id,
-                'task_type': task_type,
-                'input_text': text,
-                'result': result,
-                'status': status,
-                'execution_time': time.time() - start_time,
-                'agents_involved': agents_involved
-            }
-            await self.history_dao.add_history(db, history_entry)
-            
+            await self._save_history(db, task_id, task_type, text, result, "completed",
+                                     agents_involved, time.time() - start_time)
             return result
             
         except Exception as e:
             logger.error(f"处理指令失败: {str(e)}")
-            result = {"error": str(e)}
-            status = "failed"
-            
-            # 保存错误记录
-            history_entry = {
-                'timestamp': datetime.now(),
-                'task_id': task_id,
-                'task_type': task_type,
-                'input_text': text,
-                'result': result,
-                'status': status,
-                'execution_time': time.time() - start_time,
-                'agents_involved': agents_involved,
-                'error': str(e)
-            }
-            await self.history_dao.add_history(db, history_entry)
-            
+            await self._save_history(db, task_id, task_type, text, {"error": str(e)}, "failed",
+                                     agents_involved, time.time() - start_time)
             raise e
     
+    async def _save_history(self, db: Optional[Session], task_id: str, task_type: str, text: str,
+                            result: Dict[str, Any], status: str, agents_involved: List[str], execution_time: float):
+        """保存历史记录；写入失败只记录日志，不影响指令处理结果"""
+        history_dao = HistoryDAO(db) if db is not None else self.history_dao
+        if history_dao is None:
+            return
+        history_entry = {
+            'timestamp': datetime.now(),
+            'task_id': task_id,
+            'task_type': task_type,
+            'input': text,
+            'output': json.dumps(result, ensure_ascii=False, default=str),
+            'status': status,
+            'agents_involved': ",".join(agents_involved),
+            'execution_time': execution_time
+        }
+        try:
+            # 同步会话的写入放到线程中，不阻塞事件循环
+            await asyncio.to_thread(history_dao.save_history, history_entry)
+        except Exception as e:
+            logger.warning(f"保存历史记录失败: {str(e)}")
+    
     async def _execute_task(self, task_info: Dict[str, Any]) -> Dict[str, Any]:
         """执行任务
         
+        按依赖关系分层执行：同一层的 agent 互不依赖，并发执行；下一层在上一层全部完成后开始，
+        并能拿到所依赖 agent 的结果。
+        
         Args:
             task_info: 任务信息，包含main_task、required_agents等
             
@@ -284,24 +343,33 @@ class LLMOrchestrator:
             Dict[str, Any]: 执行结果
         """
         results = {}
-        task_sequence = self._generate_task_sequence(task_info)
-        
-        for task in task_sequence:
-            agent_type = task["type"]
-            agent = self.agents.get(agent_type)
-            if not agent:
-                raise ValueError(f"未找到对应的Agent: {agent_type}")
-            
-            try:
-                # 调用agent处理任务
-                task_result = await agent.process(task["parameters"])
-                results[agent_type] = task_result.to_dict() if hasattr(task_result, 'to_dict') else task_result
-            except Exception as e:
-                logger.error(f"Agent {agent_type} 处理任务失败: {str(e)}")
-                results[agent_type] = {"error": str(e)}
+        for level in self._generate_task_levels(task_info):
+            outcomes = await asyncio.gather(*(self._run_agent(agent_type, task_info, results) for agent_type in level))
+            results.update(zip(level, outcomes))
         
         return self._generate_final_result(results)
     
+    async def _run_agent(self, agent_type: str, task_info: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+        """执行单个 agent，失败时返回错误信息而不中断其他 agent"""
+        runner = self.runners.get(agent_type)
+        if not runner:
+            logger.error(f"未找到对应的Agent: {agent_type}")
+            return {"error": f"未找到对应的Agent: {agent_type}"}
+        
+        parameters = self._create_task_parameters(agent_type, task_info)
+        for dependency in task_info["dependencies"].get(agent_type, []):
+            name = DEPENDENCY_PARAMETERS.get((agent_type, dependency))
+            if name and (results.get(dependency) or {}).get("data") is not None:
+                parameters[name] = results[dependency]["data"]
+        
+        try:
+            # 在 agent 专用线程中执行（见 AgentRunner），同一层的不同 agent 并发
+            task_result = await runner.process(parameters)
+            return task_result.to_dict() if hasattr(task_result, 'to_dict') else task_result
+        except Exception as e:
+            logger.error(f"Agent {agent_type} 处理任务失败: {str(e)}")
+            return {"error": str(e)}
+    
     async def _analyze_instruction(self, text: str) -> Dict[str, Any]:
         """分析指令"""
         # 使用OpenAI分析任务
@@ -315,6 +383,9 @@ class LLMOrchestrator:
     
     async def _analyze_with_llm(self, text: str, extracted_info: Dict[str, Any]) -> Dict[str, Any]:
         """使用大模型分析任务和依赖关系"""
+        if self.openai_client is None:
+            return self._analyze_with_rules(extracted_info)
+        
         prompt = f"""请分析以下订单需求，并确定需要哪些 agent 参与处理，以及它们之间的依赖关系：
 
 订单内容：{text}
@@ -364,54 +435,31 @@ class LLMOrchestrator:
             
         except Exception as e:
             logger.error(f"调用 OpenAI API 失败: {str(e)}")
-            # 使用默认值
-            return {
-                "main_task": "order",
-                "required_agents": ["order"],
-                "dependencies": {},
-                "constraints": [],
-                "reasoning": "分析失败，使用默认值",
-                "extracted_info": extracted_info
-            }
+            # 按规则规划
+            return self._analyze_with_rules(extracted_info)
     
-    def _extract_info_from_text(self, text: str) -> Dict[str, Any]:
-        """从文本中提取关键信息"""
-        info = {
-            "quantity": 0,
-            "product_specs": {},
-            "delivery_date": None,
-            "delivery_address": None
-        }
-        
-        # 提取数量
-        quantity_match = re.search(r'(\d+)\s*台', text)
-        if quantity_match:
-            info["quantity"] = int(quantity_match.group(1))
-        
-        # 提取配置信息
-        specs = {
-            "cpu": re.search(r'(Intel\s+i\d+|AMD\s+Ryzen\s+\d+)', text),
-            "memory": re.search(r'(\d+)GB', text),
-            "storage": re.search(r'(\d+)TB', text),
-            "gpu": re.search(r'(NVIDIA\s+RTX\s+\d+|AMD\s+Radeon\s+\w+)', text)
+    def _analyze_with_rules(self, extracted_info: Dict[str, Any]) -> Dict[str, Any]:
+        """按提取到的请求类型规划参与的 agent 及依赖"""
+        main_task, required_agents, dependencies = RULE_BASED_PLANS.get(extracted_info["request_type"], DEFAULT_PLAN)
+        return {
+            "main_task": main_task,
+            "required_agents": list(required_agents),
+            "dependencies": {agent: list(deps) for agent, deps in dependencies.items()},
+            "constraints": [],
+            "reasoning": f"按请求类型 {extracted_info['request_type']} 规划",
+            "extracted_info": extracted_info
         }
-        
-        info["product_specs"] = {
-            key: match.group(1) if match else None
-            for key, match in specs.items()
+    
+    def _extract_info_from_text(self, text: str) -> Dict[str, Any]:
+        """从文本中提取关键信息（与 /api/nlp/process 共用同一提取引擎）"""
+        extraction = extract(text)
+        return {
+            "request_type": extraction.request_type,
+            "quantity": extraction.quantity,
+            "product_specs": extraction.specs,
+            "delivery_date": extraction.get("delivery_date"),
+            "delivery_address": extraction.get("address")
         }
-        
-        # 提取日期
-        date_match = re.search(r'(\d{4}-\d{2}-\d{2})', text)
-        if date_match:
-            info["delivery_date"] = date_match.group(1)
-        
-        # 提取地址
-        address_match = re.search(r'地址是(.*?)[。\n]', text)
-        if address_match:
-            info["delivery_address"] = address_match.group(1).strip()
-        
-        return info
     
     def _determine_priority(self, extracted_info: Dict[str, Any]) -> str:
         """确定优先级"""
@@ -423,29 +471,36 @@ class LLMOrchestrator:
         else:
             return "low"
     
-    def _generate_task_sequence(self, analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """生成任务序列"""
-        task_sequence = []
-        required_agents = analysis["required_agents"]
-        dependencies = analysis["dependencies"]
+    def _generate_task_levels(self, analysis: Dict[str, Any]) -> List[List[str]]:
+        """按依赖关系把参与的 agent 分层，每层只依赖之前各层
         
-        # 创建依赖图
-        processed = set()
+        下游 agent 需要的上游 agent（如 supply_chain 需要 planning 的计划）会自动加入；
+        不在本次参与范围内的依赖被忽略，循环依赖时抛出 ValueError。
+        """
+        required_agents = list(dict.fromkeys(analysis["required_agents"]))
+        for agent_type, dependency in DEPENDENCY_PARAMETERS:
+            if agent_type in required_agents and dependency not in required_agents:
+                required_agents.insert(required_agents.index(agent_type), dependency)
+        analysis["required_agents"] = required_agents
         
-        def can_process(agent):
-            return all(dep in processed for dep in dependencies.get(agent, []))
+        dependencies = {}
+        for agent in required_agents:
+            declared = set(analysis.get("dependencies", {}).get(agent, []))
+            declared |= {dependency for (downstream, dependency) in DEPENDENCY_PARAMETERS if downstream == agent}
+            dependencies[agent] = [dep for dep in required_agents if dep in declared and dep != agent]
+        analysis["dependencies"] = dependencies
         
-        # 按依赖顺序添加任务
+        levels = []
+        processed = set()
         while len(processed) < len(required_agents):
-            for agent in required_agents:
-                if agent not in processed and can_process(agent):
-                    task_sequence.append({
-                        "type": agent,
-                        "parameters": self._create_task_parameters(agent, analysis)
-                    })
-                    processed.add(agent)
+            level = [agent for agent in required_agents
+                     if agent not in processed and all(dep in processed for dep in dependencies[agent])]
+            if not level:
+                raise ValueError(f"agent 之间存在循环依赖: {dependencies}")
+            levels.append(level)
+            processed.update(level)
         
-        return task_sequence
+        return levels
     
     def _create_task_parameters(self, agent_type: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """创建任务参数"""
@@ -481,14 +536,19 @@ class LLMOrchestrator:
             })
         
         elif agent_type == "finance":
-            # 简单的成本估算
+            # 简单的成本估算，按预算科目传给 FinanceAgent 生成预算
             quantity = extracted_info["quantity"]
+            cost_estimation = {
+                "materials": quantity * 5000,  # 材料成本
+                "labor": quantity * 1000,      # 人工成本
+                "overhead": quantity * 500      # 管理费用
+            }
             base_params.update({
-                "cost_estimation": {
-                    "materials": quantity * 5000,  # 材料成本
-                    "labor": quantity * 1000,      # 人工成本
-                    "overhead": quantity * 500      # 管理费用
-                }
+                "operation_type": "budget",
+                "cost_estimation": cost_estimation,
+                "材料_amount": cost_estimation["materials"],
+                "人工_amount": cost_estimation["labor"],
+                "其他_amount": cost_estimation["overhead"]
             })
         
         elif agent_type == "prediction":
@@ -506,4 +566,20 @@ class LLMOrchestrator:
             "status": "success",
             "timestamp": datetime.now().isoformat(),
             "results": results
-        } 
\ No newline at end of file
+        } 
+
+def create_orchestrator(load_classifier: bool = False) -> LLMOrchestrator:
+    """创建注册了全部 agent 的编排器
+
+    应用在生命周期开始时创建一次并在所有请求间共享；任务规划不使用 BERT 分类模型，默认不加载。
+    """
+    return LLMOrchestrator(
+        load_classifier=load_classifier,
+        agents=[
+            OrderAgent(agent_type="order"),
+            PlanningAgent(agent_type="planning"),
+            SupplyChainAgent(agent_type="supply_chain"),
+            FinanceAgent(agent_type="finance"),
+            PredictionAgent(agent_type="prediction")
+        ]
+    )
@@ -0,0 +1,120 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+import logging
+import threading
+import time
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 权限格式为 资源:操作，操作为 read 或 write；资源:* 表示该资源的全部操作，* 表示全部权限
+READ = "read"
+WRITE = "write"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# 数据库中没有配置时使用的默认角色权限，与迁移 2026_10_19_1700 写入的初始数据一致
+DEFAULT_ROLE_PERMISSIONS: Dict[str, FrozenSet[str]] = {
+    "admin": frozenset({"*"}),
+    "manager": frozenset({"finance:*", "inventory:*", "product:*", "supplier:*", "user:read"}),
+    "sales": frozenset({"product:read", "inventory:read", "supplier:read"}),
+    "warehouse": frozenset({"inventory:*", "product:read", "supplier:read"}),
+}
+
+# 进程内角色权限表的最长使用秒数；其他进程修改权限后，本进程最多延迟这么久才生效
+PERMISSION_CHECK_INTERVAL = 30
+
+_VERSION_KEY = "permissions:version"
+
+def action_for_method(method: str) -> str:
+    """只读方法对应 read，其余对应 write"""
+    return READ if method in SAFE_METHODS else WRITE
+
+class PermissionCache:
+    """角色 -> 权限集合的进程内缓存
+
+    每次请求只做一次字典查找和集合判断，不查询数据库。权限表按版本失效：
+    本进程修改权限后立即重新加载；配置了共享缓存时，修改方递增共享版本号，
+    其他进程每 check_interval 秒比较一次版本号，变化时才重新加载；未配置共享缓存时每 check_interval 秒重新加载。
+    """
+
+    def __init__(self, loader: Callable[[], Dict[str, Iterable[str]]], backend=None,
+                 check_interval: float = PERMISSION_CHECK_INTERVAL):
+        """初始化缓存
+
+        Args:
+            loader: 加载全部角色权限的函数，返回 {角色: 权限列表}，为空时使用默认权限
+            backend: 共享缓存后端，用于跨进程传递版本号
+            check_interval: 检查版本号（或重新加载）的间隔秒数
+        """
+        self.loader = loader
+        self.backend = backend
+        self.check_interval = check_interval
+        self._roles: Optional[Dict[str, FrozenSet[str]]] = None
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def is_stale(self) -> bool:
+        """是否需要调用 refresh（可能涉及数据库或共享缓存，应在线程池中执行）"""
+        return self._roles is None or self._dirty or time.monotonic() - self._checked_at > self.check_interval
+
+    def _shared_version(self) -> Optional[str]:
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get(_VERSION_KEY) or "0"
+        except Exception as e:
+            logger.warning(f"读取权限版本失败: {str(e)}")
+            return None
+
+    def refresh(self):
+        """按需重新加载角色权限表"""
+        with self._lock:
+            if not self.is_stale():
+                return
+            version = self._shared_version()
+            unchanged = self.backend is not None and version is not None and version == self._version
+            if self._roles is not None and not self._dirty and unchanged:
+                self._checked_at = time.monotonic()
+                return
+            # 先清除标记再加载，加载期间发生的修改会在下次请求时再次触发加载
+            self._dirty = False
+            try:
+                loaded = self.loader()
+            except Exception as e:
+                logger.warning(f"加载角色权限失败，继续使用{'缓存的' if self._roles else '默认'}权限: {str(e)}")
+                loaded = None
+            if loaded:
+                self._roles = {role: frozenset(permissions) for role, permissions in loaded.items()}
+            elif self._roles is None or loaded is not None:
+                self._roles = dict(DEFAULT_ROLE_PERMISSIONS)
+            self._version = version
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+
+    def invalidate(self):
+        """权限修改后调用：本进程下次请求时重新加载，并通知其他进程"""
+        self._dirty = True
+        if self.backend is not None:
+            try:
+                self.backend.incr(_VERSION_KEY)
+            except Exception as e:
+                logger.warning(f"递增权限版本失败: {str(e)}")
+
+    def roles(self) -> List[str]:
+        """已配置的角色"""
+        return sorted(self._roles if self._roles is not None else DEFAULT_ROLE_PERMISSIONS)
+
+    def permissions(self, role: str) -> FrozenSet[str]:
+        roles = self._roles if self._roles is not None else DEFAULT_ROLE_PERMISSIONS
+        return roles.get(role, frozenset())
+
+    def allows(self, role: str, permission: str) -> bool:
+        """角色是否拥有权限"""
+        permissions = self.permissions(role)
+        if "*" in permissions or permission in permissions:
+            return True
+        resource, _, _ = permission.partition(":")
+        return f"{resource}:*" in permissions
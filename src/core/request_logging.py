@@ -0,0 +1,176 @@
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import random
+
+from src.core.id_generator import new_id
+
+LOG_DIR = os.getenv("ERP_LOG_DIR", "logs")
+LOG_FILE = "api.log"
+# 按大小轮转：单个文件上限与保留的历史文件数
+LOG_MAX_BYTES = int(os.getenv("ERP_LOG_MAX_BYTES", 20 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("ERP_LOG_BACKUP_COUNT", 10))
+# 设置后改为按时间轮转，取值同 TimedRotatingFileHandler 的 when（如 "midnight"、"H"）
+LOG_ROTATE_WHEN = os.getenv("ERP_LOG_ROTATE_WHEN")
+# 完整请求/响应载荷的采样率，0 表示不记录，1 表示全部记录
+PAYLOAD_SAMPLE_RATE = float(os.getenv("ERP_LOG_PAYLOAD_SAMPLE_RATE", 0.01))
+# 日志队列上限，写入线程跟不上时丢弃新记录而不是阻塞请求
+QUEUE_SIZE = 10000
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# 当前请求的关联ID；run_in_threadpool / asyncio.to_thread 会复制上下文，线程中的日志同样带有该ID
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecord 自带的属性，其余属性视为调用方通过 extra 传入的结构化字段
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出为一行 JSON：时间、级别、logger、关联ID、消息以及 extra 字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _DroppingQueueHandler(QueueHandler):
+    """非阻塞入队：队列满时丢弃记录"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 调用方线程只做参数插值并带上关联ID，载荷等 extra 字段留给写入线程序列化
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+def should_log_payload(rate: float = None) -> bool:
+    """按采样率决定本次请求是否记录完整载荷"""
+    rate = PAYLOAD_SAMPLE_RATE if rate is None else rate
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+def log_file_path(directory: str = LOG_DIR) -> str:
+    """日志文件路径；多进程服务中每个 worker 写自己的文件，避免多个进程同时轮转同一文件"""
+    worker = os.getenv("ERP_WORKER_ID")
+    name = LOG_FILE if worker is None else f"api.worker{worker}.log"
+    return os.path.join(directory, name)
+
+def _file_handler(path: str) -> logging.Handler:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if LOG_ROTATE_WHEN:
+        return TimedRotatingFileHandler(path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    return RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+
+class AsyncLogging:
+    """基于 QueueHandler 的异步日志管道
+
+    启动后根 logger 只保留一个 QueueHandler，业务代码中的日志调用只做一次入队；
+    原有的控制台输出和轮转日志文件由后台 QueueListener 线程写入，磁盘 I/O 不再占用事件循环。
+    监听线程不能跨 fork 继承，因此在每个 worker 的 lifespan 中启动。
+    """
+
+    def __init__(self, path: Optional[str] = None, file_output: bool = True):
+        """初始化日志管道
+
+        Args:
+            path: 日志文件路径，默认按 log_file_path 计算
+            file_output: 是否写入日志文件
+        """
+        self.path = path
+        self.file_output = file_output
+        self._listener: Optional[QueueListener] = None
+        self._previous: List[logging.Handler] = []
+
+    def start(self):
+        if self._listener is not None:
+            return
+        root = logging.getLogger()
+        self._previous = list(root.handlers)
+        handlers = list(self._previous)
+        if self.file_output:
+            file_handler = _file_handler(self.path or log_file_path())
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        log_queue = queue.Queue(QUEUE_SIZE)
+        queue_handler = _DroppingQueueHandler(log_queue)
+        for handler in self._previous:
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
+    def stop(self):
+        """停止监听线程（写完队列中剩余的记录）并恢复原有的处理器"""
+        if self._listener is None:
+            return
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, _DroppingQueueHandler):
+                root.removeHandler(handler)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            if handler not in self._previous:
+                handler.close()
+        for handler in self._previous:
+            root.addHandler(handler)
+        self._listener = None
+
+class RequestIdMiddleware:
+    """为每个 HTTP 请求设置关联ID
+
+    优先沿用请求头 X-Request-ID，否则生成新ID；ID 写入上下文变量供日志使用，并在响应头中返回。
+    纯 ASGI 实现，不像 BaseHTTPMiddleware 那样为每个请求额外创建任务和流。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header = REQUEST_ID_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self._header:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or new_id("req_")
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(self._header, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+
+from jose import JWTError, jwt
+
+from src.core.cache import TTLCache
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# scrypt 参数：每次哈希约占 128 * N * r 字节内存（N=2^15, r=8 时 32MB），单核耗时约 0.1 秒
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_MAXMEM = 64 * 1024 * 1024
+SALT_BYTES = 16
+HASH_BYTES = 32
+_SCHEME = "scrypt"
+
+# 密码哈希专用线程池大小，默认等于 CPU 核数；scrypt 在 C 层执行时释放 GIL，可以真正并行
+KDF_WORKERS = int(os.getenv("ERP_KDF_WORKERS", 0)) or os.cpu_count() or 1
+
+JWT_ALGORITHM = "HS256"
+ACCESS_TOKEN_TTL = int(os.getenv("ERP_ACCESS_TOKEN_TTL", 3600))
+# 已验证令牌缓存的条目数，命中时不再做签名校验
+TOKEN_CACHE_MAXSIZE = 4096
+
+class InvalidTokenError(Exception):
+    """令牌无效或已过期"""
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES, maxmem=SCRYPT_MAXMEM)
+
+def hash_password(password: str) -> str:
+    """加盐 scrypt 哈希，结果格式为 scrypt$N$r$p$盐$哈希，参数随哈希保存，日后调整参数不影响已有密码"""
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{_SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+
+def verify_password(password: str, hashed: str) -> bool:
+    """校验密码，兼容旧版无盐单轮 SHA-256 哈希（64位十六进制）"""
+    if hashed.startswith(f"{_SCHEME}$"):
+        try:
+            _, n, r, p, salt, digest = hashed.split("$")
+            expected = _b64decode(digest)
+            actual = _scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, expected)
+    legacy = hashlib.sha256(password.encode("utf-8")).hexdigest()
+    return hmac.compare_digest(legacy, hashed)
+
+def needs_rehash(hashed: str) -> bool:
+    """旧版哈希或参数与当前设置不同时返回 True，登录成功后应重新哈希"""
+    return not hashed.startswith(f"{_SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_dummy_hash: Optional[str] = None
+
+def _kdf_executor() -> ThreadPoolExecutor:
+    """密码哈希专用线程池
+
+    与 FastAPI 默认线程池分开，大量登录请求不会占满默认线程池而拖慢同步数据库路由；
+    池大小也限制了同时进行的哈希数，从而限制 scrypt 的内存占用。
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=KDF_WORKERS, thread_name_prefix="kdf")
+    return _executor
+
+def _reset_after_fork():
+    # 线程不会被 fork 继承，子进程中重新创建线程池
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+async def hash_password_async(password: str) -> str:
+    """在密码哈希线程池中计算哈希，不阻塞事件循环"""
+    return await asyncio.get_running_loop().run_in_executor(_kdf_executor(), hash_password, password)
+
+async def verify_password_async(password: str, hashed: Optional[str]) -> bool:
+    """在密码哈希线程池中校验密码
+
+    hashed 为 None（用户不存在）时仍对一个固定哈希做一次校验，使响应时间与用户存在时相同，
+    避免通过耗时差异枚举用户名。
+    """
+    global _dummy_hash
+    loop = asyncio.get_running_loop()
+    if hashed is None:
+        if _dummy_hash is None:
+            _dummy_hash = await loop.run_in_executor(_kdf_executor(), hash_password, secrets.token_urlsafe(16))
+        await loop.run_in_executor(_kdf_executor(), verify_password, password, _dummy_hash)
+        return False
+    return await loop.run_in_executor(_kdf_executor(), verify_password, password, hashed)
+
+def _jwt_secret() -> str:
+    """令牌签名密钥，取自 ERP_JWT_SECRET
+
+    所有进程必须使用同一密钥，否则重启后或在其他 worker 上令牌全部失效，因此未配置时拒绝启动。
+    只有显式设置 ERP_ALLOW_EPHEMERAL_JWT_SECRET=1（本地开发、测试）时才使用进程内随机密钥。
+
+    Raises:
+        RuntimeError: 未配置 ERP_JWT_SECRET 且未允许随机密钥
+    """
+    secret = os.getenv("ERP_JWT_SECRET")
+    if secret:
+        return secret
+    if os.getenv("ERP_ALLOW_EPHEMERAL_JWT_SECRET") != "1":
+        raise RuntimeError("未配置 ERP_JWT_SECRET；本地开发或测试可设置 ERP_ALLOW_EPHEMERAL_JWT_SECRET=1 使用随机密钥")
+    logger.warning("未配置 ERP_JWT_SECRET，按 ERP_ALLOW_EPHEMERAL_JWT_SECRET 使用随机密钥，重启后已签发的令牌全部失效，"
+                   "多个 worker 之间的令牌也互不通用")
+    return secrets.token_urlsafe(32)
+
+class TokenService:
+    """JWT 访问令牌的签发与校验
+
+    令牌自带用户ID、用户名、角色和过期时间，校验只需验证签名，不查询数据库。
+    验证通过的令牌放入 LRU 缓存，缓存条目在令牌过期时同时过期，重复请求只做一次字典查找。
+    令牌是无状态的：修改角色或删除用户后，已签发的令牌在过期前仍然有效。
+    """
+
+    def __init__(self, secret: str, algorithm: str = JWT_ALGORITHM, ttl: int = ACCESS_TOKEN_TTL,
+                 cache_size: int = TOKEN_CACHE_MAXSIZE):
+        """初始化令牌服务
+
+        Args:
+            secret: 签名密钥
+            algorithm: 签名算法
+            ttl: 令牌有效秒数
+            cache_size: 已验证令牌缓存的最大条目数
+        """
+        self.secret = secret
+        self.algorithm = algorithm
+        self.ttl = ttl
+        self.cache = TTLCache(ttl=ttl, maxsize=cache_size)
+
+    def issue(self, user_id: int, username: str, role: str) -> str:
+        """签发访问令牌"""
+        now = int(time.time())
+        claims = {"sub": str(user_id), "username": username, "role": role, "iat": now, "exp": now + self.ttl}
+        return jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """校验令牌并返回其中的声明，无效或过期时抛出 InvalidTokenError"""
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise InvalidTokenError(str(e))
+        if "sub" not in claims or "exp" not in claims:
+            raise InvalidTokenError("令牌缺少必要的声明")
+        remaining = claims["exp"] - time.time()
+        if remaining > 0:
+            self.cache.set(token, claims, ttl=remaining)
+        return claims
+
+# 导入时读取密钥，未配置时应用在启动阶段即失败，而不是签发无法跨进程校验的令牌
+token_service = TokenService(_jwt_secret())
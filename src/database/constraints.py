@@ -0,0 +1,21 @@
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+
+# PostgreSQL 唯一约束冲突的 SQLSTATE
+UNIQUE_VIOLATION = "23505"
+
+# 唯一索引名，见迁移 2026_10_19_1800
+UQ_USERS_USERNAME = "uq_users_username"
+UQ_USERS_EMAIL = "uq_users_email"
+UQ_PRODUCTS_PRODUCT_NAME = "uq_products_product_name"
+
+def violated_unique_constraint(error: IntegrityError) -> Optional[str]:
+    """唯一约束冲突时返回冲突的约束（索引）名，其他完整性错误返回 None
+
+    兼容 psycopg（sqlstate）与 psycopg2（pgcode）两种驱动。
+    """
+    orig = error.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if sqlstate != UNIQUE_VIOLATION:
+        return None
+    return getattr(getattr(orig, "diag", None), "constraint_name", None)
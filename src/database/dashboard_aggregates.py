@@ -0,0 +1,133 @@
+from typing import Any, Dict, List
+from sqlalchemy import text
+from src.config.database import async_engine
+from src.core.cache import TTLCache
+import asyncio
+import logging
+import time
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 仪表盘结果缓存秒数
+DASHBOARD_CACHE_TTL = 60
+# 物化视图定时刷新间隔（秒）；有新订单时会在 REFRESH_DEBOUNCE 秒内提前刷新
+REFRESH_INTERVAL = 300
+REFRESH_DEBOUNCE = 5
+# 多进程部署时保证同一时刻只有一个进程在刷新
+REFRESH_LOCK_KEY = 7_202_801
+
+dashboard_cache = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=16)
+
+# 物化视图由迁移 2026_10_19_1900 创建
+AGGREGATE_VIEWS = ["mv_monthly_sales", "mv_category_sales"]
+
+async def refresh_aggregate_views() -> bool:
+    """并发刷新汇总物化视图，刷新期间仪表盘仍可读取旧数据
+
+    Returns:
+        bool: 是否执行了刷新（其他进程正在刷新时跳过）
+    """
+    async with async_engine.begin() as conn:
+        locked = (await conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY}
+        )).scalar()
+        if not locked:
+            return False
+        for view in AGGREGATE_VIEWS:
+            await conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+    dashboard_cache.clear()
+    return True
+
+async def query_sales_trend() -> List[Dict[str, Any]]:
+    """最近12个月的月度销售额"""
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text("""
+            SELECT month, total_sales
+            FROM mv_monthly_sales
+            WHERE month >= DATE_TRUNC('month', NOW() - INTERVAL '12 months')
+            ORDER BY month ASC
+        """))
+        return [{"month": row[0].strftime("%Y-%m"), "total_sales": float(row[1] or 0)}
+                for row in result]
+
+async def query_category_distribution() -> List[Dict[str, Any]]:
+    """各产品类别的销售分布"""
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text("""
+            SELECT category, item_count, total_sales
+            FROM mv_category_sales
+            ORDER BY total_sales DESC
+        """))
+        return [{"category": row[0],
+                 "count": int(row[1]),
+                 "total_sales": float(row[2] or 0)}
+                for row in result]
+
+class AggregateRefresher:
+    """仪表盘汇总后台刷新任务
+
+    按固定间隔刷新物化视图；调用 mark_dirty 后会在短暂去抖后提前刷新，
+    使新订单尽快出现在仪表盘上，同时把一批订单合并为一次刷新。
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL, debounce: float = REFRESH_DEBOUNCE):
+        self.interval = interval
+        self.debounce = debounce
+        self._dirty = None
+        self._task = None
+        self.last_refresh = None
+
+    def mark_dirty(self):
+        """标记汇总数据已过期"""
+        if self._dirty is not None:
+            self._dirty.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.interval)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+            try:
+                start = time.time()
+                if await refresh_aggregate_views():
+                    self.last_refresh = time.time()
+                    logger.info(f"仪表盘汇总已刷新，耗时 {self.last_refresh - start:.2f}s")
+            except Exception as e:
+                logger.error(f"刷新仪表盘汇总失败: {str(e)}")
+
+    def start(self):
+        """在当前事件循环中启动后台刷新"""
+        if self._task is None:
+            self._dirty = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台刷新"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._dirty = None
+
+aggregate_refresher = AggregateRefresher()
+
+async def get_sales_trend_cached() -> List[Dict[str, Any]]:
+    """带缓存的月度销售额"""
+    return await dashboard_cache.get_or_set_async("sales-trend", query_sales_trend)
+
+async def get_category_distribution_cached() -> List[Dict[str, Any]]:
+    """带缓存的类别销售分布"""
+    return await dashboard_cache.get_or_set_async("category-distribution", query_category_distribution)
+
+def invalidate_dashboard():
+    """订单变更后调用：清除仪表盘缓存并安排汇总刷新"""
+    dashboard_cache.clear()
+    aggregate_refresher.mark_dirty()
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+class InventoryAvailabilityDAO:
+    """多仓库存汇总与可承诺量（ATP）查询
+
+    inventory 中每个 (product_id, location) 一行，quantity 为现有量，reserved_quantity 为预占量，
+    各位置 quantity - reserved_quantity 之和即为产品的可承诺量。查询只读、不加锁，
+    依赖 (product_id, location) INCLUDE (quantity, reserved_quantity) 覆盖索引完成仅索引扫描。
+    """
+
+    @staticmethod
+    def available_to_promise(db: Session, product_ids: List[int],
+                             location: Optional[str] = None) -> Dict[int, int]:
+        """一次查询获取多个产品的可承诺量
+
+        Args:
+            db: 数据库会话
+            product_ids: 产品ID列表
+            location: 只统计指定位置，不提供时汇总所有位置
+
+        Returns:
+            Dict[int, int]: 产品ID到可承诺量的映射，没有任何库存记录的产品不在其中
+        """
+        if not product_ids:
+            return {}
+        result = db.execute(text("""
+            SELECT product_id, SUM(quantity - reserved_quantity) AS available
+            FROM inventory
+            WHERE product_id = ANY(:product_ids)
+              AND (CAST(:location AS VARCHAR) IS NULL OR location = :location)
+            GROUP BY product_id
+        """), {"product_ids": list(product_ids), "location": location})
+        return {row[0]: int(row[1]) for row in result}
+
+    @staticmethod
+    def on_hand_by_product(db: Session, limit: int = 100, after_product_id: Optional[int] = None,
+                           product_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """按产品汇总各位置的现有量，按 product_id 键集分页
+
+        Args:
+            db: 数据库会话
+            limit: 返回的产品数
+            after_product_id: 上一页最后一个产品ID
+            product_ids: 只汇总指定产品
+
+        Returns:
+            List[Dict[str, Any]]: 每个产品的 product_id、total_quantity、location_count
+        """
+        result = db.execute(text("""
+            SELECT product_id,
+                   SUM(quantity) AS total_quantity,
+                   COUNT(*) AS location_count
+            FROM inventory
+            WHERE (CAST(:after_product_id AS INTEGER) IS NULL OR product_id > :after_product_id)
+              AND (CAST(:product_ids AS INTEGER[]) IS NULL OR product_id = ANY(:product_ids))
+            GROUP BY product_id
+            ORDER BY product_id
+            LIMIT :limit
+        """), {
+            "after_product_id": after_product_id,
+            "product_ids": list(product_ids) if product_ids is not None else None,
+            "limit": limit
+        })
+        return [dict(row) for row in result.mappings()]
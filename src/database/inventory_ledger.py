@@ -0,0 +1,439 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+import asyncio
+import logging
+
+from src.database.stock_events import on_stock_changed
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 流水类型
+MOVEMENT_OPENING = "opening"      # 期初（建档或迁移时的数量）
+MOVEMENT_ADJUST = "adjust"        # 入库/出库调整
+MOVEMENT_SET = "set"              # 盘点直接设置数量
+MOVEMENT_RESERVE = "reserve"      # 旧版本的预占扣减（现在预占只计入 reserved_quantity，不写流水）
+MOVEMENT_RELEASE = "release"      # 旧版本的预占归还
+MOVEMENT_CONSUME = "consume"      # 预占确认出库
+MOVEMENT_COMPACTED = "compacted"  # 历史流水合并
+MOVEMENT_ORDER = "order"          # 下单扣减
+
+# 预占状态
+RESERVATION_HELD = "held"
+RESERVATION_RELEASED = "released"
+RESERVATION_CONSUMED = "consumed"
+RESERVATION_EXPIRED = "expired"
+
+# 后台维护任务：预占过期检查间隔、流水合并间隔与保留天数
+EXPIRE_INTERVAL = 30
+COMPACT_INTERVAL = 3600
+COMPACT_RETENTION_DAYS = 90
+
+INVENTORY_COLUMNS = "inventory_id, product_id, quantity, reserved_quantity, location, last_updated"
+
+# 批量调整时每条语句处理的条目数（每条目5个绑定参数，需低于 PostgreSQL 的 65535 上限）
+BATCH_CHUNK = 5000
+
+class InsufficientStockError(ValueError):
+    """库存不足"""
+
+class InventoryLedgerDAO:
+    """库存流水数据访问对象
+
+    inventory.quantity 是现有量快照，所有变动都通过带条件的原子 UPDATE 修改快照，
+    并在同一事务中向只追加的 inventory_movements 写入一条流水，快照始终等于流水合计。
+    预占（hold）只计入 inventory.reserved_quantity，不改变现有量；确认时才扣减现有量并写流水，
+    释放或过期时只减少 reserved_quantity。可用量为 quantity - reserved_quantity。
+    """
+
+    @staticmethod
+    def _record(db: Session, inventory_id: int, quantity_change: int, movement_type: str,
+                reason: Optional[str] = None, reference: Optional[str] = None):
+        db.execute(text("""
+            INSERT INTO inventory_movements
+                (inventory_id, quantity_change, movement_type, reason, reference, created_at)
+            VALUES (:inventory_id, :quantity_change, :movement_type, :reason, :reference, NOW())
+        """), {
+            "inventory_id": inventory_id,
+            "quantity_change": quantity_change,
+            "movement_type": movement_type,
+            "reason": reason,
+            "reference": reference
+        })
+
+    @staticmethod
+    def _exists(db: Session, inventory_id: int) -> bool:
+        return db.execute(
+            text("SELECT 1 FROM inventory WHERE inventory_id = :inventory_id"),
+            {"inventory_id": inventory_id}
+        ).first() is not None
+
+    @staticmethod
+    def _apply(db: Session, inventory_id: int, quantity_change: int) -> Optional[Dict[str, Any]]:
+        """带条件的原子更新快照，数量不会被扣成负数"""
+        row = db.execute(text(f"""
+            UPDATE inventory
+            SET quantity = quantity + :quantity_change, last_updated = NOW()
+            WHERE inventory_id = :inventory_id AND quantity + :quantity_change >= 0
+            RETURNING {INVENTORY_COLUMNS}
+        """), {"inventory_id": inventory_id, "quantity_change": quantity_change}).mappings().first()
+
+        if row is None:
+            if InventoryLedgerDAO._exists(db, inventory_id):
+                raise InsufficientStockError(f"库存不足: inventory_id={inventory_id}")
+            return None
+        return dict(row)
+
+    @staticmethod
+    def has_history(db: Session, inventory_id: int) -> bool:
+        """库存记录是否已有流水或预占；流水只追加，有记录时库存记录不能删除"""
+        return db.execute(text("""
+            SELECT EXISTS (SELECT 1 FROM inventory_movements WHERE inventory_id = :inventory_id)
+                OR EXISTS (SELECT 1 FROM inventory_reservations WHERE inventory_id = :inventory_id)
+        """), {"inventory_id": inventory_id}).scalar()
+
+    @staticmethod
+    def adjust(db: Session, inventory_id: int, quantity_change: int, reason: str,
+               movement_type: str = MOVEMENT_ADJUST, reference: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """原子地调整库存并记录流水（不提交事务）
+
+        Args:
+            db: 数据库会话
+            inventory_id: 库存记录ID
+            quantity_change: 变动数量，正数入库，负数出库
+            reason: 变动原因
+            movement_type: 流水类型
+            reference: 关联单据号
+
+        Returns:
+            Optional[Dict[str, Any]]: 调整后的库存记录，记录不存在时返回None
+
+        Raises:
+            InsufficientStockError: 调整后数量将小于0
+        """
+        row = InventoryLedgerDAO._apply(db, inventory_id, quantity_change)
+        if row is not None:
+            InventoryLedgerDAO._record(db, inventory_id, quantity_change, movement_type, reason, reference)
+        return row
+
+    @staticmethod
+    def set_quantity(db: Session, inventory_id: int, quantity: int, reason: str,
+                     location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """将库存设置为指定数量，按差额记录流水（不提交事务）"""
+        row = db.execute(text(f"""
+            UPDATE inventory AS i
+            SET quantity = :quantity,
+                location = COALESCE(:location, i.location),
+                last_updated = NOW()
+            FROM (
+                SELECT inventory_id, quantity AS old_quantity
+                FROM inventory WHERE inventory_id = :inventory_id FOR UPDATE
+            ) AS old
+            WHERE i.inventory_id = old.inventory_id
+            RETURNING old.old_quantity, {", ".join("i." + c for c in INVENTORY_COLUMNS.split(", "))}
+        """), {"inventory_id": inventory_id, "quantity": quantity, "location": location}).mappings().first()
+
+        if row is None:
+            return None
+
+        row = dict(row)
+        delta = quantity - row.pop("old_quantity")
+        if delta:
+            InventoryLedgerDAO._record(db, inventory_id, delta, MOVEMENT_SET, reason)
+        return row
+
+    @staticmethod
+    def record_opening(db: Session, inventory_id: int, quantity: int):
+        """为新建的库存记录写入期初流水"""
+        InventoryLedgerDAO._record(db, inventory_id, quantity, MOVEMENT_OPENING, "期初库存")
+
+    @staticmethod
+    def reserve(db: Session, inventory_id: int, quantity: int, ttl_seconds: int,
+                reference: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """预占库存，到期未确认时由后台任务自动归还（不提交事务）
+
+        Returns:
+            Optional[Dict[str, Any]]: 预占记录，库存记录不存在时返回None
+
+        Raises:
+            ValueError: ttl_seconds 不大于0
+            InsufficientStockError: 可用库存不足
+        """
+        if ttl_seconds <= 0:
+            raise ValueError(f"预占有效期必须大于0: {ttl_seconds}")
+        held = db.execute(text("""
+            UPDATE inventory
+            SET reserved_quantity = reserved_quantity + :quantity, last_updated = NOW()
+            WHERE inventory_id = :inventory_id AND quantity - reserved_quantity >= :quantity
+            RETURNING inventory_id
+        """), {"inventory_id": inventory_id, "quantity": quantity}).first()
+        if held is None:
+            if InventoryLedgerDAO._exists(db, inventory_id):
+                raise InsufficientStockError(f"可用库存不足: inventory_id={inventory_id}")
+            return None
+
+        reservation = db.execute(text("""
+            INSERT INTO inventory_reservations
+                (inventory_id, quantity, reference, status, expires_at, created_at)
+            VALUES (:inventory_id, :quantity, :reference, :status,
+                    NOW() + make_interval(secs => :ttl_seconds), NOW())
+            RETURNING reservation_id, inventory_id, quantity, reference, status, expires_at, created_at
+        """), {
+            "inventory_id": inventory_id,
+            "quantity": quantity,
+            "reference": reference,
+            "status": RESERVATION_HELD,
+            # 到期时间按数据库时钟计算，与 expire_reservations 中的 NOW() 比较时不受应用服务器时钟和时区影响
+            "ttl_seconds": ttl_seconds
+        }).mappings().first()
+        return dict(reservation)
+
+    @staticmethod
+    def _close_reservation(db: Session, reservation_id: int, status: str) -> Optional[Dict[str, Any]]:
+        row = db.execute(text("""
+            UPDATE inventory_reservations
+            SET status = :status
+            WHERE reservation_id = :reservation_id AND status = :held
+            RETURNING reservation_id, inventory_id, quantity, reference, status, expires_at, created_at
+        """), {"reservation_id": reservation_id, "status": status, "held": RESERVATION_HELD}).mappings().first()
+        return dict(row) if row else None
+
+    @staticmethod
+    def _unhold(db: Session, inventory_id: int, quantity: int, consumed: bool):
+        """从 reserved_quantity 中移除预占数量，consumed 为 True 时同时扣减现有量"""
+        db.execute(text("""
+            UPDATE inventory
+            SET reserved_quantity = reserved_quantity - :quantity,
+                quantity = quantity - CASE WHEN :consumed THEN :quantity ELSE 0 END,
+                last_updated = NOW()
+            WHERE inventory_id = :inventory_id
+        """), {"inventory_id": inventory_id, "quantity": quantity, "consumed": consumed})
+
+    @staticmethod
+    def release(db: Session, reservation_id: int) -> Optional[Dict[str, Any]]:
+        """释放预占，可用量随之恢复（不提交事务），预占不存在或已关闭时返回None"""
+        reservation = InventoryLedgerDAO._close_reservation(db, reservation_id, RESERVATION_RELEASED)
+        if reservation:
+            InventoryLedgerDAO._unhold(db, reservation["inventory_id"], reservation["quantity"], False)
+        return reservation
+
+    @staticmethod
+    def consume(db: Session, reservation_id: int) -> Optional[Dict[str, Any]]:
+        """确认预占：扣减现有量并写入出库流水（不提交事务），预占不存在或已关闭时返回None"""
+        reservation = InventoryLedgerDAO._close_reservation(db, reservation_id, RESERVATION_CONSUMED)
+        if reservation:
+            InventoryLedgerDAO._unhold(db, reservation["inventory_id"], reservation["quantity"], True)
+            InventoryLedgerDAO._record(
+                db, reservation["inventory_id"], -reservation["quantity"], MOVEMENT_CONSUME, "预占出库",
+                f"RSV:{reservation_id}"
+            )
+        return reservation
+
+    @staticmethod
+    def expire_reservations(db: Session) -> List[int]:
+        """结束所有已过期的预占并恢复可用量，返回受影响的库存记录ID（提交事务）"""
+        inventory_ids = db.execute(text("""
+            WITH expired AS (
+                UPDATE inventory_reservations
+                SET status = :expired
+                WHERE status = :held AND expires_at < NOW()
+                RETURNING inventory_id, quantity
+            ),
+            totals AS (
+                SELECT inventory_id, SUM(quantity) AS quantity
+                FROM expired GROUP BY inventory_id
+            ),
+            restored AS (
+                UPDATE inventory AS i
+                SET reserved_quantity = i.reserved_quantity - totals.quantity, last_updated = NOW()
+                FROM totals
+                WHERE i.inventory_id = totals.inventory_id
+            )
+            SELECT inventory_id FROM totals
+        """), {
+            "expired": RESERVATION_EXPIRED,
+            "held": RESERVATION_HELD
+        }).scalars().all()
+        db.commit()
+        return list(inventory_ids)
+
+    @staticmethod
+    def compact(db: Session, retention_days: int = COMPACT_RETENTION_DAYS) -> int:
+        """把保留期之前的流水按库存记录合并为一条，返回被合并的流水数（提交事务）
+
+        合并前后每个库存记录的流水合计不变，快照数量不受影响。
+        """
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        count = db.execute(text("""
+            WITH folded AS (
+                DELETE FROM inventory_movements
+                WHERE created_at < :cutoff
+                RETURNING inventory_id, quantity_change
+            ),
+            summary AS (
+                INSERT INTO inventory_movements
+                    (inventory_id, quantity_change, movement_type, reason, reference, created_at)
+                SELECT inventory_id, SUM(quantity_change), :compacted, '历史流水合并', NULL, :cutoff
+                FROM folded GROUP BY inventory_id
+            )
+            SELECT COUNT(*) FROM folded
+        """), {"cutoff": cutoff, "compacted": MOVEMENT_COMPACTED}).scalar()
+        db.commit()
+        return count
+
+    @staticmethod
+    def list_movements(db: Session, inventory_id: int, limit: int = 100,
+                       before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按时间倒序查询流水"""
+        result = db.execute(text("""
+            SELECT movement_id, inventory_id, quantity_change, movement_type, reason, reference, created_at
+            FROM inventory_movements
+            WHERE inventory_id = :inventory_id
+              AND (CAST(:before_id AS BIGINT) IS NULL OR movement_id < :before_id)
+            ORDER BY movement_id DESC
+            LIMIT :limit
+        """), {"inventory_id": inventory_id, "before_id": before_id, "limit": limit})
+        return [dict(row) for row in result.mappings()]
+
+    @staticmethod
+    def resolve_products(db: Session, product_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """一次查询把产品ID映射为各位置的库存记录ID
+
+        Returns:
+            Dict[int, Dict[str, int]]: 产品ID到 {位置: 库存记录ID} 的映射
+        """
+        if not product_ids:
+            return {}
+        result = db.execute(text("""
+            SELECT product_id, location, inventory_id FROM inventory WHERE product_id = ANY(:product_ids)
+        """), {"product_ids": list(product_ids)})
+        locations = {}
+        for product_id, location, inventory_id in result:
+            locations.setdefault(product_id, {})[location] = inventory_id
+        return locations
+
+    @staticmethod
+    def apply_batch(db: Session, entries: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """用一条语句批量调整或设置库存，并写入流水（不提交事务）
+
+        每个条目包含 row_no、inventory_id、delta（增量）或 target（盘点数量）以及 reason，
+        同一批次中 inventory_id 不应重复。结果为负数的条目不会被应用。
+
+        Args:
+            db: 数据库会话
+            entries: 调整条目，数量不超过 BATCH_CHUNK
+
+        Returns:
+            Dict[int, Dict[str, Any]]: row_no 到 {inventory_id, old_quantity, new_quantity} 的映射，
+            库存记录不存在的条目不在其中
+        """
+        if not entries:
+            return {}
+
+        rows = []
+        params = {}
+        for i, entry in enumerate(entries):
+            rows.append(f"(CAST(:n{i} AS INTEGER), CAST(:i{i} AS INTEGER), CAST(:d{i} AS INTEGER), "
+                        f"CAST(:t{i} AS INTEGER), CAST(:r{i} AS VARCHAR))")
+            params.update({
+                f"n{i}": entry["row_no"],
+                f"i{i}": entry["inventory_id"],
+                f"d{i}": entry.get("delta"),
+                f"t{i}": entry.get("target"),
+                f"r{i}": entry.get("reason")
+            })
+        params.update({"adjust": MOVEMENT_ADJUST, "set": MOVEMENT_SET})
+
+        result = db.execute(text(f"""
+            WITH request (row_no, inventory_id, delta, target, reason) AS (
+                VALUES {", ".join(rows)}
+            ),
+            locked AS (
+                SELECT i.inventory_id, i.quantity
+                FROM inventory AS i
+                JOIN request ON request.inventory_id = i.inventory_id
+                ORDER BY i.inventory_id
+                FOR UPDATE OF i
+            ),
+            calc AS (
+                SELECT request.row_no, request.inventory_id, request.reason,
+                       request.target IS NOT NULL AS is_count,
+                       locked.quantity AS old_quantity,
+                       COALESCE(request.target, locked.quantity + COALESCE(request.delta, 0)) AS new_quantity
+                FROM request
+                JOIN locked ON locked.inventory_id = request.inventory_id
+            ),
+            applied AS (
+                UPDATE inventory AS i
+                SET quantity = calc.new_quantity, last_updated = NOW()
+                FROM calc
+                WHERE i.inventory_id = calc.inventory_id
+                  AND calc.new_quantity >= 0
+                  AND calc.new_quantity <> calc.old_quantity
+            ),
+            movements AS (
+                INSERT INTO inventory_movements
+                    (inventory_id, quantity_change, movement_type, reason, reference, created_at)
+                SELECT inventory_id, new_quantity - old_quantity,
+                       CASE WHEN is_count THEN :set ELSE :adjust END, reason, NULL, NOW()
+                FROM calc
+                WHERE new_quantity >= 0 AND new_quantity <> old_quantity
+            )
+            SELECT row_no, inventory_id, old_quantity, new_quantity FROM calc
+        """), params)
+        return {row.row_no: dict(row._mapping) for row in result}
+
+class InventoryMaintenance:
+    """库存后台维护：定期归还过期预占、合并历史流水"""
+
+    def __init__(self, session_factory, expire_interval: float = EXPIRE_INTERVAL,
+                 compact_interval: float = COMPACT_INTERVAL):
+        self.session_factory = session_factory
+        self.expire_interval = expire_interval
+        self.compact_interval = compact_interval
+        self._task = None
+
+    def _run_once(self, compact: bool):
+        db = self.session_factory()
+        try:
+            expired = InventoryLedgerDAO.expire_reservations(db)
+            if expired:
+                logger.info(f"已结束 {len(expired)} 个库存记录的过期预占")
+                on_stock_changed(db, inventory_ids=expired)
+            if compact:
+                folded = InventoryLedgerDAO.compact(db)
+                if folded:
+                    logger.info(f"已合并 {folded} 条历史库存流水")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"库存维护任务失败: {str(e)}")
+        finally:
+            db.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_compact = loop.time()
+        while True:
+            await asyncio.sleep(self.expire_interval)
+            compact = loop.time() - last_compact >= self.compact_interval
+            if compact:
+                last_compact = loop.time()
+            await asyncio.to_thread(self._run_once, compact)
+
+    def start(self):
+        """在当前事件循环中启动后台维护"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台维护"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,9 +1,11 @@
 from sqlalchemy.orm import Session
 from src.models.models import Order, Product, User
 from typing import List, Optional
-from datetime import datetime
 import logging
 
+from src.core.id_generator import new_id
+from src.database.repositories import OrderRepository
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,24 +42,26 @@ class OrderDAO:
                 logger.error(f"产品不存在: product_id={product_id}")
                 raise ValueError(f"产品不存在: {product_id}")
             
-            # 创建订单
-            order = Order(
-                user_id=user_id,
-                product_id=product_id,
-                quantity=quantity,
-                total_amount=total_amount,
-                status="created",
-                created_at=datetime.now()
-            )
-            
-            logger.info("添加订单到数据库会话")
-            db.add(order)
+            # 创建订单头和订单项（统一的 orders/order_items 结构）
+            order_no = new_id("ORD")
+            logger.info(f"写入订单: order_no={order_no}")
+            order_ids = OrderRepository.insert_orders(db, [{
+                "order_no": order_no,
+                "user_id": user_id,
+                "total_amount": total_amount,
+                "status": "created"
+            }])
+            OrderRepository.insert_items(db, [{
+                "order_id": order_ids[order_no],
+                "product_id": product_id,
+                "quantity": quantity,
+                "unit_price": round(total_amount / quantity, 2)
+            }])
             
             logger.info("提交事务")
             db.commit()
             
-            logger.info("刷新订单对象")
-            db.refresh(order)
+            order = db.query(Order).filter(Order.order_id == order_ids[order_no]).first()
             
             logger.info(f"订单创建成功: order_id={order.order_id}")
             return order
@@ -0,0 +1,102 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+CHANGE_AMOUNT = "amount"
+CHANGE_PERCENTAGE = "percentage"
+CHANGE_TYPES = (CHANGE_AMOUNT, CHANGE_PERCENTAGE)
+
+class NegativePriceError(ValueError):
+    """调价后价格为负数"""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.products = products
+        names = ", ".join(product["product_name"] for product in products[:10])
+        super().__init__(f"产品 {names} 的新价格不能为负数")
+
+class PriceDAO:
+    """产品价格数据访问对象"""
+
+    @staticmethod
+    def batch_update(db: Session, change_type: str, price_change: float, batch_id: str,
+                     product_ids: Optional[List[int]] = None, category: Optional[str] = None,
+                     min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        """用一条语句批量调价并写入价格历史（不提交事务）
+
+        目标产品在同一语句中加锁、计算新价格、更新并记录历史，旧价格取自更新前的行，
+        而不是事后反推。任一产品的新价格为负数时不更新任何产品。
+
+        Args:
+            db: 数据库会话
+            change_type: amount（按金额）或 percentage（按百分比）
+            price_change: 调价幅度，正数涨价，负数降价
+            batch_id: 本次调价的批次号，写入价格历史
+            product_ids: 只调整指定产品
+            category: 只调整指定类别
+            min_price: 只调整当前价格不低于该值的产品
+            max_price: 只调整当前价格不高于该值的产品
+
+        Returns:
+            List[Dict[str, Any]]: 每个产品的 product_id、product_name、old_price、new_price
+
+        Raises:
+            NegativePriceError: 有产品的新价格为负数
+        """
+        result = db.execute(text("""
+            WITH targets AS (
+                SELECT product_id, product_name, unit_price AS old_price,
+                       ROUND(CASE WHEN :change_type = 'amount'
+                                  THEN unit_price + :price_change
+                                  ELSE unit_price * (1 + :price_change / 100.0)
+                             END, 2) AS new_price
+                FROM products
+                WHERE (CAST(:product_ids AS INTEGER[]) IS NULL OR product_id = ANY(:product_ids))
+                  AND (CAST(:category AS VARCHAR) IS NULL OR category = :category)
+                  AND (CAST(:min_price AS NUMERIC) IS NULL OR unit_price >= :min_price)
+                  AND (CAST(:max_price AS NUMERIC) IS NULL OR unit_price <= :max_price)
+                ORDER BY product_id
+                FOR UPDATE
+            ),
+            updated AS (
+                UPDATE products AS p
+                SET unit_price = t.new_price
+                FROM targets t
+                WHERE p.product_id = t.product_id
+                  AND NOT EXISTS (SELECT 1 FROM targets WHERE new_price < 0)
+                RETURNING p.product_id
+            ),
+            history AS (
+                INSERT INTO product_price_history
+                    (product_id, old_price, new_price, change_type, price_change, batch_id, changed_at)
+                SELECT t.product_id, t.old_price, t.new_price, :change_type, :price_change, :batch_id, NOW()
+                FROM targets t JOIN updated u ON u.product_id = t.product_id
+            )
+            SELECT product_id, product_name, old_price, new_price FROM targets ORDER BY product_id
+        """), {
+            "change_type": change_type,
+            "price_change": price_change,
+            "batch_id": batch_id,
+            "product_ids": list(product_ids) if product_ids is not None else None,
+            "category": category,
+            "min_price": min_price,
+            "max_price": max_price
+        })
+        rows = [dict(row) for row in result.mappings()]
+        negative = [row for row in rows if row["new_price"] < 0]
+        if negative:
+            raise NegativePriceError(negative)
+        return rows
+
+    @staticmethod
+    def list_history(db: Session, product_id: int, limit: int = 100,
+                     before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按时间倒序查询产品的价格历史"""
+        result = db.execute(text("""
+            SELECT history_id, product_id, old_price, new_price, change_type, price_change, batch_id, changed_at
+            FROM product_price_history
+            WHERE product_id = :product_id
+              AND (CAST(:before_id AS BIGINT) IS NULL OR history_id < :before_id)
+            ORDER BY history_id DESC
+            LIMIT :limit
+        """), {"product_id": product_id, "before_id": before_id, "limit": limit})
+        return [dict(row) for row in result.mappings()]
@@ -0,0 +1,158 @@
+from typing import Any, Callable, Dict, Iterable, Optional
+import json
+import logging
+import threading
+
+from src.core.cache import TTLCache, shared_backend_from_env
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 共享缓存中的条目存活秒数
+PRODUCT_CACHE_TTL = 300
+# 进程内缓存存活秒数；配置了共享缓存时，其他进程的失效最多延迟这么久才在本进程可见
+PRODUCT_LOCAL_TTL = 30
+PRODUCT_LOCAL_MAXSIZE = 10_000
+
+_KEY_PREFIX = "catalog"
+_GENERATION_KEY = f"{_KEY_PREFIX}:gen"
+
+_MISSING = object()
+
+class _NotFound(Exception):
+    """loader 未找到产品，用于跳过缓存写入"""
+
+class ProductCatalogCache:
+    """产品目录读穿透缓存
+
+    两级缓存：进程内 TTLCache（LRU + TTL）在前，可选的共享后端（Redis 或进程内替代）在后，
+    都未命中时才调用 loader 查询数据库。
+
+    失效方式：
+    - 单个产品按 ID 精确删除；
+    - 列表查询的键包含目录代号（generation），任何产品变动都递增代号，旧的列表条目不再被读取，
+      由 TTL 自然淘汰，因此不需要枚举所有查询参数组合。
+    """
+
+    def __init__(self, backend=None, ttl: float = PRODUCT_CACHE_TTL, local_ttl: float = PRODUCT_LOCAL_TTL,
+                 local_maxsize: int = PRODUCT_LOCAL_MAXSIZE):
+        """初始化缓存
+
+        Args:
+            backend: 共享缓存后端，为 None 时只使用进程内缓存
+            ttl: 共享缓存条目存活秒数
+            local_ttl: 进程内缓存条目存活秒数
+            local_maxsize: 进程内缓存最大条目数
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.local = TTLCache(ttl=local_ttl if backend is not None else ttl, maxsize=local_maxsize)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.invalidations = 0
+
+    def _current_generation(self) -> int:
+        if self.backend is None:
+            return self._generation
+        try:
+            value = self.backend.get(_GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"读取共享缓存失败: {str(e)}")
+            return self._generation
+        return int(value) if value is not None else 0
+
+    def _get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        if self.backend is not None:
+            try:
+                cached = self.backend.get(key)
+            except Exception as e:
+                logger.warning(f"读取共享缓存失败: {str(e)}")
+                cached = None
+            with self._lock:
+                if cached is None:
+                    self.shared_misses += 1
+                else:
+                    self.shared_hits += 1
+            if cached is not None:
+                value = json.loads(cached)
+                self.local.set(key, value)
+                return value
+
+        # 同时记录本进程和共享后端的代号：其他进程在加载期间的失效只体现在共享代号上
+        generation = self._generation
+        shared_generation = self._current_generation() if self.backend is not None else None
+        value = loader()
+        if generation != self._generation or (
+                self.backend is not None and shared_generation != self._current_generation()):
+            # 加载期间发生了失效，读到的可能是旧数据，不写入缓存
+            return value
+        self.local.set(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, json.dumps(value, default=str, ensure_ascii=False), self.ttl)
+            except Exception as e:
+                logger.warning(f"写入共享缓存失败: {str(e)}")
+        return value
+
+    def get_product(self, product_id: int, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """按产品ID读取，loader 返回 None（产品不存在）时不缓存"""
+        def load():
+            value = loader()
+            if value is None:
+                raise _NotFound()
+            return value
+
+        try:
+            return self._get_or_load(f"{_KEY_PREFIX}:product:{product_id}", load)
+        except _NotFound:
+            return None
+
+    def get_list(self, params: Dict[str, Any], loader: Callable[[], Any]) -> Any:
+        """按查询参数读取列表，键中包含当前目录代号"""
+        encoded = json.dumps(params, sort_keys=True, default=str)
+        key = f"{_KEY_PREFIX}:list:{self._current_generation()}:{encoded}"
+        return self._get_or_load(key, loader)
+
+    def invalidate_products(self, product_ids: Iterable[int]):
+        """产品或其库存变动后调用：删除这些产品的条目并使所有列表失效"""
+        keys = [f"{_KEY_PREFIX}:product:{product_id}" for product_id in product_ids]
+        for key in keys:
+            self.local.invalidate(key)
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+        if self.backend is not None:
+            try:
+                self.backend.delete(*keys)
+                self.backend.incr(_GENERATION_KEY)
+            except Exception as e:
+                logger.warning(f"共享缓存失效失败: {str(e)}")
+
+    def clear(self):
+        """清空进程内缓存并使共享缓存中的列表失效"""
+        self.local.clear()
+        self.invalidate_products([])
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        local = self.local.stats()
+        with self._lock:
+            shared_total = self.shared_hits + self.shared_misses
+            return {
+                "local": local,
+                "shared": None if self.backend is None else {
+                    "hits": self.shared_hits,
+                    "misses": self.shared_misses,
+                    "hit_rate": self.shared_hits / shared_total if shared_total else 0.0
+                },
+                "invalidations": self.invalidations
+            }
+
+product_catalog_cache = ProductCatalogCache(shared_backend_from_env())
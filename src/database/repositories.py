@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import text, insert, table, column, JSON
+import json
+
+from src.database.inventory_ledger import InventoryLedgerDAO
+
+# 未指定位置时新建库存记录使用的位置（与迁移 2026_10_19_1500 回填旧库存时一致）
+DEFAULT_LOCATION = "MAIN"
+
+# 多行 INSERT 的最大行数，避免超出 PostgreSQL 单条语句 65535 个绑定参数的限制
+BULK_INSERT_CHUNK = 1000
+
+orders_table = table(
+    "orders",
+    column("order_id"), column("order_no"), column("user_id"), column("customer_name"), column("total_amount"),
+    column("status"), column("shipping_address"), column("delivery_date"),
+    column("specifications", JSON), column("created_at"), column("updated_at")
+)
+
+order_items_table = table(
+    "order_items",
+    column("order_item_id"), column("order_id"), column("product_id"), column("quantity"),
+    column("unit_price"), column("specifications", JSON)
+)
+
+def _chunks(rows: List[dict], size: int = BULK_INSERT_CHUNK) -> Iterator[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+# 产品与其各位置库存合计，字段名沿用 /api/products 接口的命名
+PRODUCT_SUMMARY_SQL = """
+    SELECT p.product_id AS id, p.product_name AS name, p.category, p.unit_price AS price,
+           COALESCE((SELECT SUM(i.quantity) FROM inventory i WHERE i.product_id = p.product_id), 0) AS stock,
+           p.status, p.specifications, p.description
+    FROM products p
+"""
+
+class ProductRepository:
+    """产品仓储：products 为唯一的产品表，库存为 inventory 各位置之和"""
+
+    @staticmethod
+    def create(db: Session, name: str, category: Optional[str], price: float, stock: int = 0,
+               status: str = "active", specifications: Optional[dict] = None,
+               description: Optional[str] = None, location: str = DEFAULT_LOCATION) -> Dict[str, Any]:
+        """创建产品及其初始库存记录（不提交事务）"""
+        product_id = db.execute(text("""
+            INSERT INTO products (product_name, description, unit_price, category, status,
+                                  specifications, created_at, updated_at)
+            VALUES (:name, :description, :price, :category, :status, CAST(:specifications AS JSON), NOW(), NOW())
+            RETURNING product_id
+        """), {
+            "name": name,
+            "description": description,
+            "price": price,
+            "category": category,
+            "status": status,
+            "specifications": None if specifications is None else json.dumps(specifications, ensure_ascii=False)
+        }).scalar()
+
+        inventory_id = db.execute(text("""
+            INSERT INTO inventory (product_id, quantity, location, last_updated)
+            VALUES (:product_id, :quantity, :location, NOW())
+            RETURNING inventory_id
+        """), {"product_id": product_id, "quantity": stock, "location": location}).scalar()
+        InventoryLedgerDAO.record_opening(db, inventory_id, stock)
+        return ProductRepository.get(db, product_id)
+
+    @staticmethod
+    def get(db: Session, product_id: int) -> Optional[Dict[str, Any]]:
+        """按ID读取产品及库存合计"""
+        row = db.execute(text(PRODUCT_SUMMARY_SQL + " WHERE p.product_id = :product_id"),
+                         {"product_id": product_id}).mappings().first()
+        return dict(row) if row else None
+
+    @staticmethod
+    def list(db: Session, skip: int = 0, limit: int = 10, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按ID顺序分页列出产品及库存合计"""
+        result = db.execute(text(PRODUCT_SUMMARY_SQL + """
+            WHERE CAST(:category AS VARCHAR) IS NULL OR p.category = :category
+            ORDER BY p.product_id
+            OFFSET :skip LIMIT :limit
+        """), {"category": category, "skip": skip, "limit": limit})
+        return [dict(row) for row in result.mappings()]
+
+class OrderRepository:
+    """订单仓储：orders 为订单头，order_items 为订单项"""
+
+    @staticmethod
+    def insert_orders(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """多行插入订单头（不提交事务）
+
+        Args:
+            db: 数据库会话
+            rows: 订单字段，需包含 order_no
+
+        Returns:
+            Dict[str, int]: 订单号到订单ID的映射
+        """
+        now = datetime.now()
+        order_ids = {}
+        for chunk in _chunks([{"created_at": now, "updated_at": now, **row} for row in rows]):
+            inserted = db.execute(
+                insert(orders_table).values(chunk).returning(orders_table.c.order_id, orders_table.c.order_no)
+            )
+            order_ids.update({order_no: order_id for order_id, order_no in inserted})
+        return order_ids
+
+    @staticmethod
+    def insert_items(db: Session, rows: List[Dict[str, Any]]):
+        """多行插入订单项（不提交事务）"""
+        for chunk in _chunks(rows):
+            db.execute(insert(order_items_table).values(chunk))
@@ -0,0 +1,25 @@
+from typing import Dict, Iterable, List
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+class RolePermissionDAO:
+    """角色权限数据访问对象"""
+
+    @staticmethod
+    def load_all(db: Session) -> Dict[str, List[str]]:
+        """一次查询读取全部角色的权限"""
+        roles: Dict[str, List[str]] = {}
+        rows = db.execute(text("SELECT role, permission FROM role_permissions ORDER BY role, permission"))
+        for role, permission in rows:
+            roles.setdefault(role, []).append(permission)
+        return roles
+
+    @staticmethod
+    def replace_role(db: Session, role: str, permissions: Iterable[str]) -> List[str]:
+        """用给定权限替换角色的全部权限（不提交事务）"""
+        permissions = sorted(set(permissions))
+        db.execute(text("DELETE FROM role_permissions WHERE role = :role"), {"role": role})
+        if permissions:
+            db.execute(text("INSERT INTO role_permissions (role, permission) VALUES (:role, :permission)"),
+                       [{"role": role, "permission": permission} for permission in permissions])
+        return permissions
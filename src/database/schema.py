@@ -0,0 +1,159 @@
+from typing import Any, Dict, Set
+from sqlalchemy import text
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+import logging
+import os
+import time
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 旧版 main.init_db 建的表，迁移 2026_10_19_1500 会把其中的数据回填到统一结构
+LEGACY_TABLES = ["products", "orders", "order_items"]
+
+# 多进程部署时保证同一时刻只有一个进程在执行迁移
+SCHEMA_LOCK_KEY = 7_202_802
+
+def alembic_config() -> Config:
+    """项目根目录下 alembic.ini 对应的配置，与工作目录无关"""
+    config = Config(os.path.join(ROOT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "alembic"))
+    return config
+
+# 迁移 2025_04_22_1917 及之前的版本：products/inventory/orders 仍是迁移 2025_04_19_1207 建立的结构，
+# 被旧版 init_db 删除的表由迁移 2026_10_19_0900 重建
+BASELINE_REVISIONS = {"2025_04_19_1207", "2025_04_19_1208", "3f54b58a01f8", "2025_04_22_1917"}
+
+# 已发布的 3f54b58a01f8 与 2025_04_22_1917 建立同一张 budgets 表
+DUPLICATE_BUDGETS = ("3f54b58a01f8", "2025_04_22_1917")
+
+def budgets_version_hook(script: ScriptDirectory, destination: str):
+    """返回 context.configure(on_version_apply=...) 的回调，让连续执行这两个已发布迁移时不因 budgets 重复而失败
+
+    两个迁移保持原样，回调直接调用它们自己的 upgrade/downgrade：
+    升级时 3f54b58a01f8 执行后、若本次还会执行 2025_04_22_1917，先删掉刚建的空表交给后者重建；
+    降级时 2025_04_22_1917 删表后按 3f54b58a01f8 重建，版本停在 3f54b58a01f8 时表仍存在，继续降级也能正常删除。
+    """
+    first, second = DUPLICATE_BUDGETS
+
+    def reaches_second() -> bool:
+        try:
+            return second in {revision.revision for revision in script.iterate_revisions(destination, first)}
+        except Exception:
+            # 相对版本号等无法解析的目标，按不经过 2025_04_22_1917 处理
+            return False
+
+    def on_version_apply(ctx, step, heads, run_args):
+        if step.is_stamp:
+            return
+        if step.is_upgrade and step.up_revision_id == first and reaches_second():
+            script.get_revision(second).module.downgrade()
+        elif not step.is_upgrade and step.up_revision_id == second:
+            script.get_revision(first).module.upgrade()
+
+    return on_version_apply
+
+def _current_revision(conn):
+    """alembic_version 中记录的版本，表不存在或为空时返回 None"""
+    if not conn.execute(text("SELECT to_regclass('alembic_version') IS NOT NULL")).scalar():
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+def rename_legacy_tables(conn) -> bool:
+    """把旧版 products(id, name, price, stock)/orders/order_items 重命名为 legacy_*
+
+    旧版结构以 products 带 id 和 stock 列识别，与是否存在 alembic_version 无关：
+    按 README 先执行 alembic upgrade head、再由旧版 init_db 建表时，alembic_version 仍停在 2025_04_22_1917，
+    而迁移建立的 products/orders/inventory 已被 init_db 删除或替换。
+
+    重命名后：没有版本记录时 Alembic 从头建立统一结构；版本停在 BASELINE_REVISIONS 中时，
+    由迁移 2026_10_19_0900 按当时的结构重建被删除的表，再继续后续迁移。两种情况都由迁移 2026_10_19_1500 回填旧数据。
+
+    Returns:
+        bool: 是否检测到并重命名了旧版表
+
+    Raises:
+        RuntimeError: 数据库已迁移过统一结构，却又出现旧版表，无法自动处理
+    """
+    legacy = conn.execute(text("""
+        SELECT COUNT(*) = 2 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'products' AND column_name IN ('id', 'stock')
+    """)).scalar()
+    if not legacy:
+        return False
+
+    revision = _current_revision(conn)
+    if revision is not None and revision not in BASELINE_REVISIONS:
+        raise RuntimeError(f"数据库版本 {revision} 已包含统一结构，但 products 仍是旧版结构，需要人工迁移")
+
+    # 旧版启动时建的多仓库存与补货点表引用 products(id)，每次启动都会被清空，不需要保留
+    conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_monthly_sales, mv_category_sales"))
+    conn.execute(text("DROP TABLE IF EXISTS inventory_thresholds, inventory CASCADE"))
+    for table in LEGACY_TABLES:
+        conn.execute(text(f"ALTER TABLE IF EXISTS {table} RENAME TO legacy_{table}"))
+        # 索引名（含主键、唯一约束）在模式内唯一，一并改名以免与新表冲突
+        indexes = conn.execute(text("""
+            SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table
+        """), {"table": f"legacy_{table}"}).scalars().all()
+        for index in indexes:
+            conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "legacy_{index}"'))
+
+    logger.info(f"检测到旧版产品/订单表（数据库版本 {revision or '空'}），已重命名为 legacy_*，升级时回填")
+    return True
+
+def _head_revisions(config: Config) -> Set[str]:
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+def _current_revisions(conn) -> Set[str]:
+    return set(MigrationContext.configure(conn).get_current_heads())
+
+def upgrade_schema(conn, config: Config = None):
+    """在给定连接的事务中迁入旧版表、升级到最新迁移版本"""
+    config = config or alembic_config()
+    # env.py 复用这个连接（旧版表的改名也在 env.py 中执行），迁移与本事务中的其他 DDL 一起提交或回滚
+    config.attributes["connection"] = conn
+    command.upgrade(config, "head")
+
+def ensure_schema(engine) -> Dict[str, Any]:
+    """启动时把数据库结构升级到最新版本，可在多个进程中同时调用
+
+    先不加锁比较数据库版本与迁移脚本的 head，已是最新时直接返回，只需一次查询；
+    否则获取会话级 advisory lock，拿到锁后再次检查（等待期间其他进程可能已完成迁移），
+    仍需升级时在单个事务中执行。
+
+    Returns:
+        Dict[str, Any]: upgraded（是否执行了迁移）、revision、seconds（耗时）
+    """
+    started = time.perf_counter()
+    config = alembic_config()
+    heads = _head_revisions(config)
+
+    with engine.connect() as conn:
+        current = _current_revisions(conn)
+        upgraded = False
+        if current != heads:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            conn.commit()
+            try:
+                current = _current_revisions(conn)
+                conn.commit()
+                if current != heads:
+                    logger.info(f"数据库版本 {sorted(current) or '空'} 落后于 {sorted(heads)}，开始迁移")
+                    with conn.begin():
+                        upgrade_schema(conn, config)
+                    upgraded = True
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+                conn.commit()
+
+    return {
+        "upgraded": upgraded,
+        "revision": ",".join(sorted(heads)),
+        "seconds": time.perf_counter() - started
+    }
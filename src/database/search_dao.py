@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+# 全文检索配置：安装了 zhparser 时按中文分词，否则等同于 simple（见迁移 2026_10_19_1300）
+SEARCH_CONFIG = "erp_search"
+
+# 全文匹配的权重高于名称的模糊匹配
+TEXT_RANK_WEIGHT = 2.0
+
+def like_pattern(keyword: str) -> str:
+    """把关键字转义为 ILIKE 子串模式，避免用户输入的 % 和 _ 被当作通配符"""
+    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+class SearchDAO:
+    """产品与供应商检索
+
+    products.search_vector 是由名称（权重A）和描述（权重B）生成的 tsvector 列，
+    名称列另有 pg_trgm GIN 索引。检索条件是三者的 OR，PostgreSQL 用 BitmapOr 合并各自的索引扫描：
+    全文匹配处理分词后的关键字，word_similarity（<%）处理拼写错误和部分词，
+    ILIKE 子串匹配覆盖未分词的中文名称。结果按全文相关度与名称相似度加权排序。
+    """
+
+    @staticmethod
+    def search_products(db: Session, keyword: str, limit: int = 20,
+                        category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按相关度检索产品
+
+        Args:
+            db: 数据库会话
+            keyword: 检索关键字，支持 websearch 语法（引号短语、-排除词、or）
+            limit: 返回条数
+            category: 只检索指定类别
+
+        Returns:
+            List[Dict[str, Any]]: 产品信息及相关度 score，按 score 降序
+        """
+        result = db.execute(text(f"""
+            WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :keyword) AS tsq)
+            SELECT p.product_id, p.product_name, p.description, p.unit_price, p.category, p.created_at,
+                   ts_rank_cd(p.search_vector, q.tsq) * :text_weight
+                       + word_similarity(:keyword, p.product_name) AS score
+            FROM products p, q
+            WHERE (p.search_vector @@ q.tsq
+                   OR :keyword <% p.product_name
+                   OR p.product_name ILIKE :pattern)
+              AND (CAST(:category AS VARCHAR) IS NULL OR p.category = :category)
+            ORDER BY score DESC, p.product_id
+            LIMIT :limit
+        """), {
+            "keyword": keyword,
+            "pattern": like_pattern(keyword),
+            "category": category,
+            "text_weight": TEXT_RANK_WEIGHT,
+            "limit": limit
+        })
+        return [dict(row) for row in result.mappings()]
+
+    @staticmethod
+    def search_suppliers(db: Session, keyword: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """按名称相似度检索供应商
+
+        Returns:
+            List[Dict[str, Any]]: 供应商信息及相关度 score，按 score 降序
+        """
+        result = db.execute(text("""
+            SELECT supplier_id, supplier_name, contact_person, email, phone, address, created_at,
+                   word_similarity(:keyword, supplier_name) AS score
+            FROM suppliers
+            WHERE :keyword <% supplier_name OR supplier_name ILIKE :pattern
+            ORDER BY score DESC, supplier_id
+            LIMIT :limit
+        """), {"keyword": keyword, "pattern": like_pattern(keyword), "limit": limit})
+        return [dict(row) for row in result.mappings()]
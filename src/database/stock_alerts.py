@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+class StockAlertDAO:
+    """产品补货点（低库存预警阈值）数据访问对象"""
+
+    @staticmethod
+    def set_reorder_point(db: Session, product_id: int, reorder_point: int) -> Dict[str, Any]:
+        """设置产品的补货点（不提交事务）"""
+        row = db.execute(text("""
+            INSERT INTO inventory_thresholds (product_id, reorder_point, updated_at)
+            VALUES (:product_id, :reorder_point, NOW())
+            ON CONFLICT (product_id) DO UPDATE
+            SET reorder_point = EXCLUDED.reorder_point, updated_at = EXCLUDED.updated_at
+            RETURNING product_id, reorder_point, updated_at
+        """), {"product_id": product_id, "reorder_point": reorder_point}).mappings().first()
+        return dict(row)
+
+    @staticmethod
+    def delete_reorder_point(db: Session, product_id: int) -> bool:
+        """删除产品的补货点（不提交事务）"""
+        result = db.execute(text("DELETE FROM inventory_thresholds WHERE product_id = :product_id"),
+                            {"product_id": product_id})
+        return result.rowcount > 0
+
+    @staticmethod
+    def list_reorder_points(db: Session, limit: int = 100,
+                            after_product_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按 product_id 键集分页列出补货点"""
+        result = db.execute(text("""
+            SELECT product_id, reorder_point, updated_at
+            FROM inventory_thresholds
+            WHERE CAST(:after_product_id AS INTEGER) IS NULL OR product_id > :after_product_id
+            ORDER BY product_id
+            LIMIT :limit
+        """), {"after_product_id": after_product_id, "limit": limit})
+        return [dict(row) for row in result.mappings()]
+
+    @staticmethod
+    def load_levels(db: Session, product_ids: Optional[List[int]] = None,
+                    inventory_ids: Optional[List[int]] = None) -> Tuple[List[int], List[int], List[float]]:
+        """一次查询读取受影响产品的现有量（各位置合计）与补货点
+
+        Args:
+            db: 数据库会话
+            product_ids: 变动涉及的产品ID
+            inventory_ids: 变动涉及的库存记录ID，会被映射为产品ID
+
+        Returns:
+            Tuple[List[int], List[int], List[float]]: 产品ID、可用量（现有量减预占）、补货点（未设置为 NaN）三个等长列表
+        """
+        result = db.execute(text("""
+            WITH targets AS (
+                SELECT UNNEST(CAST(:product_ids AS INTEGER[])) AS product_id
+                UNION
+                SELECT product_id FROM inventory WHERE inventory_id = ANY(CAST(:inventory_ids AS INTEGER[]))
+            )
+            SELECT t.product_id,
+                   COALESCE((SELECT SUM(i.quantity - i.reserved_quantity)
+                             FROM inventory i WHERE i.product_id = t.product_id), 0),
+                   r.reorder_point
+            FROM targets t
+            LEFT JOIN inventory_thresholds r ON r.product_id = t.product_id
+        """), {"product_ids": list(product_ids or []), "inventory_ids": list(inventory_ids or [])})
+        ids, quantities, thresholds = [], [], []
+        for product_id, quantity, reorder_point in result:
+            ids.append(product_id)
+            quantities.append(int(quantity))
+            thresholds.append(float("nan") if reorder_point is None else float(reorder_point))
+        return ids, quantities, thresholds
@@ -0,0 +1,113 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Any, Dict, List, Optional
+
+from src.database.inventory_ledger import MOVEMENT_ORDER
+
+class StockDAO:
+    """下单库存扣减数据访问对象
+
+    库存只记录在 inventory（每个产品每个位置一行）中，下单时跨位置扣减并写入库存流水。
+    已预占的数量（reserved_quantity）不可用于下单。
+    """
+
+    @staticmethod
+    def load_products(db: Session, product_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """一次查询加载全部产品及其各位置的库存合计，并按ID顺序对产品加行锁
+
+        固定的加锁顺序使并发下单在多个产品上互相等待而不会死锁。
+
+        Args:
+            db: 数据库会话
+            product_ids: 产品ID列表
+
+        Returns:
+            Dict[int, Dict[str, Any]]: 产品ID到 {product_id, product_name, available（可用量）} 的映射，
+            不存在的产品不在其中
+        """
+        if not product_ids:
+            return {}
+        result = db.execute(text("""
+            WITH locked AS (
+                SELECT product_id, product_name
+                FROM products
+                WHERE product_id = ANY(:product_ids)
+                ORDER BY product_id
+                FOR UPDATE
+            )
+            SELECT l.product_id, l.product_name,
+                   COALESCE((SELECT SUM(i.quantity - i.reserved_quantity)
+                             FROM inventory i WHERE i.product_id = l.product_id), 0) AS available
+            FROM locked l
+        """), {"product_ids": list(product_ids)})
+        return {row["product_id"]: dict(row) for row in result.mappings()}
+
+    @staticmethod
+    def reserve(db: Session, quantities: Dict[int, int], reference: Optional[str] = None) -> List[int]:
+        """用一条语句跨位置扣减多个产品的库存并记录流水
+
+        每个产品按可用量从多到少的顺序依次从各位置扣减；只要有一个产品的各位置合计不足，
+        整条语句不扣减任何库存。库存记录按 inventory_id 顺序加锁。
+
+        Args:
+            db: 数据库会话
+            quantities: 产品ID到扣减数量的映射
+            reference: 关联单据号，写入库存流水
+
+        Returns:
+            List[int]: 库存不足（未能扣减）的产品ID，非空时调用方应回滚事务
+        """
+        if not quantities:
+            return []
+
+        result = db.execute(text("""
+            WITH requested AS (
+                SELECT * FROM UNNEST(CAST(:product_ids AS INTEGER[]), CAST(:quantities AS INTEGER[]))
+                    AS r(product_id, quantity)
+            ),
+            locked AS (
+                SELECT inventory_id, product_id, quantity - reserved_quantity AS quantity
+                FROM inventory
+                WHERE product_id = ANY(:product_ids) AND quantity - reserved_quantity > 0
+                ORDER BY inventory_id
+                FOR UPDATE
+            ),
+            short AS (
+                SELECT r.product_id
+                FROM requested r
+                LEFT JOIN (SELECT product_id, SUM(quantity) AS available FROM locked GROUP BY product_id) t
+                    ON t.product_id = r.product_id
+                WHERE COALESCE(t.available, 0) < r.quantity
+            ),
+            ranked AS (
+                SELECT l.inventory_id, l.quantity, r.quantity AS requested,
+                       SUM(l.quantity) OVER (PARTITION BY l.product_id
+                                             ORDER BY l.quantity DESC, l.inventory_id) - l.quantity AS taken_before
+                FROM locked l JOIN requested r ON r.product_id = l.product_id
+            ),
+            takes AS (
+                SELECT inventory_id, LEAST(quantity, requested - taken_before) AS take
+                FROM ranked
+                WHERE requested > taken_before AND NOT EXISTS (SELECT 1 FROM short)
+            ),
+            applied AS (
+                UPDATE inventory AS i
+                SET quantity = i.quantity - t.take, last_updated = NOW()
+                FROM takes t
+                WHERE i.inventory_id = t.inventory_id
+                RETURNING i.inventory_id, t.take
+            ),
+            movements AS (
+                INSERT INTO inventory_movements
+                    (inventory_id, quantity_change, movement_type, reason, reference, created_at)
+                SELECT inventory_id, -take, :movement_type, '订单扣减', :reference, NOW()
+                FROM applied
+            )
+            SELECT product_id FROM short ORDER BY product_id
+        """), {
+            "product_ids": list(quantities),
+            "quantities": list(quantities.values()),
+            "movement_type": MOVEMENT_ORDER,
+            "reference": reference
+        })
+        return [row[0] for row in result]
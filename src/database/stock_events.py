@@ -0,0 +1,30 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+import logging
+
+from src.core.alerts import stock_alert_hub
+from src.database.product_cache import product_catalog_cache
+from src.database.stock_alerts import StockAlertDAO
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def on_stock_changed(db: Session, product_ids: Optional[List[int]] = None,
+                     inventory_ids: Optional[List[int]] = None):
+    """库存变动提交后调用：使受影响产品的目录缓存失效，并评估低库存预警
+
+    只处理本次变动涉及的产品；失败只记录日志，不影响已提交的库存变动。
+    """
+    if not product_ids and not inventory_ids:
+        return
+    try:
+        ids, quantities, thresholds = StockAlertDAO.load_levels(db, product_ids, inventory_ids)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"读取库存水平失败: {str(e)}")
+        # 无法确定受影响的产品时，使整个目录缓存失效
+        product_catalog_cache.clear()
+        return
+    product_catalog_cache.invalidate_products(ids)
+    stock_alert_hub.evaluate(ids, quantities, thresholds)
@@ -0,0 +1,62 @@
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.core.security import (KDF_WORKERS, TokenService, hash_password, verify_password, verify_password_async)
+
+LOGINS = 64
+VERIFICATIONS = 20_000
+
+async def login_load(hashed: str, service: TokenService, offload: bool):
+    """LOGINS 个并发登录（校验密码 + 签发令牌），同时测量事件循环的最长停顿"""
+    stalls = []
+    running = True
+
+    async def heartbeat():
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - started - 0.001)
+
+    async def login():
+        if offload:
+            ok = await verify_password_async("secret", hashed)
+        else:
+            # 对照：直接在事件循环中计算哈希
+            ok = verify_password("secret", hashed)
+            await asyncio.sleep(0)
+        assert ok
+        return service.issue(1, "bench", "admin")
+
+    monitor = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await monitor
+    return LOGINS / elapsed, max(stalls) * 1000
+
+def bench():
+    hashed = hash_password("secret")
+    service = TokenService("bench-secret")
+    print(f"{LOGINS} 个并发登录，密码哈希线程池 {KDF_WORKERS} 个线程")
+    print(f"{'方式':<16}{'登录/秒':>12}{'事件循环最长停顿(ms)':>24}")
+    for name, offload in (("事件循环内计算", False), ("专用线程池", True)):
+        rate, stall = asyncio.run(login_load(hashed, service, offload))
+        print(f"{name:<16}{rate:>12.1f}{stall:>24.1f}")
+
+    token = service.issue(1, "bench", "admin")
+    uncached = TokenService("bench-secret", cache_size=0)
+    print(f"\n{'令牌校验':<16}{'次/秒':>12}")
+    for name, verifier in (("每次验签", lambda: uncached.verify(token)),
+                           ("LRU 缓存", lambda: service.verify(token))):
+        started = time.perf_counter()
+        for _ in range(VERIFICATIONS):
+            verifier()
+        print(f"{name:<16}{VERIFICATIONS / (time.perf_counter() - started):>12.0f}")
+
+if __name__ == "__main__":
+    bench()
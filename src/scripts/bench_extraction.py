@@ -0,0 +1,69 @@
+import sys
+import os
+import json
+import re
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.core.extraction import extract
+from src.train.order_model_trainer import OrderModelTrainer
+
+def legacy_extract(text: str):
+    """对照：原 determine_request_type + extract_order_info 的逐条内联正则"""
+    if re.search(r'(订购|订单|购买|买|订购)', text) and re.search(r'(\d+)台', text):
+        request_type = "order_processing"
+    elif re.search(r'(查询|检索|显示|查看|看).*?订单', text):
+        request_type = "order_query"
+    elif re.search(r'(生成|创建|制作|出).*?(报表|报告|统计)', text):
+        request_type = "report_generation"
+    elif re.search(r'(分析|评估|比较|预测)', text):
+        request_type = "data_analysis"
+    elif re.search(r'(库存|盘点)', text):
+        request_type = "inventory_management"
+    elif re.search(r'(供应商|供货商)', text):
+        request_type = "supplier_management"
+    else:
+        request_type = "general_inquiry"
+    info = {
+        "customer": re.search(r'客户(\w+)', text),
+        "quantity": re.search(r'(\d+)台', text),
+        "cpu": re.search(r'(Intel\s+i\d+|AMD\s+Ryzen\s+\d+)', text),
+        "memory": re.search(r'(\d+)GB', text),
+        "storage": re.search(r'(\d+)TB', text),
+        "gpu": re.search(r'(NVIDIA\s+RTX\s+\d+|AMD\s+Radeon\s+\w+|RTX\d+)', text),
+        "delivery_date": re.search(r'(\d{4}-\d{2}-\d{2})', text),
+        "address": re.search(r'地址是(.*?)[。\n]', text)
+    }
+    return request_type, {key: match.group(1) if match else None for key, match in info.items()}
+
+def engine_extract(text: str):
+    extraction = extract(text)
+    return extraction.request_type, extraction.order_info()
+
+def load_instructions(samples: int):
+    """用训练数据生成器合成指令（只生成数据，不加载 BERT）"""
+    trainer = OrderModelTrainer.__new__(OrderModelTrainer)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "instructions.json")
+        trainer.generate_training_data(path, num_samples=samples)
+        with open(path, encoding="utf-8") as f:
+            return [row["text"] for row in json.load(f)]
+
+def bench(samples: int = 100_000, rounds: int = 3):
+    texts = load_instructions(samples)
+    print(f"{'实现':<12}{'最佳耗时(s)':>14}{'条/秒':>14}")
+    for name, func in (("逐条正则", legacy_extract), ("单次扫描", engine_extract)):
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for text in texts:
+                func(text)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<12}{best:>14.3f}{samples / best:>14.0f}")
+
+    mismatched = sum(legacy_extract(text)[0] != engine_extract(text)[0] for text in texts)
+    print(f"请求类型不一致: {mismatched} 条")
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import psutil
+from sqlalchemy import text
+from src.config.database import SessionLocal
+from src.models.models import FinancialAccount, Transaction, TransactionType, AccountType
+from src.api.export import _iter_chunks, decimal_columns, iter_csv, iter_parquet, DEFAULT_CHUNK_SIZE
+
+BENCH_ACCOUNT = "BENCH_EXPORT"
+
+def seed_transactions(db, rows: int) -> int:
+    """批量生成交易记录，返回基准测试账户ID"""
+    account = db.query(FinancialAccount).filter(FinancialAccount.account_name == BENCH_ACCOUNT).first()
+    if not account:
+        account = FinancialAccount(account_name=BENCH_ACCOUNT, account_type=AccountType.CASH.value)
+        db.add(account)
+        db.flush()
+
+    existing = db.query(Transaction).filter(Transaction.account_id == account.account_id).count()
+    if existing < rows:
+        db.execute(text("""
+            INSERT INTO transactions (account_id, transaction_type, amount, description, transaction_date, created_at)
+            SELECT :account_id, :transaction_type, (random() * 10000)::numeric(12, 2),
+                   'bench ' || g, NOW() - (g || ' minutes')::interval, NOW()
+            FROM generate_series(1, :rows) AS g
+        """), {
+            "account_id": account.account_id,
+            "transaction_type": TransactionType.INCOME.value,
+            "rows": rows - existing
+        })
+    db.commit()
+    return account.account_id
+
+def bench_export(account_id: int, export_format: str, chunk_size: int):
+    """导出一次并统计耗时、字节数和峰值内存"""
+    columns = ["transaction_id", "account_id", "transaction_type", "amount", "description", "transaction_date"]
+    db = SessionLocal()
+    query = db.query(*[getattr(Transaction, name) for name in columns]) \
+        .filter(Transaction.account_id == account_id) \
+        .order_by(Transaction.transaction_id)
+
+    process = psutil.Process()
+    rss_start = process.memory_info().rss
+    rss_peak = rss_start
+    total_bytes = 0
+
+    chunks = _iter_chunks(query, chunk_size, db)
+    if export_format == "parquet":
+        blocks = iter_parquet(chunks, columns, decimal_columns(query, columns))
+    else:
+        blocks = iter_csv(chunks, columns)
+    start = time.time()
+    for block in blocks:
+        total_bytes += len(block)
+        rss_peak = max(rss_peak, process.memory_info().rss)
+    elapsed = time.time() - start
+
+    print(f"{export_format:8s} 耗时 {elapsed:.2f}s, "
+          f"输出 {total_bytes / 1024 / 1024:.1f} MB, "
+          f"峰值内存增长 {(rss_peak - rss_start) / 1024 / 1024:.1f} MB")
+
+def bench_offset_pages(account_id: int, page_size: int = 100, samples: int = 5):
+    """对比：旧的 offset 分页在末尾页的耗时"""
+    db = SessionLocal()
+    try:
+        total = db.query(Transaction).filter(Transaction.account_id == account_id).count()
+        for skip in [0] + [total * i // samples for i in range(1, samples)]:
+            start = time.time()
+            db.query(Transaction).filter(Transaction.account_id == account_id) \
+                .offset(skip).limit(page_size).all()
+            print(f"offset={skip:<9d} 单页耗时 {(time.time() - start) * 1000:.1f} ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    db = SessionLocal()
+    try:
+        print(f"准备 {rows} 条交易记录...")
+        account_id = seed_transactions(db, rows)
+    finally:
+        db.close()
+
+    bench_export(account_id, "csv", DEFAULT_CHUNK_SIZE)
+    try:
+        import pyarrow  # noqa: F401
+        bench_export(account_id, "parquet", DEFAULT_CHUNK_SIZE)
+    except ImportError:
+        print("未安装 pyarrow，跳过 Parquet 导出")
+    bench_offset_pages(account_id)
@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text
+from src.config.database import SessionLocal
+from src.models.models import Inventory, Product
+from src.database.inventory_ledger import InventoryLedgerDAO, InsufficientStockError
+
+def prepare_hot_sku(initial_quantity: int) -> int:
+    """创建一个热点库存记录，返回 inventory_id"""
+    db = SessionLocal()
+    try:
+        product = db.query(Product).first()
+        if not product:
+            raise RuntimeError("请先运行 create_test_data.py 创建产品")
+        inventory = Inventory(product_id=product.product_id, quantity=initial_quantity, location="BENCH-HOT")
+        db.add(inventory)
+        db.flush()
+        InventoryLedgerDAO.record_opening(db, inventory.inventory_id, initial_quantity)
+        db.commit()
+        return inventory.inventory_id
+    finally:
+        db.close()
+
+def adjust_once(inventory_id: int, change: int) -> bool:
+    db = SessionLocal()
+    try:
+        InventoryLedgerDAO.adjust(db, inventory_id, change, "bench")
+        db.commit()
+        return True
+    except InsufficientStockError:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+def bench(workers: int, adjustments: int, initial_quantity: int = 1000):
+    inventory_id = prepare_hot_sku(initial_quantity)
+    # 一半入库一半出库，数量总和为0
+    changes = [1 if i % 2 else -1 for i in range(adjustments)]
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda change: adjust_once(inventory_id, change), changes))
+    elapsed = time.time() - start
+
+    db = SessionLocal()
+    try:
+        quantity = db.execute(text("SELECT quantity FROM inventory WHERE inventory_id = :id"),
+                              {"id": inventory_id}).scalar()
+        ledger_total = db.execute(text("SELECT SUM(quantity_change) FROM inventory_movements WHERE inventory_id = :id"),
+                                  {"id": inventory_id}).scalar()
+        db.execute(text("DELETE FROM inventory_movements WHERE inventory_id = :id"), {"id": inventory_id})
+        db.execute(text("DELETE FROM inventory WHERE inventory_id = :id"), {"id": inventory_id})
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"{workers:3d} 并发  {adjustments} 次调整  成功 {sum(results)}  "
+          f"{adjustments / elapsed:8.0f} 次/秒  快照 {quantity}  流水合计 {ledger_total}")
+    assert quantity == ledger_total, "快照与流水合计不一致"
+
+if __name__ == "__main__":
+    adjustments = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for workers in (1, 4, 16, 32):
+        bench(workers, adjustments)
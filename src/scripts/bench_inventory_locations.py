@@ -0,0 +1,75 @@
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy import text
+from src.config.database import SessionLocal
+from src.database.inventory_availability import InventoryAvailabilityDAO
+
+def prepare(db, skus: int, locations: int):
+    """在会话级临时表中生成 skus × locations 行库存
+
+    临时表与 inventory 同名且复制了全部索引，会在 search_path 中遮蔽正式表，
+    因此 DAO 中的查询原样运行在基准数据上，不会影响正式数据。
+    """
+    db.execute(text("CREATE TEMP TABLE inventory (LIKE public.inventory INCLUDING ALL)"))
+    start = time.time()
+    db.execute(text("""
+        INSERT INTO inventory (inventory_id, product_id, quantity, location, last_updated)
+        SELECT (p - 1) * :locations + l, p, (random() * 100)::int, 'WH-' || lpad(l::text, 3, '0'), NOW()
+        FROM generate_series(1, :skus) AS p, generate_series(1, :locations) AS l
+    """), {"skus": skus, "locations": locations})
+    db.execute(text("ANALYZE inventory"))
+    print(f"生成 {skus * locations} 行库存用时 {time.time() - start:.1f}s")
+
+def timed(label: str, fn, repeat: int):
+    start = time.time()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.time() - start) / repeat
+    print(f"{label:32s} {elapsed * 1000:8.2f} ms/次")
+
+def bench(skus: int = 100_000, locations: int = 50, repeat: int = 200):
+    db = SessionLocal()
+    try:
+        prepare(db, skus, locations)
+
+        def atp_order():
+            # 典型订单：5个产品
+            InventoryAvailabilityDAO.available_to_promise(db, random.sample(range(1, skus + 1), 5))
+
+        def atp_single_location():
+            InventoryAvailabilityDAO.available_to_promise(
+                db, random.sample(range(1, skus + 1), 5), f"WH-{random.randint(1, locations):03d}"
+            )
+
+        def summary_page():
+            InventoryAvailabilityDAO.on_hand_by_product(db, 100, random.randint(0, skus - 100))
+
+        def location_page():
+            db.execute(text("""
+                SELECT * FROM inventory WHERE location = :location AND inventory_id > :after
+                ORDER BY inventory_id LIMIT 100
+            """), {"location": f"WH-{random.randint(1, locations):03d}",
+                   "after": random.randint(0, skus * locations)}).fetchall()
+
+        timed("ATP（5个产品，全部位置）", atp_order, repeat)
+        timed("ATP（5个产品，单一位置）", atp_single_location, repeat)
+        timed("按产品汇总（100个产品一页）", summary_page, repeat)
+        timed("按位置分页（100行一页）", location_page, repeat)
+
+        plan = db.execute(text("""
+            EXPLAIN SELECT product_id, SUM(quantity) FROM inventory
+            WHERE product_id = ANY(:ids) GROUP BY product_id
+        """), {"ids": [1, 2, 3, 4, 5]}).scalars().all()
+        print("\n".join(plan))
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    locations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    bench(skus, locations)
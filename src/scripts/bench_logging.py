@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi import FastAPI
+import httpx
+
+from src.api.nlp import router as nlp_router
+from src.config.database import get_db
+from src.core import request_logging
+from src.core.request_logging import AsyncLogging, JsonFormatter, RequestIdMiddleware
+
+REQUESTS = 5000
+BODY = {"text": "客户华为订购100台服务器，配置Intel i9、32GB内存、2TB硬盘，2027-07-01前交付，地址是深圳市南山区。"}
+
+def build_app() -> FastAPI:
+    """只挂载 NLP 路由，不启动 lifespan，数据库会话替换为 None（requireAgents=False 时不访问数据库）"""
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+    app.include_router(nlp_router, prefix="/api/nlp")
+    app.dependency_overrides[get_db] = lambda: None
+    return app
+
+async def measure(app: FastAPI, requests: int):
+    """顺序发送请求，返回每个请求的耗时（毫秒）"""
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.post("/api/nlp/process", json=BODY)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200
+    return latencies
+
+def run_mode(name: str, directory: str, app: FastAPI):
+    root = logging.getLogger()
+    previous_handlers, previous_level = list(root.handlers), root.level
+    for handler in previous_handlers:
+        root.removeHandler(handler)
+    pipeline = None
+    sample_rate = request_logging.PAYLOAD_SAMPLE_RATE
+
+    if name == "关闭":
+        root.setLevel(logging.WARNING)
+    elif name == "同步全量":
+        # 对照：请求线程内直接写文件，每个请求都序列化完整载荷
+        root.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(directory, "sync.log"), encoding="utf-8")
+        handler.setFormatter(JsonFormatter())
+        root.addHandler(handler)
+        request_logging.PAYLOAD_SAMPLE_RATE = 1.0
+    else:
+        root.setLevel(logging.INFO)
+        pipeline = AsyncLogging(os.path.join(directory, "async.log"))
+        pipeline.start()
+
+    try:
+        latencies = asyncio.run(measure(app, REQUESTS))
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        for handler in previous_handlers:
+            root.addHandler(handler)
+        root.setLevel(previous_level)
+        request_logging.PAYLOAD_SAMPLE_RATE = sample_rate
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<10}{p50:>12.3f}{p99:>12.3f}{REQUESTS / (sum(latencies) / 1000):>12.0f}")
+
+def bench():
+    app = build_app()
+    print(f"{REQUESTS} 个请求，载荷采样率 {request_logging.PAYLOAD_SAMPLE_RATE}")
+    print(f"{'日志模式':<10}{'p50(ms)':>12}{'p99(ms)':>12}{'req/s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("关闭", "同步全量", "异步采样"):
+            run_mode(name, directory, app)
+
+if __name__ == "__main__":
+    bench()
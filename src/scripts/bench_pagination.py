@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi import Response
+from src.config.database import SessionLocal
+from src.models.models import Transaction
+from src.api.pagination import paginate, NEXT_CURSOR_HEADER
+
+def timed(fn, repeat: int = 5) -> float:
+    """返回多次执行的最短耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_pagination(target_page: int = 1000, page_size: int = 100):
+    """对比第1页与第N页在 offset 分页和游标分页下的延迟"""
+    db = SessionLocal()
+    try:
+        total = db.query(Transaction).count()
+        if total < target_page * page_size:
+            print(f"交易记录只有 {total} 条，请先运行 bench_finance_export.py 生成数据")
+            return
+
+        # 顺着游标走到目标页，记录该页游标
+        cursor = None
+        for _ in range(target_page - 1):
+            response = Response()
+            paginate(db.query(Transaction), Transaction.transaction_id, response, page_size, cursor)
+            cursor = response.headers[NEXT_CURSOR_HEADER]
+
+        def offset_page(page):
+            return lambda: db.query(Transaction).order_by(Transaction.transaction_id) \
+                .offset((page - 1) * page_size).limit(page_size).all()
+
+        def cursor_page(page_cursor):
+            return lambda: paginate(db.query(Transaction), Transaction.transaction_id,
+                                    Response(), page_size, page_cursor)
+
+        print(f"每页 {page_size} 条，共 {total} 条")
+        print(f"offset 分页  第1页: {timed(offset_page(1)):.2f} ms  "
+              f"第{target_page}页: {timed(offset_page(target_page)):.2f} ms")
+        print(f"游标分页     第1页: {timed(cursor_page(None)):.2f} ms  "
+              f"第{target_page}页: {timed(cursor_page(cursor)):.2f} ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    page = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    bench_pagination(page)
@@ -0,0 +1,71 @@
+import sys
+import os
+import asyncio
+import logging
+import statistics
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi import APIRouter, Depends, FastAPI
+import httpx
+
+# 本地压测，未配置 ERP_JWT_SECRET 时使用随机签名密钥
+os.environ.setdefault("ERP_ALLOW_EPHEMERAL_JWT_SECRET", "1")
+
+from src.api import auth
+from src.api.auth import get_current_user, require_access
+from src.core.permissions import PermissionCache
+
+REQUESTS = 5000
+CHECKS = 1_000_000
+
+def build_app() -> FastAPI:
+    """同一个接口分别不带认证、只校验令牌、校验令牌和权限"""
+    app = FastAPI()
+    variants = {
+        "none": [],
+        "token": [Depends(get_current_user)],
+        "permission": [Depends(require_access("product"))],
+    }
+    for name, dependencies in variants.items():
+        router = APIRouter(prefix=f"/{name}", dependencies=dependencies)
+        router.add_api_route("/products", lambda: {"items": []}, methods=["GET"])
+        app.include_router(router)
+    return app
+
+async def measure(app: FastAPI, path: str, headers):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(REQUESTS):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1_000_000)
+            assert response.status_code == 200
+    return statistics.median(latencies)
+
+def bench():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # 角色权限表只在首次请求时加载一次（这里用默认权限代替数据库），之后每个请求只查进程内缓存
+    auth.permission_cache = PermissionCache(lambda: {})
+    headers = {"Authorization": f"Bearer {auth.token_service.issue(1, 'bench', 'sales')}"}
+    app = build_app()
+
+    print(f"{REQUESTS} 个请求的中位耗时")
+    print(f"{'依赖':<12}{'耗时(us)':>12}{'额外开销(us)':>14}")
+    baseline = None
+    for name in ("none", "token", "permission"):
+        median = asyncio.run(measure(app, f"/{name}/products", headers))
+        baseline = median if baseline is None else baseline
+        print(f"{name:<12}{median:>12.1f}{median - baseline:>14.1f}")
+
+    cache = auth.permission_cache
+    started = time.perf_counter()
+    for _ in range(CHECKS):
+        cache.is_stale()
+        cache.allows("sales", "product:read")
+    print(f"\n单次权限检查 {(time.perf_counter() - started) / CHECKS * 1_000_000_000:.0f} ns，"
+          f"权限表加载 {cache.reloads} 次")
+
+if __name__ == "__main__":
+    bench()
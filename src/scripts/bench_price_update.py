@@ -0,0 +1,60 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from decimal import Decimal
+from sqlalchemy import text
+from src.config.database import SessionLocal
+from src.database.price_dao import PriceDAO
+from src.core.id_generator import new_id
+
+def prepare(db, rows: int):
+    """在会话级临时表中生成 rows 个产品及空的价格历史表
+
+    临时表复制了正式表的索引并在 search_path 中遮蔽正式表，DAO 语句原样运行在基准数据上。
+    """
+    db.execute(text("CREATE TEMP TABLE products (LIKE public.products INCLUDING ALL)"))
+    db.execute(text("CREATE TEMP TABLE product_price_history (LIKE public.product_price_history INCLUDING ALL)"))
+    db.execute(text("""
+        INSERT INTO products (product_id, product_name, description, unit_price, category, created_at)
+        SELECT g, 'bench-' || g, NULL, 100 + g % 900, 'cat-' || (g % 4), NOW()
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    db.execute(text("ANALYZE products"))
+
+def loop_update(db, category: str, percentage: float) -> int:
+    """对照：原实现的逐行读取、计算、写回"""
+    products = db.execute(text("SELECT product_id, unit_price FROM products WHERE category = :category"),
+                          {"category": category}).fetchall()
+    for product_id, unit_price in products:
+        new_price = unit_price * (1 + Decimal(str(percentage)) / 100)
+        db.execute(text("UPDATE products SET unit_price = :price WHERE product_id = :id"),
+                   {"price": new_price, "id": product_id})
+    return len(products)
+
+def bench(rows: int = 100_000):
+    db = SessionLocal()
+    try:
+        prepare(db, rows)
+
+        start = time.time()
+        count = loop_update(db, "cat-0", 5)
+        print(f"逐行更新      {count:7d} 个产品  {time.time() - start:6.2f}s")
+
+        start = time.time()
+        updated = PriceDAO.batch_update(db, "percentage", 5, new_id("PRC"), category="cat-1")
+        print(f"集合式更新    {len(updated):7d} 个产品  {time.time() - start:6.2f}s（含价格历史）")
+
+        start = time.time()
+        updated = PriceDAO.batch_update(db, "amount", -10, new_id("PRC"), min_price=500)
+        print(f"按价格区间    {len(updated):7d} 个产品  {time.time() - start:6.2f}s（含价格历史）")
+
+        history = db.execute(text("SELECT COUNT(*) FROM product_price_history")).scalar()
+        print(f"价格历史 {history} 条")
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,64 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy import text
+from src.config.database import SessionLocal
+from src.database.search_dao import SearchDAO
+
+BRANDS = ["联想", "戴尔", "惠普", "华硕", "宏碁", "Lenovo", "Dell", "HP", "ASUS", "Acer"]
+KINDS = ["笔记本电脑", "台式机", "服务器", "显示器", "工作站", "ThinkPad", "Latitude", "ProBook", "ZenBook"]
+SPECS = ["i5", "i7", "i9", "Ryzen", "16GB", "32GB", "512GB", "1TB", "RTX4060", "RTX4090"]
+
+QUERIES = ["联想 笔记本电脑", "ThinkPad i7", "Lenvo", "RTX4090 工作站", "戴尔 显示器", "ZenBok"]
+
+def prepare(db, rows: int):
+    """在会话级临时表中生成 rows 个产品
+
+    临时表复制了 products 的全部索引和生成列，并在 search_path 中遮蔽正式表，
+    DAO 中的检索语句原样运行在基准数据上。
+    """
+    db.execute(text("CREATE TEMP TABLE products (LIKE public.products INCLUDING ALL)"))
+    start = time.time()
+    db.execute(text("""
+        INSERT INTO products (product_id, product_name, description, unit_price, category, created_at)
+        SELECT g,
+               (:brands)[1 + g % 10] || ' ' || (:kinds)[1 + (g / 10) % 9] || ' ' || g,
+               (:specs)[1 + g % 7] || ' ' || (:specs)[1 + (g / 7) % 10] || ' 办公 游戏 设计',
+               1000 + g % 9000,
+               'cat-' || (g % 20),
+               NOW()
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows, "brands": BRANDS, "kinds": KINDS, "specs": SPECS})
+    db.execute(text("ANALYZE products"))
+    print(f"生成 {rows} 个产品用时 {time.time() - start:.1f}s")
+
+def timed(label: str, fn, repeat: int):
+    start = time.time()
+    for _ in range(repeat):
+        fn()
+    print(f"{label:28s} {(time.time() - start) / repeat * 1000:8.2f} ms/次")
+
+def bench(rows: int = 1_000_000, repeat: int = 20):
+    db = SessionLocal()
+    try:
+        prepare(db, rows)
+        for keyword in QUERIES:
+            timed(f"检索 {keyword}", lambda: SearchDAO.search_products(db, keyword), repeat)
+
+        # 对照：原来的 ILIKE 全表扫描
+        db.execute(text("SET LOCAL enable_bitmapscan = off"))
+        timed("ILIKE 全表扫描 ThinkPad", lambda: db.execute(
+            text("SELECT * FROM products WHERE product_name ILIKE '%ThinkPad%' LIMIT 20")
+        ).fetchall(), max(1, repeat // 5))
+        db.execute(text("SET LOCAL enable_bitmapscan = on"))
+
+        top = SearchDAO.search_products(db, "Lenvo ThinkPad", 3)
+        print("相关度最高:", [(row["product_name"], round(row["score"], 3)) for row in top])
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,74 @@
+import sys
+import os
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.responses import FastJSONResponse, GZIP_LEVEL, BROTLI_QUALITY, brotli, orjson
+
+ROWS = 50_000
+ROUNDS = 5
+
+def build_report(rows: int = ROWS):
+    """与 get_income_statement 结构相同的利润表，金额为 Decimal，日期为 datetime"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    transactions = [
+        {
+            "type": rng.choice(["income", "expense"]),
+            "amount": Decimal(rng.randint(100, 10_000_000)) / 100,
+            "description": f"{rng.choice(['销售收入', '采购支出', '运费', '工资'])} #{i}",
+            "date": start + timedelta(minutes=i)
+        }
+        for i in range(rows)
+    ]
+    income = sum(t["amount"] for t in transactions if t["type"] == "income")
+    expenses = sum(t["amount"] for t in transactions if t["type"] == "expense")
+    return {
+        "period_start": start,
+        "period_end": start + timedelta(minutes=rows),
+        "income": income,
+        "expenses": expenses,
+        "profit": income - expenses,
+        "transactions": transactions
+    }
+
+def best_of(func, rounds: int = ROUNDS):
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def bench():
+    report = build_report()
+    print(f"{ROWS} 行利润表，每项取 {ROUNDS} 次中的最好成绩，orjson {'已' if orjson else '未'}安装")
+
+    print(f"{'序列化':<24}{'耗时(ms)':>12}{'字节':>14}")
+    default_time, default_body = best_of(lambda: JSONResponse(jsonable_encoder(report)).body)
+    print(f"{'jsonable_encoder + json':<24}{default_time * 1000:>12.1f}{len(default_body):>14}")
+    fast_time, body = best_of(lambda: FastJSONResponse(report).body)
+    print(f"{'FastJSONResponse':<24}{fast_time * 1000:>12.1f}{len(body):>14}")
+    print(f"加速 {default_time / fast_time:.1f}x")
+
+    print(f"\n{'压缩':<24}{'耗时(ms)':>12}{'字节':>14}{'压缩率':>10}")
+    codecs = [
+        (f"gzip level {GZIP_LEVEL}", lambda: zlib.compress(body, GZIP_LEVEL)),
+        ("gzip level 9", lambda: zlib.compress(body, 9)),
+    ]
+    if brotli is not None:
+        codecs.append((f"brotli quality {BROTLI_QUALITY}", lambda: brotli.compress(body, quality=BROTLI_QUALITY)))
+    for name, compress in codecs:
+        elapsed, compressed = best_of(compress)
+        print(f"{name:<24}{elapsed * 1000:>12.1f}{len(compressed):>14}{len(body) / len(compressed):>9.1f}x")
+
+if __name__ == "__main__":
+    bench()
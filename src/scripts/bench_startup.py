@@ -0,0 +1,45 @@
+import sys
+import os
+import json
+import subprocess
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+# 在全新解释器中导入应用并走完 lifespan 启动阶段，输出 app.state.startup
+WORKER_CODE = """
+import asyncio, json
+from src.api.main import app
+
+async def main():
+    async with app.router.lifespan_context(app):
+        print(json.dumps(app.state.startup))
+
+asyncio.run(main())
+"""
+
+def start_worker() -> dict:
+    """启动一个 worker 进程，返回其启动耗时（含解释器启动的总耗时记为 wall_seconds）"""
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", WORKER_CODE], cwd=ROOT_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["wall_seconds"] = time.perf_counter() - started
+    return result
+
+def bench(workers: int = 8, rounds: int = 3):
+    print(f"{'轮次':<6}{'并发worker':>12}{'迁移次数':>10}{'冷启动中位(s)':>16}{'数据库检查中位(s)':>20}{'墙钟最大(s)':>14}")
+    for round_no in range(1, rounds + 1):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda _: start_worker(), range(workers)))
+        upgraded = sum(result["schema_upgraded"] for result in results)
+        print(f"{round_no:<6}{workers:>12}{upgraded:>10}"
+              f"{statistics.median(r['cold_start_seconds'] for r in results):>16.3f}"
+              f"{statistics.median(r['schema_seconds'] for r in results):>20.3f}"
+              f"{max(r['wall_seconds'] for r in results):>14.3f}")
+    # 期望：数据库落后时第 1 轮恰好 1 个 worker 执行迁移，其余等待锁后跳过；之后各轮迁移次数为 0
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,89 @@
+import sys
+import os
+import asyncio
+import signal
+import subprocess
+import time
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
+
+from typing import Tuple
+import httpx
+
+PORT = 18001
+BASE_URL = f"http://127.0.0.1:{PORT}"
+CONCURRENCY = 64
+DURATION = 10
+
+# 每个端点：方法、路径、请求体
+ENDPOINTS = {
+    "nlp": ("POST", "/api/nlp/process", {"text": "客户华为订购100台服务器，下个月15号前交付"}),
+    "products": ("GET", "/api/products/products/?limit=20", None),
+}
+
+def start_server(workers: int) -> subprocess.Popen:
+    """启动多进程服务并等待健康检查通过"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.api.server", "--host", "127.0.0.1", "--port", str(PORT), "--workers", str(workers)],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{BASE_URL}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{workers} 个 worker 的服务在 60 秒内未就绪")
+
+def stop_server(process: subprocess.Popen) -> float:
+    """发送 SIGTERM 并返回优雅停止耗时"""
+    started = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=60)
+    return time.perf_counter() - started
+
+async def load(method: str, path: str, body) -> Tuple[float, int]:
+    """CONCURRENCY 个并发客户端持续请求 DURATION 秒，返回每秒请求数和错误数"""
+    completed = 0
+    errors = 0
+    deadline = time.perf_counter() + DURATION
+
+    async def client(session: httpx.AsyncClient):
+        nonlocal completed, errors
+        while time.perf_counter() < deadline:
+            try:
+                response = await session.request(method, path, json=body)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            completed += 1
+
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=30) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+    return completed / elapsed, errors
+
+def bench(worker_counts=None):
+    cpus = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, cpus})
+    print(f"并发客户端 {CONCURRENCY}，每项 {DURATION} 秒")
+    print(f"{'workers':>8}" + "".join(f"{name + ' req/s':>18}{'错误':>8}" for name in ENDPOINTS) + f"{'停止耗时(s)':>14}")
+    for workers in worker_counts:
+        process = start_server(workers)
+        row = f"{workers:>8}"
+        try:
+            for method, path, body in ENDPOINTS.values():
+                rps, errors = asyncio.run(load(method, path, body))
+                row += f"{rps:>18.0f}{errors:>8}"
+        finally:
+            shutdown = stop_server(process)
+        print(row + f"{shutdown:>14.2f}")
+
+if __name__ == "__main__":
+    bench()
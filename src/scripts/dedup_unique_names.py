@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy import text
+from src.config.database import engine
+
+# 迁移 2026_10_19_1800 要加唯一索引的列：表、列、主键、列长度
+UNIQUE_COLUMNS = [
+    ("users", "username", "user_id", 50),
+    ("users", "email", "user_id", 100),
+    ("products", "product_name", "product_id", 100),
+]
+
+def find_duplicates(conn, table: str, column: str, key: str) -> list:
+    """重复值中除ID最小的一行以外的其余行"""
+    return conn.execute(text(f"""
+        SELECT t.{key}, t.{column} FROM {table} AS t
+        WHERE EXISTS (SELECT 1 FROM {table} AS o WHERE o.{column} = t.{column} AND o.{key} < t.{key})
+        ORDER BY t.{column}, t.{key}
+    """)).all()
+
+def renamed(column: str, value: str, row_id: int, length: int) -> str:
+    """追加ID后缀的新值；邮箱在 @ 前追加 +ID，仍是合法地址"""
+    if column == "email" and "@" in value:
+        local, _, domain = value.rpartition("@")
+        suffix = f"+{row_id}"
+        return f"{local[:max(1, length - len(domain) - 1 - len(suffix))]}{suffix}@{domain}"
+    suffix = f"#{row_id}"
+    return value[:length - len(suffix)] + suffix
+
+def dedup_unique_names(apply: bool = False):
+    """列出并处理用户名、邮箱、产品名的重复值，使迁移 2026_10_19_1800 能创建唯一索引
+
+    每组重复值保留ID最小的一行，其余行改名。默认只预览，加 --apply 才在一个事务中执行。
+    改名会改变用户的登录用户名或邮箱，执行前应确认并通知受影响的用户。
+    """
+    changes = 0
+    with engine.begin() as conn:
+        for table, column, key, length in UNIQUE_COLUMNS:
+            for row_id, value in find_duplicates(conn, table, column, key):
+                new_value = renamed(column, value, row_id, length)
+                print(f"{table}.{column} ({key}={row_id}): {value!r} -> {new_value!r}")
+                if apply:
+                    conn.execute(text(f"UPDATE {table} SET {column} = :value WHERE {key} = :id"),
+                                 {"value": new_value, "id": row_id})
+                changes += 1
+
+    if changes == 0:
+        print("没有重复值")
+    elif apply:
+        print(f"已改名 {changes} 行，请通知受影响的用户，然后重新执行迁移")
+    else:
+        print(f"共 {changes} 行需要改名（预览，未修改数据）；确认后加 --apply 执行")
+
+if __name__ == "__main__":
+    dedup_unique_names(apply="--apply" in sys.argv[1:])
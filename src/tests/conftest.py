@@ -0,0 +1,4 @@
+import os
+
+# 测试进程内签发并校验令牌，不需要固定的 ERP_JWT_SECRET
+os.environ.setdefault("ERP_ALLOW_EPHEMERAL_JWT_SECRET", "1")
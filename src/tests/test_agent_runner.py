@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import asyncio
+import threading
+import time
+
+from src.agents.base_agent import AgentResponse
+from src.agents.planning_agent import PlanningAgent
+from src.core.orchestrator import AgentRunner
+
+class SlowAgent(PlanningAgent):
+    """同步耗时的 agent，记录同时在执行的请求数与所用线程、事件循环"""
+
+    def __init__(self, agent_type: str):
+        super().__init__(agent_type=agent_type)
+        self.active = 0
+        self.max_active = 0
+        self.loops = set()
+        self.threads = set()
+
+    async def _process(self, parameters):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.loops.add(id(asyncio.get_running_loop()))
+        self.threads.add(threading.get_ident())
+        time.sleep(0.05)
+        self.active -= 1
+        return AgentResponse(status="success", data=parameters)
+
+def test_same_agent_runs_serially_and_agents_run_concurrently():
+    first, second = SlowAgent("first"), SlowAgent("second")
+    runners = [AgentRunner(first), AgentRunner(second)]
+
+    async def main():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(runner.process({"n": n}) for n in range(4) for runner in runners))
+        return results, time.perf_counter() - started
+
+    try:
+        results, elapsed = asyncio.run(main())
+    finally:
+        for runner in runners:
+            runner.close()
+
+    assert [result.data["n"] for result in results] == [0, 0, 1, 1, 2, 2, 3, 3]
+    # 同一 agent 不会被并发调用，始终复用同一个线程和事件循环
+    for agent in (first, second):
+        assert agent.max_active == 1
+        assert len(agent.loops) == 1 and len(agent.threads) == 1
+        assert agent.metrics["total_requests"] == 4
+    # 两个 agent 各串行执行 4 次，彼此重叠
+    assert elapsed < 8 * 0.05
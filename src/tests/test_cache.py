@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import time
+from src.core.cache import TTLCache
+
+def test_get_or_set_loads_once():
+    cache = TTLCache(ttl=60)
+    calls = []
+    loader = lambda: calls.append(1) or "value"
+    assert cache.get_or_set("key", loader) == "value"
+    assert cache.get_or_set("key", loader) == "value"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+def test_entries_expire():
+    cache = TTLCache(ttl=0.01)
+    cache.set("key", "value")
+    time.sleep(0.02)
+    assert cache.get("key") is None
+
+def test_lru_eviction():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_invalidate_and_clear():
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.get("b") is None
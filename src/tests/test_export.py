@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, Column, DateTime, Integer, Numeric
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from src.api.export import _iter_chunks, decimal_columns, iter_csv, iter_parquet
+
+Base = declarative_base()
+
+class Entry(Base):
+    __tablename__ = "entries"
+    entry_id = Column(Integer, primary_key=True)
+    amount = Column(Numeric(15, 2))
+    created_at = Column(DateTime)
+
+COLUMNS = ["entry_id", "amount", "created_at"]
+ROWS = 7
+
+def amount(i: int) -> Decimal:
+    # 超过 float 有效位数的金额，转成 float 会丢失末位
+    return Decimal("9999999999999.99") - i
+
+def created_at(i: int) -> datetime:
+    return datetime(2026, 10, 19, 12, 0, 0, 123456 + i)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Entry(entry_id=i, amount=amount(i), created_at=created_at(i)) for i in range(ROWS)])
+    session.commit()
+    yield session
+    session.close()
+
+def query(db):
+    return db.query(*[getattr(Entry, name) for name in COLUMNS]).order_by(Entry.entry_id)
+
+@pytest.mark.parametrize("chunk_size, sizes", [(1, [1] * 7), (3, [3, 3, 1]), (7, [7]), (100, [7])])
+def test_chunk_boundaries(db, chunk_size, sizes):
+    chunks = list(_iter_chunks(query(db), chunk_size))
+    assert [len(chunk) for chunk in chunks] == sizes
+    assert [row[0] for chunk in chunks for row in chunk] == list(range(ROWS))
+
+def test_csv_round_trip(db):
+    text = "".join(iter_csv(_iter_chunks(query(db), 3), COLUMNS))
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == COLUMNS
+    assert [(int(r[0]), Decimal(r[1]), datetime.fromisoformat(r[2])) for r in rows[1:]] == \
+        [(i, amount(i), created_at(i)) for i in range(ROWS)]
+
+def test_parquet_round_trip_keeps_decimal_precision(db):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    q = query(db)
+    decimals = decimal_columns(q, COLUMNS)
+    assert decimals == {"amount": (15, 2)}
+
+    data = b"".join(iter_parquet(_iter_chunks(q, 3), COLUMNS, decimals))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    # 每个行块写为一个 row group
+    assert parquet.metadata.num_row_groups == 3
+
+    table = parquet.read()
+    assert table.schema.field("amount").type == pa.decimal128(15, 2)
+    assert table.to_pylist() == [
+        {"entry_id": i, "amount": amount(i), "created_at": created_at(i)} for i in range(ROWS)
+    ]
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import random
+import re
+
+from src.core.extraction import extract, extract_order_info
+
+def legacy_request_type(text: str) -> str:
+    """原 determine_request_type 的逐条正则实现，作为对照"""
+    if re.search(r'(订购|订单|购买|买|订购)', text) and re.search(r'(\d+)台', text):
+        return "order_processing"
+    elif re.search(r'(查询|检索|显示|查看|看).*?订单', text):
+        return "order_query"
+    elif re.search(r'(生成|创建|制作|出).*?(报表|报告|统计)', text):
+        return "report_generation"
+    elif re.search(r'(分析|评估|比较|预测)', text):
+        return "data_analysis"
+    elif re.search(r'(库存|盘点)', text):
+        return "inventory_management"
+    elif re.search(r'(供应商|供货商)', text):
+        return "supplier_management"
+    return "general_inquiry"
+
+def legacy_order_info(text: str) -> dict:
+    """原 extract_order_info 的逐条正则实现，作为对照"""
+    def first(pattern):
+        match = re.search(pattern, text)
+        return match.group(1) if match else None
+
+    quantity = first(r'(\d+)台')
+    address = first(r'地址是(.*?)[。\n]')
+    return {
+        "customer": first(r'客户(\w+)'),
+        "quantity": int(quantity) if quantity else 0,
+        "specs": {
+            "cpu": first(r'(Intel\s+i\d+|AMD\s+Ryzen\s+\d+)'),
+            "memory": first(r'(\d+)GB'),
+            "storage": first(r'(\d+)TB'),
+            "gpu": first(r'(NVIDIA\s+RTX\s+\d+|AMD\s+Radeon\s+\w+|RTX\d+)')
+        },
+        "delivery_date": first(r'(\d{4}-\d{2}-\d{2})'),
+        "address": address.strip() if address is not None else None
+    }
+
+FRAGMENTS = [
+    "客户华为", "订购", "订单", "购买", "买", "查看", "查询", "看", "生成", "出", "报表", "统计", "分析", "预测",
+    "库存", "盘点", "供应商", "100台", "3 台", "32GB", "2TB", "Intel i9", "AMD Ryzen 9", "AMD Radeon RX7900",
+    "NVIDIA RTX 4090", "RTX4080", "2024-07-01", "地址是上海市浦东新区 ", "。", "\n", "，", "服务器", "请",
+]
+
+def test_order_info_matches_legacy_regexes():
+    text = "客户华为订购100台服务器，配置Intel i9、32GB内存、2TB硬盘、NVIDIA RTX 4090，2024-07-01前交付，地址是深圳市南山区。"
+    assert extract_order_info(text) == legacy_order_info(text)
+    assert extract_order_info(text)["quantity"] == 100
+    assert extract(text).request_type == "order_processing"
+
+def test_request_type_respects_order_and_lines():
+    assert extract("帮我查看上个月的订单").request_type == "order_query"
+    assert extract("订单\n查看").request_type == "general_inquiry"
+    assert extract("查看\n订单").request_type == "general_inquiry"
+    assert extract("请生成本月销售报表").request_type == "report_generation"
+    assert extract("盘点一下仓库").request_type == "inventory_management"
+    assert extract("").request_type == "general_inquiry"
+
+def test_quantity_requires_unit_right_after_number():
+    # 与原 (\d+)台 一致：数字与“台”之间有空白不算数量
+    assert extract_order_info("订购100台")["quantity"] == 100
+    assert extract_order_info("订购3 台")["quantity"] == 0
+    assert extract("订购3 台").request_type == "general_inquiry"
+    assert extract_order_info("订购3 台，另加5台")["quantity"] == 5
+
+def test_random_texts_match_legacy_regexes():
+    rng = random.Random(42)
+    for _ in range(2000):
+        text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        assert extract(text).request_type == legacy_request_type(text), text
+        assert extract_order_info(text) == legacy_order_info(text), text
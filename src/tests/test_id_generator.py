@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.id_generator import (
+    IdGenerator, new_id, ENCODED_LENGTH, MAX_SEQUENCE, NODE_BITS, SEQUENCE_BITS
+)
+
+PROCESSES = 4
+IDS_PER_PROCESS = 500_000
+
+def _generate(count: int):
+    # 子进程使用 fork 后重置过的默认生成器
+    from src.core.id_generator import id_generator
+    return [id_generator.next_int() for _ in range(count)]
+
+def test_ids_are_sortable_and_prefixed():
+    ids = [new_id("ORD") for _ in range(10_000)]
+    assert all(i.startswith("ORD") and len(i) == 3 + ENCODED_LENGTH for i in ids)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+def test_no_collisions_across_threads():
+    generator = IdGenerator(node_id=1)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        chunks = list(pool.map(lambda _: [generator.next_int() for _ in range(50_000)], range(8)))
+    ids = [i for chunk in chunks for i in chunk]
+    assert len(set(ids)) == len(ids)
+
+def test_no_collisions_across_processes():
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(PROCESSES) as pool:
+        chunks = pool.map(_generate, [IDS_PER_PROCESS] * PROCESSES)
+    ids = [i for chunk in chunks for i in chunk]
+    assert len(ids) == PROCESSES * IDS_PER_PROCESS
+    assert len(set(ids)) == len(ids)
+    # 每个进程内部严格递增
+    for chunk in chunks:
+        assert all(a < b for a, b in zip(chunk, chunk[1:]))
+
+def test_sequence_overflow_waits_for_next_millisecond(monkeypatch):
+    import src.core.id_generator as module
+    # 时钟在前 70000 次调用内停在同一毫秒，之后前进1毫秒
+    calls = {"n": 0}
+    def fake_time():
+        calls["n"] += 1
+        return 1_800_000_000.0 if calls["n"] <= 70_000 else 1_800_000_000.001
+    monkeypatch.setattr(module.time, "time", fake_time)
+
+    generator = IdGenerator(node_id=7)
+    ids = [generator.next_int() for _ in range(MAX_SEQUENCE + 2)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    # 第 MAX_SEQUENCE+2 个ID落在下一毫秒
+    assert ids[-1] >> (NODE_BITS + SEQUENCE_BITS) == (ids[0] >> (NODE_BITS + SEQUENCE_BITS)) + 1
+
+def test_clock_rollback_keeps_ids_increasing(monkeypatch):
+    import src.core.id_generator as module
+    times = iter([1_800_000_000.005, 1_800_000_000.001, 1_800_000_000.002, 1_800_000_000.006])
+    monkeypatch.setattr(module.time, "time", lambda: next(times))
+
+    generator = IdGenerator(node_id=3)
+    ids = [generator.next_int() for _ in range(4)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 4
+
+def _report_node_id(queue):
+    from src.core.id_generator import id_generator
+    queue.put(id_generator.node_id)
+
+def test_forked_workers_get_distinct_nodes_with_explicit_node_id(monkeypatch):
+    import src.core.id_generator as module
+    monkeypatch.setenv("ERP_NODE_ID", "5")
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=_report_node_id, args=(queue,)) for _ in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    nodes = {queue.get(timeout=10) for _ in workers}
+    for worker in workers:
+        worker.join()
+    # 每个 worker 的节点ID不同，且高位都是 ERP_NODE_ID 指定的主机编号
+    assert len(nodes) == PROCESSES
+    assert {node >> module.PID_BITS for node in nodes} == {5}
+
+def test_explicit_node_id_is_range_checked(monkeypatch):
+    import pytest
+    import src.core.id_generator as module
+    monkeypatch.setenv("ERP_NODE_ID", str(module.MAX_HOST + 1))
+    with pytest.raises(ValueError):
+        module.default_node_id()
@@ -0,0 +1,137 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from src.core.cache import LocalBackend
+from src.core.idempotency import (IdempotencyMiddleware, IdempotencyStore, IDEMPOTENCY_HEADER, REPLAYED_HEADER,
+                                  TRUNCATED_HEADER)
+
+class Adjustment(BaseModel):
+    quantity_change: int
+
+def build_app(store: IdempotencyStore):
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=store, max_response_bytes=1024)
+    app.state.applied = []
+
+    @app.post("/inventory/{inventory_id}/adjust")
+    async def adjust(inventory_id: int, adjustment: Adjustment):
+        await asyncio.sleep(0.05)
+        app.state.applied.append(adjustment.quantity_change)
+        if adjustment.quantity_change == 0:
+            raise HTTPException(status_code=500, detail="临时故障")
+        return {"inventory_id": inventory_id, "applied": len(app.state.applied)}
+
+    @app.post("/large")
+    async def large():
+        app.state.applied.append("large")
+        return {"data": "x" * 2048}
+
+    return app
+
+@pytest.fixture(params=["local", "shared"])
+def app(request):
+    return build_app(IdempotencyStore(LocalBackend() if request.param == "shared" else None))
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test",
+                             headers={"Authorization": "Bearer tester"})
+
+def test_retry_replays_first_response(app):
+    async def run():
+        async with client(app) as session:
+            headers = {IDEMPOTENCY_HEADER: "k1"}
+            first = await session.post("/inventory/1/adjust", json={"quantity_change": 5}, headers=headers)
+            second = await session.post("/inventory/1/adjust", json={"quantity_change": 5}, headers=headers)
+            other = await session.post("/inventory/1/adjust", json={"quantity_change": 7}, headers=headers)
+            plain = await session.post("/inventory/1/adjust", json={"quantity_change": 5})
+            return first, second, other, plain
+
+    first, second, other, plain = asyncio.run(run())
+    assert first.json() == second.json() == {"inventory_id": 1, "applied": 1}
+    assert REPLAYED_HEADER not in first.headers
+    assert second.headers[REPLAYED_HEADER] == "true"
+    assert other.status_code == 422
+    assert plain.json()["applied"] == 2
+    assert app.state.applied == [5, 5]
+
+def test_key_is_scoped_to_caller(app):
+    async def run():
+        async with client(app) as session:
+            responses = []
+            for authorization in ("Bearer alice", "Bearer bob", "", "Bearer alice"):
+                headers = {IDEMPOTENCY_HEADER: "shared", "Authorization": authorization}
+                responses.append(await session.post("/inventory/5/adjust", json={"quantity_change": 2},
+                                                    headers=headers))
+            return responses
+
+    alice, bob, anonymous, alice_retry = asyncio.run(run())
+    # 其他调用方用相同的键和请求体不会拿到 alice 的响应；未携带凭据的请求不能使用幂等键
+    assert [response.json()["applied"] for response in (alice, bob)] == [1, 2]
+    assert all(REPLAYED_HEADER not in response.headers for response in (alice, bob))
+    assert anonymous.status_code == 400
+    assert alice_retry.headers[REPLAYED_HEADER] == "true"
+    assert alice_retry.json() == alice.json()
+    assert app.state.applied == [2, 2]
+
+def test_concurrent_duplicates_execute_once(app):
+    async def run():
+        async with client(app) as session:
+            return await asyncio.gather(*(
+                session.post("/inventory/2/adjust", json={"quantity_change": 3}, headers={IDEMPOTENCY_HEADER: "k2"})
+                for _ in range(10)
+            ))
+
+    responses = asyncio.run(run())
+    assert app.state.applied == [3]
+    assert {response.json()["applied"] for response in responses} == {1}
+    assert sum(response.headers.get(REPLAYED_HEADER) == "true" for response in responses) == 9
+
+def test_server_errors_and_large_responses(app):
+    async def run():
+        async with client(app) as session:
+            headers = {IDEMPOTENCY_HEADER: "k3"}
+            failed = [await session.post("/inventory/3/adjust", json={"quantity_change": 0}, headers=headers)
+                      for _ in range(2)]
+            large = [await session.post("/large", headers=headers) for _ in range(2)]
+            return failed, large
+
+    failed, large = asyncio.run(run())
+    # 5xx 不保存，重试会重新执行
+    assert [response.status_code for response in failed] == [500, 500]
+    assert app.state.applied.count(0) == 2
+    # 响应过大只保存状态码和响应头：重试不会重新执行，重放原状态码并标明响应体被截断
+    assert [response.status_code for response in large] == [200, 200]
+    assert len(large[0].json()["data"]) == 2048
+    assert large[1].headers[REPLAYED_HEADER] == large[1].headers[TRUNCATED_HEADER] == "true"
+    assert large[1].headers["content-type"] == "application/json"
+    assert large[1].content == b""
+    assert app.state.applied.count("large") == 1
+
+def test_workers_sharing_backend_execute_once():
+    # 两个应用实例共享同一后端，模拟两个 worker 同时收到同一请求
+    backend = LocalBackend()
+    workers = [build_app(IdempotencyStore(backend)) for _ in range(2)]
+
+    async def run():
+        sessions = [client(worker) for worker in workers]
+        try:
+            return await asyncio.gather(*(
+                sessions[index % 2].post("/inventory/4/adjust", json={"quantity_change": 1},
+                                         headers={IDEMPOTENCY_HEADER: "k4"})
+                for index in range(6)
+            ))
+        finally:
+            for session in sessions:
+                await session.aclose()
+
+    responses = asyncio.run(run())
+    assert sum(len(worker.state.applied) for worker in workers) == 1
+    assert all(response.status_code == 200 for response in responses)
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from src.config.database import SessionLocal, engine
+from src.database.inventory_ledger import InventoryLedgerDAO, InsufficientStockError
+
+NAME = "库存流水测试产品"
+
+def cleanup(db):
+    targets = "SELECT inventory_id FROM inventory WHERE product_id IN (SELECT product_id FROM products WHERE product_name = :name)"
+    db.execute(text(f"DELETE FROM inventory_reservations WHERE inventory_id IN ({targets})"), {"name": NAME})
+    db.execute(text(f"DELETE FROM inventory_movements WHERE inventory_id IN ({targets})"), {"name": NAME})
+    db.execute(text(f"DELETE FROM inventory WHERE inventory_id IN ({targets})"), {"name": NAME})
+    db.execute(text("DELETE FROM products WHERE product_name = :name"), {"name": NAME})
+    db.commit()
+
+@pytest.fixture
+def db():
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(text("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'inventory' AND column_name = 'reserved_quantity'
+            """)).first() is not None
+    except Exception as e:
+        pytest.skip(f"数据库不可用: {str(e)}")
+    if not exists:
+        pytest.skip("预占数量迁移未执行")
+
+    session = SessionLocal()
+    cleanup(session)
+    yield session
+    session.rollback()
+    cleanup(session)
+    session.close()
+
+@pytest.fixture
+def inventory_id(db):
+    product_id = db.execute(text("""
+        INSERT INTO products (product_name, category, unit_price) VALUES (:name, 'test', 1) RETURNING product_id
+    """), {"name": NAME}).scalar()
+    inventory_id = db.execute(text("""
+        INSERT INTO inventory (product_id, quantity, location, last_updated)
+        VALUES (:product_id, 10, 'TEST', NOW()) RETURNING inventory_id
+    """), {"product_id": product_id}).scalar()
+    InventoryLedgerDAO.record_opening(db, inventory_id, 10)
+    db.commit()
+    return inventory_id
+
+def state(db, inventory_id):
+    """(现有量, 预占量, 流水合计)"""
+    return tuple(db.execute(text("""
+        SELECT quantity, reserved_quantity,
+               (SELECT SUM(quantity_change) FROM inventory_movements m WHERE m.inventory_id = i.inventory_id)
+        FROM inventory i WHERE inventory_id = :inventory_id
+    """), {"inventory_id": inventory_id}).first())
+
+def test_reservations_hold_without_touching_on_hand(db, inventory_id):
+    kept = InventoryLedgerDAO.reserve(db, inventory_id, 4, 60)
+    released = InventoryLedgerDAO.reserve(db, inventory_id, 5, 60)
+    assert state(db, inventory_id) == (10, 9, 10)
+
+    # 可用量只剩 1
+    with pytest.raises(InsufficientStockError):
+        InventoryLedgerDAO.reserve(db, inventory_id, 2, 60)
+
+    InventoryLedgerDAO.release(db, released["reservation_id"])
+    assert state(db, inventory_id) == (10, 4, 10)
+
+    # 确认时才扣减现有量并写流水，现有量始终等于流水合计
+    InventoryLedgerDAO.consume(db, kept["reservation_id"])
+    assert state(db, inventory_id) == (6, 0, 6)
+    assert InventoryLedgerDAO.consume(db, kept["reservation_id"]) is None
+    db.commit()
+
+def test_expired_reservations_restore_availability(db, inventory_id):
+    reservation = InventoryLedgerDAO.reserve(db, inventory_id, 3, 60)
+    db.execute(text("UPDATE inventory_reservations SET expires_at = NOW() - INTERVAL '1 second' "
+                    "WHERE reservation_id = :id"), {"id": reservation["reservation_id"]})
+    db.commit()
+
+    assert inventory_id in InventoryLedgerDAO.expire_reservations(db)
+    assert state(db, inventory_id) == (10, 0, 10)
+
+def test_history_blocks_inventory_delete(db, inventory_id):
+    assert InventoryLedgerDAO.has_history(db, inventory_id)
+    with pytest.raises(IntegrityError):
+        db.execute(text("DELETE FROM inventory WHERE inventory_id = :id"), {"id": inventory_id})
+        db.flush()
+    db.rollback()
+    assert state(db, inventory_id) == (10, 0, 10)
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from src.api.orders import OrderCreate, _validate_order
+from src.config.database import SessionLocal, engine
+from src.database.repositories import ProductRepository
+from src.database.stock_dao import StockDAO
+
+INITIAL_STOCK = 100
+ORDERS = 400
+WORKERS = 16
+
+@pytest.fixture
+def product():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"数据库不可用: {str(e)}")
+
+    # 库存分布在两个位置，下单时需要跨位置扣减
+    db = SessionLocal()
+    product_id = ProductRepository.create(db, "并发测试产品", "test", 1.0, INITIAL_STOCK - 30)["id"]
+    db.execute(text("""
+        INSERT INTO inventory (product_id, quantity, location, last_updated)
+        VALUES (:product_id, 30, 'TEST-B', NOW())
+    """), {"product_id": product_id})
+    db.commit()
+    db.close()
+    yield product_id
+
+    db = SessionLocal()
+    # 流水不随库存记录级联删除，先清理测试产生的流水
+    db.execute(text("""
+        DELETE FROM inventory_movements
+        WHERE inventory_id IN (SELECT inventory_id FROM inventory WHERE product_id = :product_id)
+    """), {"product_id": product_id})
+    db.execute(text("DELETE FROM inventory WHERE product_id = :product_id"), {"product_id": product_id})
+    db.execute(text("DELETE FROM products WHERE product_id = :product_id"), {"product_id": product_id})
+    db.commit()
+    db.close()
+
+def order_payload(quantity: int) -> dict:
+    return {"customer_name": "test", "shipping_address": "test", "delivery_date": "2026-10-20T00:00:00",
+            "items": [{"product_id": 1, "quantity": quantity, "unit_price": 1.0, "specifications": {}}]}
+
+@pytest.mark.parametrize("quantity", [0, -1])
+def test_non_positive_quantity_is_rejected(quantity):
+    # 单个下单由请求模型校验（422），批量导入逐单拒绝
+    with pytest.raises(ValidationError):
+        OrderCreate(**order_payload(quantity))
+    with pytest.raises(ValueError):
+        _validate_order(order_payload(quantity))
+
+def place_order(product_id: int, quantity: int) -> bool:
+    """与 create_order 相同的扣减流程：加载并锁定产品、跨位置扣减、不足则回滚"""
+    db = SessionLocal()
+    try:
+        StockDAO.load_products(db, [product_id])
+        if StockDAO.reserve(db, {product_id: quantity}, "TEST"):
+            db.rollback()
+            return False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def test_concurrent_orders_never_oversell(product):
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(lambda _: place_order(product, 1), range(ORDERS)))
+    elapsed = time.time() - start
+
+    db = SessionLocal()
+    locations = db.execute(text("SELECT quantity FROM inventory WHERE product_id = :product_id"),
+                           {"product_id": product}).scalars().all()
+    ordered = db.execute(text("""
+        SELECT -SUM(m.quantity_change) FROM inventory_movements m
+        JOIN inventory i ON i.inventory_id = m.inventory_id
+        WHERE i.product_id = :product_id AND m.movement_type = 'order'
+    """), {"product_id": product}).scalar()
+    db.close()
+
+    succeeded = sum(results)
+    stock = sum(locations)
+    print(f"\n{ORDERS} 个并发订单, 成功 {succeeded}, 剩余库存 {stock}, "
+          f"{ORDERS / elapsed:.0f} orders/s")
+    assert all(quantity >= 0 for quantity in locations)
+    assert succeeded == INITIAL_STOCK
+    assert stock == INITIAL_STOCK - succeeded
+    assert ordered == succeeded
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import pytest
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from src.api.pagination import paginate, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+
+Base = declarative_base()
+
+class Item(Base):
+    __tablename__ = "items"
+    item_id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    # 故意乱序插入，验证分页按主键排序
+    session.add_all([Item(item_id=i, name=f"item{i}") for i in (5, 1, 4, 2, 3, 7, 6)])
+    session.commit()
+    yield session
+    session.close()
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("item_id", 42)
+    assert decode_cursor(cursor, "item_id") == 42
+
+def test_cursor_rejects_other_key_and_garbage():
+    cursor = encode_cursor("user_id", 42)
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, "item_id")
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", "item_id")
+
+def test_walk_all_pages(db):
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        response = Response()
+        rows = paginate(db.query(Item), Item.item_id, response, 3, cursor)
+        seen.extend(row.item_id for row in rows)
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert seen == [1, 2, 3, 4, 5, 6, 7]
+    assert pages == 3
+
+def test_exact_last_page_has_no_cursor(db):
+    response = Response()
+    rows = paginate(db.query(Item), Item.item_id, response, 7)
+    assert len(rows) == 7
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+def test_skip_still_supported(db):
+    response = Response()
+    rows = paginate(db.query(Item), Item.item_id, response, 2, skip=4)
+    assert [row.item_id for row in rows] == [5, 6]
+
+def test_zero_limit_returns_empty_page(db):
+    response = Response()
+    assert paginate(db.query(Item), Item.item_id, response, 0) == []
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+def test_cursor_value_is_typed():
+    assert decode_cursor(encode_cursor("item_id", 42), "item_id", int) == 42
+    stamp = datetime(2026, 10, 19, 12, 30)
+    assert decode_cursor(encode_cursor("created_at", stamp), "created_at", datetime) == stamp
+    for value in ("42; DROP TABLE items", True, [1], {"a": 1}, 4.2):
+        with pytest.raises(HTTPException) as info:
+            decode_cursor(encode_cursor("item_id", value), "item_id", int)
+        assert info.value.status_code == 400
+
+def test_paginate_rejects_mistyped_cursor(db):
+    with pytest.raises(HTTPException) as info:
+        paginate(db.query(Item), Item.item_id, Response(), 3, encode_cursor("item_id", "3"))
+    assert info.value.status_code == 400
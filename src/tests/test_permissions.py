@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import auth
+from src.api.auth import require_access
+from src.core.cache import LocalBackend
+from src.core.permissions import DEFAULT_ROLE_PERMISSIONS, PermissionCache
+from src.core.security import TokenService
+
+def test_wildcards_and_defaults():
+    cache = PermissionCache(lambda: {})
+    cache.refresh()
+    assert cache.roles() == sorted(DEFAULT_ROLE_PERMISSIONS)
+    assert cache.allows("admin", "finance:write")
+    assert cache.allows("manager", "inventory:write")
+    assert cache.allows("manager", "user:read") and not cache.allows("manager", "user:write")
+    assert cache.allows("sales", "product:read") and not cache.allows("sales", "product:write")
+    assert not cache.allows("unknown", "product:read")
+
+def test_versioned_invalidation_across_processes():
+    table = {"sales": ["product:read"]}
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return dict(table)
+
+    backend = LocalBackend()
+    writer, reader = PermissionCache(loader, backend), PermissionCache(loader, backend, check_interval=0)
+    for cache in (writer, reader):
+        cache.refresh()
+    assert len(loads) == 2
+
+    # 版本号未变：reader 只比较版本号，不重新加载
+    reader.refresh()
+    assert len(loads) == 2 and not writer.is_stale()
+
+    table["sales"] = ["product:read", "product:write"]
+    writer.invalidate()
+    assert writer.is_stale()
+    for cache in (writer, reader):
+        cache.refresh()
+        assert cache.allows("sales", "product:write")
+    assert len(loads) == 4
+
+def test_loader_failure_keeps_cached_permissions():
+    state = {"fail": False}
+
+    def loader():
+        if state["fail"]:
+            raise RuntimeError("database unavailable")
+        return {"sales": ["product:read"]}
+
+    cache = PermissionCache(loader, check_interval=0)
+    cache.refresh()
+    state["fail"] = True
+    cache.refresh()
+    assert cache.roles() == ["sales"]
+    assert cache.allows("sales", "product:read")
+
+def test_require_access_maps_methods_to_actions(monkeypatch):
+    tokens = TokenService("test-secret")
+    monkeypatch.setattr(auth, "token_service", tokens)
+    monkeypatch.setattr(auth, "permission_cache", PermissionCache(lambda: {}))
+
+    router = APIRouter(prefix="/products", dependencies=[Depends(require_access("product"))])
+
+    @router.get("")
+    async def list_products():
+        return []
+
+    @router.post("")
+    async def create_product():
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    def headers(role):
+        return {"Authorization": f"Bearer {tokens.issue(1, role, role)}"}
+
+    assert client.get("/products").status_code == 401
+    assert client.get("/products", headers=headers("sales")).status_code == 200
+    assert client.post("/products", headers=headers("sales")).status_code == 403
+    assert client.post("/products", headers=headers("manager")).status_code == 200
@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from decimal import Decimal
+
+import pytest
+
+from src.core.cache import LocalBackend
+from src.database.product_cache import ProductCatalogCache
+
+@pytest.fixture(params=["local-only", "shared"])
+def cache(request):
+    return ProductCatalogCache(LocalBackend() if request.param == "shared" else None)
+
+def test_product_is_loaded_once_and_misses_are_not_cached(cache):
+    calls = []
+    def load():
+        calls.append(1)
+        return {"product_id": 1, "unit_price": Decimal("9.90")}
+    assert cache.get_product(1, load)["product_id"] == 1
+    assert cache.get_product(1, load)["product_id"] == 1
+    assert len(calls) == 1
+
+    assert cache.get_product(2, lambda: None) is None
+    assert cache.get_product(2, lambda: {"product_id": 2}) == {"product_id": 2}
+
+def test_invalidation_is_precise_for_products_and_covers_lists(cache):
+    cache.get_product(1, lambda: {"name": "a"})
+    cache.get_product(2, lambda: {"name": "b"})
+    cache.get_list({"category": "pc"}, lambda: {"items": [1, 2]})
+
+    cache.invalidate_products([1])
+
+    assert cache.get_product(1, lambda: {"name": "a2"}) == {"name": "a2"}
+    assert cache.get_product(2, lambda: {"name": "b2"}) == {"name": "b"}
+    assert cache.get_list({"category": "pc"}, lambda: {"items": [1]}) == {"items": [1]}
+
+def test_shared_backend_serves_other_processes():
+    backend = LocalBackend()
+    first = ProductCatalogCache(backend)
+    second = ProductCatalogCache(backend)
+    first.get_product(1, lambda: {"unit_price": Decimal("9.90")})
+
+    # 另一个进程从共享后端读取，值经过 JSON 序列化
+    assert second.get_product(1, lambda: pytest.fail("不应查询数据库")) == {"unit_price": "9.90"}
+    assert second.stats()["shared"]["hits"] == 1
+
+    # 一个进程使列表失效后，另一个进程的列表键随共享代号变化
+    second.get_list({"page": 1}, lambda: ["old"])
+    first.invalidate_products([1])
+    assert second.get_list({"page": 1}, lambda: ["new"]) == ["new"]
+
+def test_stale_load_is_not_cached():
+    cache = ProductCatalogCache()
+    def load():
+        # 加载期间产品被修改
+        cache.invalidate_products([1])
+        return {"name": "old"}
+    assert cache.get_product(1, load) == {"name": "old"}
+    assert cache.get_product(1, lambda: {"name": "new"}) == {"name": "new"}
+
+def test_stale_load_is_not_cached_when_another_process_invalidates():
+    backend = LocalBackend()
+    loader_process = ProductCatalogCache(backend)
+    writer_process = ProductCatalogCache(backend)
+    def load():
+        # 加载期间另一个进程修改了产品
+        writer_process.invalidate_products([1])
+        return {"name": "old"}
+    assert loader_process.get_product(1, load) == {"name": "old"}
+    assert writer_process.get_product(1, lambda: {"name": "new"}) == {"name": "new"}
+    assert loader_process.get_product(1, lambda: {"name": "new"}) == {"name": "new"}
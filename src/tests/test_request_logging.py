@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.request_logging import AsyncLogging, RequestIdMiddleware, REQUEST_ID_HEADER, request_id_var
+
+logger = logging.getLogger("test_request_logging")
+
+def read_entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_async_logging_writes_structured_lines(tmp_path):
+    path = str(tmp_path / "api.log")
+    pipeline = AsyncLogging(path)
+    logger.setLevel(logging.INFO)
+    pipeline.start()
+    try:
+        token = request_id_var.set("req_1")
+        logger.info("处理成功: %s", "order_processing", extra={"elapsed_ms": 1.5, "payload": {"quantity": 100}})
+        request_id_var.reset(token)
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            logger.exception("处理失败")
+    finally:
+        pipeline.stop()
+
+    entries = read_entries(path)
+    assert entries[0]["message"] == "处理成功: order_processing"
+    assert entries[0]["request_id"] == "req_1"
+    assert entries[0]["payload"] == {"quantity": 100}
+    assert entries[0]["elapsed_ms"] == 1.5
+    assert entries[1]["request_id"] is None
+    assert "ValueError: bad" in entries[1]["exception"]
+    # 停止后恢复原有处理器
+    assert not any(type(handler).__name__ == "_DroppingQueueHandler" for handler in logging.getLogger().handlers)
+
+def test_request_id_middleware_propagates_header():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"request_id": request_id_var.get()}
+
+    client = TestClient(app)
+    response = client.get("/ping", headers={REQUEST_ID_HEADER: "abc"})
+    assert response.json() == {"request_id": "abc"}
+    assert response.headers[REQUEST_ID_HEADER] == "abc"
+
+    response = client.get("/ping")
+    assert response.json()["request_id"].startswith("req_")
+    assert response.headers[REQUEST_ID_HEADER] == response.json()["request_id"]
+    assert request_id_var.get() is None
@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.api.responses import CompressionMiddleware, FastJSONResponse, _accepts, dumps
+
+class TransactionType(Enum):
+    INCOME = "income"
+
+def report(rows: int):
+    return {
+        "period_start": datetime(2024, 1, 1),
+        "income": Decimal("1234.50"),
+        "count": Decimal("3"),
+        "transactions": [
+            {"type": TransactionType.INCOME, "amount": Decimal(f"{i}.25"), "description": f"交易{i}",
+             "date": datetime(2024, 1, 1, 12, 30, 15, 123456), "day": date(2024, 1, 2), "tags": {"a"}}
+            for i in range(rows)
+        ]
+    }
+
+def test_fast_json_matches_jsonable_encoder():
+    content = report(3)
+    assert json.loads(dumps(content)) == jsonable_encoder(content)
+    assert json.loads(FastJSONResponse(content).body) == jsonable_encoder(content)
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/report", response_class=FastJSONResponse)
+    async def get_report(rows: int = 100):
+        return FastJSONResponse(report(rows))
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(50):
+                yield f"{i},交易{i}\n" * 10
+        return StreamingResponse(lines(), media_type="text/csv")
+
+    @app.get("/events")
+    async def events():
+        async def lines():
+            yield "data: 1\n\n" * 100
+        return StreamingResponse(lines(), media_type="text/event-stream")
+
+    return app
+
+def test_compression_threshold_and_negotiation():
+    client = TestClient(build_app())
+
+    def raw(path, encoding):
+        # 响应体由 httpx 自动解压，头部保留传输时的编码和长度
+        return client.get(path, headers={"Accept-Encoding": encoding})
+
+    large = raw("/report", "gzip")
+    assert large.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in large.headers["vary"]
+    assert large.json() == jsonable_encoder(report(100))
+    assert int(large.headers["content-length"]) < len(dumps(report(100))) / 5
+
+    small = raw("/report?rows=0", "gzip")
+    assert "content-encoding" not in small.headers
+    assert small.json() == jsonable_encoder(report(0))
+
+    assert "content-encoding" not in raw("/report", "identity").headers
+    assert "content-encoding" not in raw("/report", "gzip;q=0").headers
+    assert "content-encoding" not in raw("/report", "gzip;q=abc").headers
+    assert raw("/report", "*").headers["content-encoding"] in ("br", "gzip")
+    assert "content-encoding" not in raw("/events", "gzip").headers
+
+def test_accept_encoding_parsing():
+    assert _accepts("gzip, deflate", "gzip")
+    assert _accepts("GZIP ; q=0.5", "gzip")
+    assert not _accepts("gzip;q=0", "gzip")
+    assert not _accepts("deflate", "gzip")
+    # q 值格式错误按不接受处理，而不是抛出异常
+    assert not _accepts("gzip;q=abc", "gzip")
+    assert _accepts("gzip;q=abc, br", "br")
+    # * 只对未明确列出的编码生效
+    assert _accepts("*", "gzip")
+    assert not _accepts("*;q=0", "gzip")
+    assert not _accepts("gzip;q=0, *", "gzip")
+    assert _accepts("br;q=0, *", "gzip")
+
+def test_streaming_responses_are_compressed_incrementally():
+    client = TestClient(build_app())
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        body = b"".join(response.iter_raw())
+    assert gzip.decompress(body).decode() == "".join(f"{i},交易{i}\n" * 10 for i in range(50))
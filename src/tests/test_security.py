@@ -0,0 +1,105 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.auth import CurrentUser, get_current_user
+from src.core import security
+from src.core.security import (InvalidTokenError, TokenService, hash_password, hash_password_async, needs_rehash,
+                               verify_password, verify_password_async)
+
+@pytest.fixture(autouse=True)
+def fast_kdf(monkeypatch):
+    # 测试中降低 scrypt 成本
+    monkeypatch.setattr(security, "SCRYPT_N", 2 ** 10)
+
+def test_hash_is_salted_and_verifiable():
+    first, second = hash_password("secret"), hash_password("secret")
+    assert first != second
+    assert first.startswith("scrypt$1024$8$1$")
+    assert verify_password("secret", first) and verify_password("secret", second)
+    assert not verify_password("wrong", first)
+    assert not needs_rehash(first)
+    assert not verify_password("secret", "scrypt$1024$8$1$broken")
+
+def test_legacy_sha256_hashes_verify_and_need_rehash():
+    legacy = hashlib.sha256(b"admin123").hexdigest()
+    assert verify_password("admin123", legacy)
+    assert not verify_password("admin124", legacy)
+    assert needs_rehash(legacy)
+
+def test_async_kdf_does_not_block_event_loop(monkeypatch):
+    monkeypatch.setattr(security, "SCRYPT_N", 2 ** 14)
+
+    async def run():
+        hashed = await hash_password_async("secret")
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(heartbeat())
+        results = await asyncio.gather(*(verify_password_async("secret", hashed) for _ in range(4)),
+                                       verify_password_async("secret", None))
+        task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+    assert results == [True] * 4 + [False]
+    # 哈希在线程池中计算，期间事件循环仍在调度其他协程
+    assert ticks > 10
+
+def test_tokens_are_verified_and_cached():
+    service = TokenService("test-secret", ttl=60)
+    token = service.issue(7, "alice", "sales")
+    claims = service.verify(token)
+    assert (claims["sub"], claims["username"], claims["role"]) == ("7", "alice", "sales")
+    assert service.verify(token) is claims
+    assert service.cache.stats()["hits"] == 1
+
+    with pytest.raises(InvalidTokenError):
+        service.verify(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+    with pytest.raises(InvalidTokenError):
+        TokenService("other-secret").verify(token)
+    with pytest.raises(InvalidTokenError):
+        service.verify(TokenService("test-secret", ttl=-1).issue(7, "alice", "sales"))
+
+def test_jwt_secret_is_required_unless_explicitly_allowed(monkeypatch):
+    monkeypatch.delenv("ERP_JWT_SECRET", raising=False)
+    monkeypatch.delenv("ERP_ALLOW_EPHEMERAL_JWT_SECRET", raising=False)
+    with pytest.raises(RuntimeError):
+        security._jwt_secret()
+
+    monkeypatch.setenv("ERP_ALLOW_EPHEMERAL_JWT_SECRET", "1")
+    assert security._jwt_secret() != security._jwt_secret()
+
+    monkeypatch.setenv("ERP_JWT_SECRET", "configured")
+    assert security._jwt_secret() == "configured"
+
+def test_current_user_dependency(monkeypatch):
+    service = TokenService("test-secret", ttl=60)
+    monkeypatch.setattr("src.api.auth.token_service", service)
+    app = FastAPI()
+
+    @app.get("/me", response_model=CurrentUser)
+    async def me(current_user: CurrentUser = Depends(get_current_user)):
+        return current_user
+
+    client = TestClient(app)
+    token = service.issue(7, "alice", "sales")
+    assert client.get("/me", headers={"Authorization": f"Bearer {token}"}).json() == {
+        "user_id": 7, "username": "alice", "role": "sales"
+    }
+    assert client.get("/me").status_code == 401
+    response = client.get("/me", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import asyncio
+import threading
+
+import numpy as np
+
+from src.core.alerts import AlertHub, below_threshold, ALERT_LOW_STOCK, ALERT_RECOVERED
+from src.core.cache import LocalBackend
+
+NAN = float("nan")
+
+def test_below_threshold_is_vectorized_and_ignores_unset():
+    quantities = np.array([5, 50, 0, 10])
+    thresholds = np.array([10, 20, NAN, 10])
+    assert below_threshold(quantities, thresholds).tolist() == [0]
+
+def test_alerts_are_deduplicated_until_recovered():
+    hub = AlertHub()
+    events = hub.evaluate([1, 2], [5, 50], [10, 10])
+    assert [(e["type"], e["product_id"]) for e in events] == [(ALERT_LOW_STOCK, 1)]
+
+    # 持续低库存不重复通知，但当前预警中的数量会更新
+    assert hub.evaluate([1], [3], [10]) == []
+    assert hub.active()[0]["quantity"] == 3
+
+    events = hub.evaluate([1], [12], [10])
+    assert [(e["type"], e["product_id"]) for e in events] == [(ALERT_RECOVERED, 1)]
+    assert hub.active() == []
+
+    # 恢复后再次低于补货点会重新通知
+    assert len(hub.evaluate([1], [1], [10])) == 1
+
+def test_removing_threshold_recovers_alert():
+    hub = AlertHub()
+    hub.evaluate([7], [0], [5])
+    events = hub.evaluate([7], [0], [NAN])
+    assert events[0]["type"] == ALERT_RECOVERED
+    assert events[0]["reorder_point"] is None
+
+def test_subscriber_receives_snapshot_and_events_from_other_threads():
+    hub = AlertHub()
+    hub.evaluate([1], [0], [10])
+
+    async def consume():
+        received = []
+        stream = hub.subscribe(heartbeat=0.05)
+        received.append(await stream.__anext__())
+        # 库存变动通常在工作线程中提交
+        threading.Thread(target=hub.evaluate, args=([2, 1], [1, 20], [10, 10])).start()
+        while len(received) < 3:
+            event = await stream.__anext__()
+            if event is not None:
+                received.append(event)
+        await stream.aclose()
+        return received
+
+    received = asyncio.run(consume())
+    assert [(e["type"], e["product_id"]) for e in received] == [
+        (ALERT_LOW_STOCK, 1), (ALERT_LOW_STOCK, 2), (ALERT_RECOVERED, 1)
+    ]
+    assert hub.subscriber_count == 0
+
+def test_alerts_fan_out_across_workers_through_shared_backend():
+    # 两个 hub 共享同一个后端，模拟两个 worker
+    backend = LocalBackend()
+    first, second = AlertHub(backend=backend), AlertHub(backend=backend)
+    for hub in (first, second):
+        hub.start()
+
+    first.evaluate([1, 2], [5, 50], [10, NAN])
+    assert [(a["product_id"], a["quantity"]) for a in second.active()] == [(1, 5)]
+
+    # 另一个 worker 中的恢复同样对所有 worker 生效
+    second.evaluate([1], [20], [10])
+    assert first.active() == [] and second.active() == []
+
+    first.stop()
+    first.evaluate([3], [0], [5])
+    assert [a["product_id"] for a in first.active()] == [3]
+    assert second.active() == []
+    second.stop()
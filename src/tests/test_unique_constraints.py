@@ -0,0 +1,138 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from src.api.errors import unique_violations_as_400
+from src.config.database import SessionLocal, engine
+from src.database.constraints import UQ_PRODUCTS_PRODUCT_NAME, violated_unique_constraint
+from src.database.repositories import ProductRepository
+
+NAME = "唯一性测试产品"
+ATTEMPTS = 32
+WORKERS = 16
+ROUNDS = 50
+
+def integrity_error(**orig):
+    return IntegrityError("INSERT", {}, SimpleNamespace(**orig))
+
+def test_violated_unique_constraint_reads_driver_diagnostics():
+    diag = SimpleNamespace(constraint_name=UQ_PRODUCTS_PRODUCT_NAME)
+    # psycopg 使用 sqlstate，psycopg2 使用 pgcode
+    assert violated_unique_constraint(integrity_error(sqlstate="23505", diag=diag)) == UQ_PRODUCTS_PRODUCT_NAME
+    assert violated_unique_constraint(integrity_error(pgcode="23505", diag=diag)) == UQ_PRODUCTS_PRODUCT_NAME
+    # 外键、非空等其他完整性错误不视为重复
+    assert violated_unique_constraint(integrity_error(sqlstate="23503", diag=diag)) is None
+
+def test_unique_violations_as_400_rolls_back_and_maps_message():
+    class Session:
+        rolled_back = 0
+
+        def rollback(self):
+            self.rolled_back += 1
+
+    db = Session()
+    messages = {UQ_PRODUCTS_PRODUCT_NAME: "产品名称已存在"}
+    diag = SimpleNamespace(constraint_name=UQ_PRODUCTS_PRODUCT_NAME)
+    with pytest.raises(HTTPException) as info:
+        with unique_violations_as_400(db, messages):
+            raise integrity_error(sqlstate="23505", diag=diag)
+    assert (info.value.status_code, info.value.detail) == (400, "产品名称已存在")
+
+    # 未登记的约束仍然作为 IntegrityError 抛出
+    with pytest.raises(IntegrityError):
+        with unique_violations_as_400(db, messages):
+            raise integrity_error(sqlstate="23503", diag=diag)
+    assert db.rolled_back == 2
+
+def cleanup(db):
+    db.execute(text("""
+        DELETE FROM inventory_movements WHERE inventory_id IN (
+            SELECT inventory_id FROM inventory WHERE product_id IN (
+                SELECT product_id FROM products WHERE product_name LIKE :prefix))
+    """), {"prefix": f"{NAME}%"})
+    db.execute(text("""
+        DELETE FROM inventory WHERE product_id IN (SELECT product_id FROM products WHERE product_name LIKE :prefix)
+    """), {"prefix": f"{NAME}%"})
+    db.execute(text("DELETE FROM products WHERE product_name LIKE :prefix"), {"prefix": f"{NAME}%"})
+    db.commit()
+
+@pytest.fixture
+def database():
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"),
+                                  {"name": UQ_PRODUCTS_PRODUCT_NAME}).scalar()
+    except Exception as e:
+        pytest.skip(f"数据库不可用: {str(e)}")
+    if not exists:
+        pytest.skip("唯一索引迁移未执行")
+
+    db = SessionLocal()
+    cleanup(db)
+    yield
+    cleanup(db)
+    db.close()
+
+def create(name: str, pre_query: bool = False) -> bool:
+    """创建产品；pre_query 为 True 时按旧流程先查询重名"""
+    db = SessionLocal()
+    try:
+        if pre_query and db.execute(text("SELECT 1 FROM products WHERE product_name = :name"),
+                                    {"name": name}).first():
+            return False
+        try:
+            ProductRepository.create(db, name, "test", 1.0)
+            db.commit()
+            return True
+        except IntegrityError as e:
+            db.rollback()
+            assert violated_unique_constraint(e) == UQ_PRODUCTS_PRODUCT_NAME
+            return False
+    finally:
+        db.close()
+
+def test_concurrent_creates_never_duplicate(database):
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(lambda _: create(NAME), range(ATTEMPTS)))
+
+    db = SessionLocal()
+    count = db.execute(text("SELECT COUNT(*) FROM products WHERE product_name = :name"), {"name": NAME}).scalar()
+    db.close()
+    assert sum(results) == 1
+    assert count == 1
+
+def test_constraint_check_saves_a_round_trip(database):
+    modes = (("insert-only", False), ("pre-query", True))
+    statements = {label: 0 for label, _ in modes}
+    seconds = {label: 0.0 for label, _ in modes}
+    current = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[current[0]] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        # 两种写法逐轮交替执行，缓存预热等先后顺序带来的偏差对两者相同
+        for i in range(ROUNDS):
+            for label, pre_query in modes:
+                current[:] = [label]
+                started = time.perf_counter()
+                assert create(f"{NAME}-{label}-{i}", pre_query)
+                seconds[label] += time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    timings = {label: (seconds[label] / ROUNDS * 1000, statements[label] / ROUNDS) for label, _ in modes}
+    for label, (latency, per_write) in timings.items():
+        print(f"\n{label}: {latency:.2f} ms/写入, {per_write:.0f} 条语句/写入")
+    assert timings["insert-only"][1] == timings["pre-query"][1] - 1
+    assert timings["insert-only"][0] < timings["pre-query"][0]